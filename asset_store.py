@@ -0,0 +1,116 @@
+"""이미지 에셋 저장소 (내용 해시 주소)
+
+docx 안의 이미지를 base64로 HTML에 박아 넣지 않고 work/images/ 아래에
+내용 해시 이름으로 한 번만 저장합니다. HTML에는 상대 경로만 남기고, 실제
+이미지는 PDF 렌더링 때 브라우저가 file:// 기준으로 읽습니다. 같은 이미지가
+여러 번 나와도 파일은 하나입니다.
+
+IMAGE_TARGET_DPI를 지정하고 Pillow가 설치되어 있으면, 본문 폭 기준으로 그
+DPI보다 큰 이미지는 줄여서 다시 압축합니다.
+"""
+
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+import mammoth
+from bs4 import BeautifulSoup
+
+from cfg import IMAGE_TARGET_DPI, WORK
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow는 선택 사항 (없으면 원본 그대로 저장)
+    Image = None
+
+IMAGE_DIR = WORK / "images"
+
+# A4 폭 8.27in - 좌우 여백 0.8in x 2 (html_to_pdf.PDF_MARGIN과 같은 값)
+PRINTABLE_WIDTH_IN = 8.27 - 1.6
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/svg+xml": ".svg",
+    "image/webp": ".webp",
+    "image/bmp": ".bmp",
+    "image/tiff": ".tif",
+    "image/x-emf": ".emf",
+    "image/x-wmf": ".wmf",
+}
+
+def _downscale(data: bytes, content_type: str, dpi: int) -> Tuple[bytes, str]:
+    """본문 폭에서 dpi를 넘는 래스터 이미지를 줄임 (실패하거나 줄일 필요 없으면 원본)"""
+    if Image is None or content_type not in ("image/png", "image/jpeg"):
+        return data, content_type
+    max_width = int(PRINTABLE_WIDTH_IN * dpi)
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            if im.width <= max_width:
+                return data, content_type
+            height = max(1, round(im.height * max_width / im.width))
+            resized = im.resize((max_width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            if content_type == "image/jpeg":
+                resized.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+            else:
+                resized.save(out, "PNG", optimize=True)
+    except Exception as e:
+        print(f"[WARN] 이미지 축소 실패 - 원본 사용: {e}")
+        return data, content_type
+    return out.getvalue(), content_type
+
+class AssetStore:
+    """내용 해시를 파일 이름으로 쓰는 이미지 저장소"""
+
+    def __init__(self, root: Path = IMAGE_DIR, target_dpi: int = IMAGE_TARGET_DPI):
+        self.root = root
+        self.target_dpi = target_dpi
+        self.stats = {"refs": 0, "stored": 0, "bytes": 0}
+        self._seen: Dict[str, Path] = {}
+
+    def put(self, data: bytes, content_type: str) -> Path:
+        """이미지를 저장하고 경로를 반환 (같은 내용이면 기존 파일 재사용)"""
+        self.stats["refs"] += 1
+        key = hashlib.sha256(data).hexdigest()[:32]
+        if self.target_dpi:
+            key += f"-{self.target_dpi}dpi"
+        if key in self._seen:
+            return self._seen[key]
+
+        path = self.root / (key + EXTENSIONS.get(content_type, ".bin"))
+        if not path.exists():
+            if self.target_dpi:
+                data, content_type = _downscale(data, content_type, self.target_dpi)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+            self.stats["stored"] += 1
+            self.stats["bytes"] += len(data)
+        self._seen[key] = path
+        return path
+
+    def ref(self, path: Path, html_dir: Path) -> str:
+        """html_dir에 놓일 HTML에서 쓸 상대 경로 (슬래시 구분)"""
+        return Path(os.path.relpath(path, html_dir)).as_posix()
+
+    def image_converter(self, html_dir: Path):
+        """mammoth convert_image 훅: 이미지를 저장소에 넣고 상대 경로만 src로 남김"""
+        def convert(image):
+            with image.open() as f:
+                data = f.read()
+            return {"src": self.ref(self.put(data, image.content_type), html_dir)}
+
+        return mammoth.images.img_element(convert)
+
+def rebase_image_refs(soup: BeautifulSoup, from_dir: Path, to_dir: Path) -> None:
+    """from_dir 기준 상대 경로 이미지를 to_dir로 옮겨 놓을 HTML 기준으로 고침"""
+    for img in soup.find_all("img"):
+        src = img.get("src") or ""
+        if not src or ":" in src.split("/", 1)[0] or src.startswith("/"):
+            continue  # data:, file:, http: 및 절대 경로는 그대로
+        img["src"] = Path(os.path.relpath(from_dir / src, to_dir)).as_posix()
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Sequence, TypeVar
+
+from cfg import RATE_LIMITS
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 추정 (한도 계산용이므로 3자 ≈ 1토큰으로 보수적으로 잡음)"""
+    return len(text) // 3 + 1
+
+class RateLimiter:
+    """분당 요청 수(RPM)와 분당 토큰 수(TPM)를 함께 제한하는 토큰 버킷"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = max(1, rpm)
+        self.tpm = max(1, tpm)
+        self._req_tokens = float(self.rpm)
+        self._tok_tokens = float(self.tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._req_tokens = min(self.rpm, self._req_tokens + elapsed * self.rpm / 60.0)
+        self._tok_tokens = min(self.tpm, self._tok_tokens + elapsed * self.tpm / 60.0)
+
+    async def acquire(self, tokens: int) -> None:
+        """요청 1건과 tokens만큼의 토큰 예산이 확보될 때까지 대기"""
+        # 한도보다 큰 요청은 버킷 용량으로 잘라서 영원히 막히지 않도록 함
+        tokens = min(max(1, tokens), self.tpm)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._req_tokens >= 1 and self._tok_tokens >= tokens:
+                    self._req_tokens -= 1
+                    self._tok_tokens -= tokens
+                    return
+                wait_req = (1 - self._req_tokens) * 60.0 / self.rpm
+                wait_tok = (tokens - self._tok_tokens) * 60.0 / self.tpm
+                await asyncio.sleep(max(wait_req, wait_tok, 0.01))
+
+def make_limiter(provider: str) -> RateLimiter:
+    """cfg.RATE_LIMITS에 정의된 공급자별 한도로 리미터 생성 (이벤트 루프마다 새로 생성)"""
+    limits = RATE_LIMITS[provider]
+    return RateLimiter(limits["rpm"], limits["tpm"])
+
+class Limiters(dict):
+    """한 실행에서 나눠 쓰는 {공급자 이름: 리미터} (처음 쓰는 공급자의 리미터는 그때 생성)
+
+    리미터는 이벤트 루프에 묶이므로 실행(asyncio.run)마다 새로 만들어 넘기고 실행이 끝나면 버립니다.
+    """
+
+    def __missing__(self, provider: str) -> RateLimiter:
+        limiter = self[provider] = make_limiter(provider)
+        return limiter
+
+async def run_in_order(items: Sequence[T], worker: Callable[[T], Awaitable[R]],
+                       concurrency: int, progress_every: int = 50) -> List[R]:
+    """최대 concurrency개를 동시에 실행하고, 결과는 입력 순서대로 반환"""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    total = len(items)
+    done = 0
+
+    async def _run(item: T) -> R:
+        nonlocal done
+        async with sem:
+            result = await worker(item)
+        done += 1
+        if progress_every and done % progress_every == 0:
+            print(f"[진행률] {done}/{total} 완료 (동시 요청 {concurrency}개)")
+        return result
+
+    return list(await asyncio.gather(*(_run(item) for item in items)))
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""대량(batch) 번역 작업: prepare → submit → poll → collect
+
+실시간 API 대신 공급자의 Batch 엔드포인트로 책 전체를 한 번에 보냅니다.
+작업 상태는 work/batch/<작업명>/state.json에 남으므로 collect는 나중에
+다른 프로세스에서 실행해도 됩니다.
+
+    python batch_job.py run     --job work/batch/ko --backend anthropic
+    python batch_job.py prepare --job work/batch/ko --backend local
+    python batch_job.py submit  --job work/batch/ko
+    python batch_job.py poll    --job work/batch/ko
+    python batch_job.py collect --job work/batch/ko
+"""
+
+import argparse
+import json
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from cfg import SEGMENT_MODE, WORK
+from segmenter import build_segments, markers_match, strip_markers
+from tm_store import open_translation_memory, source_hash
+
+# 작업 상태값
+PREPARED, SUBMITTED, ENDED, COLLECTED = "prepared", "submitted", "ended", "collected"
+
+def segment_id(text: str) -> str:
+    """원문 해시로 만든 custom_id (공급자 제한: 영숫자/-/_ 64자 이내)"""
+    return "seg-" + source_hash(text)[:40]
+
+class BatchBackend:
+    """Batch 엔드포인트 공통 인터페이스"""
+    name = ""
+    model = ""
+    prompt_version = ""
+
+    def write_requests(self, segments: List[Dict[str, str]], request_file: Path) -> None:
+        raise NotImplementedError
+
+    def submit(self, request_file: Path) -> str:
+        raise NotImplementedError
+
+    def is_ended(self, remote_id: str) -> bool:
+        raise NotImplementedError
+
+    def results(self, remote_id: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """(custom_id, 번역문 또는 실패 시 None) 나열"""
+        raise NotImplementedError
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API"""
+    name = "anthropic"
+
+    def __init__(self):
+        import translate_html_claude as tr
+        self.tr = tr
+        self.model = tr.CLAUDE_MODEL
+        self.prompt_version = tr.PROMPT_VERSION
+
+    def write_requests(self, segments, request_file):
+        with open(request_file, "w", encoding="utf-8") as f:
+            for seg in segments:
+                params = self.tr.AnthropicProvider.messages_params(self.tr.build_request_params(seg["text"]))
+                line = {"custom_id": seg["custom_id"], "params": params}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    def submit(self, request_file):
+        with open(request_file, "r", encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        batch = self.tr.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def is_ended(self, remote_id):
+        return self.tr.client.messages.batches.retrieve(remote_id).processing_status == "ended"
+
+    def results(self, remote_id):
+        for entry in self.tr.client.messages.batches.results(remote_id):
+            if entry.result.type == "succeeded":
+                yield entry.custom_id, entry.result.message.content[0].text.strip()
+            else:
+                yield entry.custom_id, None
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API (/v1/chat/completions)"""
+    name = "openai"
+
+    def __init__(self):
+        import translate_html as tr
+        self.tr = tr
+        self.model = tr.OPENAI_MODEL
+        self.prompt_version = tr.PROMPT_VERSION
+
+    def write_requests(self, segments, request_file):
+        with open(request_file, "w", encoding="utf-8") as f:
+            for seg in segments:
+                line = {
+                    "custom_id": seg["custom_id"],
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self.tr.build_request_params(seg["text"]),
+                }
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    def submit(self, request_file):
+        with open(request_file, "rb") as f:
+            uploaded = self.tr.client.files.create(file=f, purpose="batch")
+        batch = self.tr.client.batches.create(
+            input_file_id=uploaded.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        return batch.id
+
+    def is_ended(self, remote_id):
+        status = self.tr.client.batches.retrieve(remote_id).status
+        return status in ("completed", "failed", "expired", "cancelled")
+
+    def results(self, remote_id):
+        batch = self.tr.client.batches.retrieve(remote_id)
+        if not batch.output_file_id:
+            return
+        content = self.tr.client.files.content(batch.output_file_id).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                text = response["body"]["choices"][0]["message"]["content"].strip()
+                yield entry["custom_id"], text
+            else:
+                yield entry["custom_id"], None
+
+class LocalBatchBackend(BatchBackend):
+    """오프라인 테스트용 파일 기반 대체 백엔드
+
+    submit은 요청 파일을 spool 폴더에 복사만 하고, 첫 poll에서 결과 파일을
+    만들어 실제 Batch API처럼 '나중에 끝나는' 흐름을 흉내 냅니다.
+    번역문은 원문 앞에 "[KO] "를 붙인 값입니다.
+    """
+    name = "local"
+    model = "local-batch"
+    prompt_version = "local"
+
+    def __init__(self, spool_dir: Path = WORK / "batch" / "_local_backend"):
+        self.spool_dir = Path(spool_dir)
+
+    def write_requests(self, segments, request_file):
+        with open(request_file, "w", encoding="utf-8") as f:
+            for seg in segments:
+                f.write(json.dumps({"custom_id": seg["custom_id"], "text": seg["text"]},
+                                   ensure_ascii=False) + "\n")
+
+    def submit(self, request_file):
+        remote_id = f"local-{uuid.uuid4().hex[:12]}"
+        job = self.spool_dir / remote_id
+        job.mkdir(parents=True, exist_ok=True)
+        shutil.copy(request_file, job / "input.jsonl")
+        return remote_id
+
+    def is_ended(self, remote_id):
+        job = self.spool_dir / remote_id
+        output = job / "output.jsonl"
+        if not output.exists():
+            with open(job / "input.jsonl", "r", encoding="utf-8") as src, \
+                 open(output, "w", encoding="utf-8") as dst:
+                for line in src:
+                    req = json.loads(line)
+                    dst.write(json.dumps({"custom_id": req["custom_id"], "text": "[KO] " + req["text"]},
+                                         ensure_ascii=False) + "\n")
+        return True
+
+    def results(self, remote_id):
+        with open(self.spool_dir / remote_id / "output.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                yield entry["custom_id"], entry["text"]
+
+BACKENDS = {
+    "anthropic": AnthropicBatchBackend,
+    "openai": OpenAIBatchBackend,
+    "local": LocalBatchBackend,
+}
+
+def load_state(job_dir: Path) -> dict:
+    with open(Path(job_dir) / "state.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(job_dir: Path, state: dict) -> None:
+    # 임시 파일에 쓴 뒤 교체해 중간에 끊겨도 state.json이 깨지지 않게 함
+    path = Path(job_dir) / "state.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+def _parse_segments(input_html: Path):
+    from translate_html_claude import extract_translatable_texts
+    with open(input_html, "r", encoding="utf-8") as f:
+        soup = BeautifulSoup(f.read(), "lxml")
+    return soup, build_segments(extract_translatable_texts(soup), mode=SEGMENT_MODE)
+
+def prepare(job_dir: Path, input_html: Path, output_html: Path, tm_path: Path,
+            backend: BatchBackend) -> dict:
+    """TM에 없는 세그먼트를 모아 요청 파일(JSONL) 작성"""
+    from translate_html_claude import is_code_or_special_format
+    job_dir = Path(job_dir)
+    job_dir.mkdir(parents=True, exist_ok=True)
+
+    _, planned = _parse_segments(input_html)
+    tm = open_translation_memory(tm_path, model=backend.model, prompt_version=backend.prompt_version)
+    segments, seen = [], set()
+    for seg in planned:
+        text = seg.source
+        if text in seen or text in tm or is_code_or_special_format(strip_markers(text)):
+            continue
+        seen.add(text)
+        segments.append({"custom_id": segment_id(text), "text": text})
+    tm.close()
+
+    with open(job_dir / "segments.jsonl", "w", encoding="utf-8") as f:
+        for seg in segments:
+            f.write(json.dumps(seg, ensure_ascii=False) + "\n")
+    request_file = job_dir / "requests.jsonl"
+    backend.write_requests(segments, request_file)
+
+    state = {
+        "backend": backend.name,
+        "model": backend.model,
+        "prompt_version": backend.prompt_version,
+        "input_html": str(input_html),
+        "output_html": str(output_html),
+        "tm_path": str(tm_path),
+        "request_file": str(request_file),
+        "segments": len(segments),
+        "remote_id": None,
+        "status": PREPARED,
+        "created_at": time.time(),
+    }
+    save_state(job_dir, state)
+    print(f"[BATCH 준비] {len(planned)}개 세그먼트 중 미번역 {len(segments)}개 -> {request_file}")
+    return state
+
+def submit(job_dir: Path, backend: BatchBackend) -> dict:
+    state = load_state(job_dir)
+    if state["status"] != PREPARED:
+        print(f"[BATCH] 이미 제출됨: {state['remote_id']} ({state['status']})")
+        return state
+    if state["segments"] == 0:
+        state["status"] = ENDED
+    else:
+        state["remote_id"] = backend.submit(Path(state["request_file"]))
+        state["status"] = SUBMITTED
+        state["submitted_at"] = time.time()
+    save_state(job_dir, state)
+    print(f"[BATCH 제출] {state['remote_id']} ({state['segments']}개 요청)")
+    return state
+
+def poll(job_dir: Path, backend: BatchBackend, interval: float = 60.0,
+         wait: bool = True) -> dict:
+    """완료될 때까지(wait=False면 한 번만) 상태 확인"""
+    state = load_state(job_dir)
+    while state["status"] == SUBMITTED:
+        if backend.is_ended(state["remote_id"]):
+            state["status"] = ENDED
+            state["ended_at"] = time.time()
+            save_state(job_dir, state)
+            break
+        if not wait:
+            break
+        print(f"[BATCH 대기] {state['remote_id']} 처리 중... {interval:.0f}초 후 재확인")
+        time.sleep(interval)
+    print(f"[BATCH 상태] {state['status']}")
+    return state
+
+def collect(job_dir: Path, backend: BatchBackend) -> dict:
+    """결과를 TM에 넣고, TM으로 번역 HTML 생성"""
+    job_dir = Path(job_dir)
+    state = load_state(job_dir)
+    if state["status"] not in (ENDED, COLLECTED):
+        raise RuntimeError(f"아직 끝나지 않은 작업입니다: {state['status']}")
+
+    with open(job_dir / "segments.jsonl", "r", encoding="utf-8") as f:
+        texts = {seg["custom_id"]: seg["text"] for seg in map(json.loads, f)}
+
+    tm = open_translation_memory(Path(state["tm_path"]), model=state["model"],
+                                 prompt_version=state["prompt_version"])
+    done, failed = [], 0
+    if state["remote_id"]:
+        for custom_id, translated in backend.results(state["remote_id"]):
+            if translated and custom_id in texts and markers_match(texts[custom_id], translated):
+                done.append((texts[custom_id], translated))
+            else:
+                failed += 1
+    tm.put_many(done)
+
+    # 결과 병합: TM에 있고 자리표시자 구조가 맞는 세그먼트만 반영
+    soup, planned = _parse_segments(Path(state["input_html"]))
+    applied = 0
+    for seg in planned:
+        translated = tm.get(seg.source)
+        if translated is not None and translated != seg.source and seg.apply(translated):
+            applied += 1
+    tm.close()
+
+    output_html = Path(state["output_html"])
+    output_html.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_html, "w", encoding="utf-8") as f:
+        f.write(str(soup))
+
+    state.update(status=COLLECTED, collected=len(done), failed=failed, applied=applied)
+    save_state(job_dir, state)
+    print(f"[BATCH 수집] 성공 {len(done)}개 / 실패 {failed}개, {applied}개 세그먼트 반영 -> {output_html}")
+    return state
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch API 번역 작업")
+    parser.add_argument("command", choices=["prepare", "submit", "poll", "collect", "run"])
+    parser.add_argument("--job", type=Path, default=WORK / "batch" / "ko")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None)
+    parser.add_argument("--input", type=Path, default=WORK / "master_en.html")
+    parser.add_argument("--output", type=Path, default=WORK / "master_ko.html")
+    parser.add_argument("--tm", type=Path, default=WORK / "tm.sqlite")
+    parser.add_argument("--interval", type=float, default=60.0)
+    parser.add_argument("--no-wait", action="store_true", help="poll을 한 번만 확인")
+    args = parser.parse_args(argv)
+
+    # prepare 이후에는 state.json에 기록된 백엔드를 사용
+    name = args.backend
+    if name is None:
+        name = load_state(args.job)["backend"] if (args.job / "state.json").exists() else "anthropic"
+    backend = BACKENDS[name]()
+
+    if args.command in ("prepare", "run"):
+        prepare(args.job, args.input, args.output, args.tm, backend)
+    if args.command in ("submit", "run"):
+        submit(args.job, backend)
+    if args.command in ("poll", "run"):
+        poll(args.job, backend, interval=args.interval, wait=not args.no_wait)
+    if args.command in ("collect", "run"):
+        collect(args.job, backend)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""파이프라인 벤치마크: 합성 책 + 가짜 LLM 서버로 전 단계를 돌려 처리량/지연/메모리 측정
+
+실제 원고와 API 키 없이, 크기를 정할 수 있는 합성 docx 책(문단/인라인 서식/코드
+블록/표/이미지 포함)을 만들어 build_order → 병합 → HTML 변환 → 번역 대상 추출 →
+번역(fake_llm_server) → PDF 렌더링을 순서대로 측정합니다. 단계별 시간/CPU/최대
+RSS는 metrics.RunReport로 재고, 번역은 호출 지연(p50/p95)과 오류/재시도 수도
+함께 남깁니다.
+
+    python bench_pipeline.py                                # 기본 크기 (챕터 12개)
+    python bench_pipeline.py --chapters 40 --latency 0.2 --error-rate 0.05
+    python bench_pipeline.py --save-baseline                # 결과를 기준선으로 저장
+    python bench_pipeline.py --compare                      # 기준선보다 느려진 단계 표시
+    python bench_pipeline.py --fusion --latency 0           # 파일 경유 vs 메모리 경유 비교
+
+결과는 work/bench/reports/run-<시각>.json, 기준선은 work/bench/baseline.json입니다.
+가짜 서버의 응답은 "[KO] 원문"이므로 번역 품질이 아니라 속도만 봅니다.
+"""
+
+import argparse
+import json
+from functools import partial
+import random
+import shutil
+import struct
+import sys
+import zlib
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Inches, Pt
+
+from cfg import RATE_LIMITS, WORK
+
+BENCH_DIR = WORK / "bench"
+BASELINE = BENCH_DIR / "baseline.json"
+
+# 기준선보다 이 비율 이상 느리거나 커지면 회귀로 표시
+REGRESSION_TOLERANCE = 0.2
+
+# 용어집(glossary.json) 용어는 넣지 않음: 가짜 번역은 원문 그대로라 용어 검사 재번역이 생김
+WORDS = (
+    "system model memory planner routing context state message task goal step result "
+    "retrieval query document index cache policy feedback evaluation safety handoff "
+    "summary plan action observation environment request response latency budget"
+).split()
+
+PARTS = ("Part One", "Part Two", "Part Three", "Part Four")
+FRONT_MATTER = ("Dedication", "Acknowledgment", "Foreword", "Introduction")
+BACK_MATTER = ("Conclusion", "Glossary")
+
+def _png(width: int, height: int, rgb) -> bytes:
+    """단색 PNG (Pillow 없이 zlib으로 직접 인코딩)"""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    row = b"\x00" + bytes(rgb) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def _styles(doc) -> None:
+    # merge_to_html의 MAMMOTH_STYLE_MAP이 코드로 바꾸는 스타일
+    code = doc.styles.add_style("Code", WD_STYLE_TYPE.PARAGRAPH)
+    code.font.name = "Consolas"
+    code.font.size = Pt(9)
+    inline = doc.styles.add_style("Inline Code", WD_STYLE_TYPE.CHARACTER)
+    inline.font.name = "Consolas"
+
+def write_chapter_docx(path: Path, title: str, rng: random.Random, paragraphs: int,
+                       shared_image: bytes) -> None:
+    """문단/인라인 서식/코드 블록/표/이미지가 섞인 챕터 하나"""
+    doc = Document()
+    _styles(doc)
+    doc.add_heading(title, level=1)
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            doc.add_heading(f"Section {i // 10 + 1}: {_sentence(rng, 4)[:-1]}", level=2)
+        p = doc.add_paragraph(_sentence(rng) + " ")
+        p.add_run(rng.choice(WORDS)).bold = True
+        p.add_run(" then " + _sentence(rng, 8) + " Call ")
+        p.add_run(f"run_{rng.choice(WORDS)}()").style = "Inline Code"
+        p.add_run(" and keep the ")
+        p.add_run(rng.choice(WORDS)).italic = True
+        p.add_run(" " + _sentence(rng, 10))
+        if i % 7 == 3:
+            for line in (f"def handle_{i}(state):", f"    result = state.get('{rng.choice(WORDS)}')",
+                         "    return result"):
+                doc.add_paragraph(line, style="Code")
+        if i % 9 == 5:
+            table = doc.add_table(rows=3, cols=2)
+            table.cell(0, 0).text, table.cell(0, 1).text = "Name", "Description"
+            for r in (1, 2):
+                table.cell(r, 0).text = f"max_{rng.choice(WORDS)}"
+                table.cell(r, 1).text = _sentence(rng, 9)
+        if i % 12 == 6:
+            # 챕터마다 다른 그림 + 책 전체에서 반복되는 그림 (에셋 중복 제거 확인용)
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            doc.add_picture(BytesIO(_png(320, 180, color)), width=Inches(4))
+            doc.add_picture(BytesIO(shared_image), width=Inches(1))
+    doc.save(str(path))
+
+def make_corpus(root: Path, chapters: int = 12, paragraphs: int = 30, seed: int = 7) -> Path:
+    """build_order가 읽는 폴더 구조로 합성 책을 만듦 (같은 인자면 같은 내용)"""
+    rng = random.Random(seed)
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+    logo = _png(64, 64, (30, 90, 160))
+    for name in FRONT_MATTER + BACK_MATTER:
+        write_chapter_docx(root / f"{name}.docx", name, rng, max(3, paragraphs // 5), logo)
+    for n in range(1, chapters + 1):
+        part = root / PARTS[(n - 1) * len(PARTS) // chapters]
+        part.mkdir(exist_ok=True)
+        title = f"Chapter {n}- {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"
+        write_chapter_docx(part / f"{title}.docx", title, rng, paragraphs, logo)
+    return root
+
+def _fake_provider(base_url: str):
+    """가짜 서버를 가리키는 Anthropic 공급자 (실제 코드 경로 그대로: SDK + 공급자 계층)"""
+    import anthropic
+    from providers import AnthropicProvider
+    from translate_html_claude import CLAUDE_MODEL
+    from usage_meter import http_event_hooks
+
+    client = anthropic.AsyncAnthropic(
+        api_key="bench", base_url=base_url, max_retries=0,
+        http_client=anthropic.DefaultAsyncHttpxClient(event_hooks=http_event_hooks(is_async=True)),
+    )
+    return AnthropicProvider(client, CLAUDE_MODEL)
+
+def run_pipeline(corpus: Path, out_dir: Path, base_url: str, merge_docx: bool = False,
+                 render_pdf: bool = True, concurrency: Optional[int] = None, in_memory: bool = False):
+    """합성 책으로 전 단계를 실행하고 RunReport를 반환
+
+    in_memory면 main.py --in-memory처럼 변환 → 번역 → 렌더링이 파싱된 트리 하나를 넘겨받고
+    책 HTML 파일을 쓰거나 다시 읽지 않습니다. 이때 번역과 렌더링은 언어마다 번갈아 일어나므로
+    한 단계(translate_render)로 잽니다.
+    """
+    import translate_html_claude
+    from build_order import build_order
+    from html_to_pdf import html_to_pdf_chunked, soup_to_pdf_chunked
+    from merge_to_html import (book_sources, chapters_to_html, chapters_to_soup, master_docx_to_html,
+                               master_docx_to_soup, merge_docx_in_order)
+    from metrics import RunReport, file_size
+    from segmenter import build_segments
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+    image_dir = out_dir / "images"
+    master_docx = out_dir / "master_en.docx"
+    en_html = out_dir / "master_en.html"
+    ko_html = out_dir / "master_ko.html"
+    out_pdf = out_dir / "book.pdf"
+
+    report = RunReport("bench")
+    with report.stage("order") as st:
+        files = build_order(corpus)
+        st["items"] = len(files)
+        st["bytes_in"] = sum(file_size(p) for p in files)
+
+    if merge_docx:
+        with report.stage("merge") as st:
+            master_docx, insert_auto_toc = merge_docx_in_order(files, master_docx)
+            st["bytes_out"] = file_size(master_docx)
+        with report.stage("convert") as st:
+            if in_memory:
+                soup = master_docx_to_soup(master_docx, out_dir, insert_auto_toc, image_dir=image_dir)
+            else:
+                master_docx_to_html(master_docx, en_html, insert_auto_toc, image_dir=image_dir)
+                st["bytes_out"] = file_size(en_html)
+            st["bytes_in"] = file_size(master_docx)
+    else:
+        with report.stage("merge") as st:
+            sources, insert_auto_toc = book_sources(files, out_dir)
+            st["items"] = len(sources)
+        with report.stage("convert") as st:
+            if in_memory:
+                soup = chapters_to_soup(sources, out_dir, insert_auto_toc, image_dir=image_dir)
+            else:
+                chapters_to_html(sources, en_html, insert_auto_toc, image_dir=image_dir)
+                st["bytes_out"] = file_size(en_html)
+            st["bytes_in"] = sum(file_size(p) for p in sources)
+    st["images"] = len(list(image_dir.glob("*"))) if image_dir.exists() else 0
+
+    with report.stage("extract") as st:
+        if not in_memory:
+            soup = BeautifulSoup(en_html.read_text(encoding="utf-8"), "lxml")
+            st["bytes_in"] = file_size(en_html)
+        nodes = translate_html_claude.extract_translatable_texts(soup)
+        st["items"] = len(nodes)
+        st["segments"] = len(build_segments(nodes))
+    del nodes
+    if not in_memory:
+        del soup
+
+    translate_html_claude.USAGE.reset()
+    translate_html_claude.ROUTER.providers = [_fake_provider(base_url)]
+    if in_memory:
+        _translate_render_in_memory(report, soup, ko_html, out_dir, out_pdf, render_pdf, concurrency)
+        del soup
+    else:
+        _translate_render_files(report, en_html, ko_html, out_dir, out_pdf, render_pdf, concurrency)
+    llm = translate_html_claude.USAGE.summary()
+
+    for stage in report.stages:
+        if stage.get("wall_s"):
+            if stage.get("items"):
+                stage["items_per_s"] = round(stage["items"] / stage["wall_s"], 2)
+            if stage.get("bytes_in"):
+                stage["mb_per_s"] = round(stage["bytes_in"] / stage["wall_s"] / 1e6, 3)
+    return report, llm
+
+def _render_error(stage: Dict, e: Exception) -> None:
+    # 브라우저가 없는 환경 등: 나머지 결과는 그대로 남김
+    message = str(e).strip().splitlines()[0] if str(e).strip() else ""
+    stage["error"] = f"{type(e).__name__}: {message}"[:300]
+    print(f"[BENCH] 렌더링 단계 실패 - 건너뜀: {message}")
+
+def _translate_render_files(report, en_html: Path, ko_html: Path, out_dir: Path, out_pdf: Path,
+                            render_pdf: bool, concurrency: Optional[int]) -> None:
+    import translate_html_claude
+    from html_to_pdf import html_to_pdf_chunked
+    from metrics import file_size
+
+    with report.stage("translate") as st:
+        kwargs = {"concurrency": concurrency} if concurrency else {}
+        translate_html_claude.translate_html(en_html, ko_html, out_dir / "tm.sqlite", **kwargs)
+        st["bytes_in"], st["bytes_out"] = file_size(en_html), file_size(ko_html)
+    st["items"] = translate_html_claude.USAGE.summary()["calls"]
+
+    if render_pdf:
+        try:
+            with report.stage("render") as st:
+                st["pages"] = html_to_pdf_chunked(ko_html, out_pdf)
+                st["bytes_in"], st["bytes_out"] = file_size(ko_html), file_size(out_pdf)
+        except Exception as e:
+            _render_error(report.stages[-1], e)
+
+def _translate_render_in_memory(report, soup, ko_html: Path, out_dir: Path, out_pdf: Path,
+                                render_pdf: bool, concurrency: Optional[int]) -> None:
+    import translate_html_claude
+    from html_to_pdf import soup_to_pdf_chunked
+    from metrics import file_size
+
+    def render(lang, translated, output_html):
+        try:
+            st["pages"] = soup_to_pdf_chunked(translated, out_pdf, out_dir, output_html.stem)
+            st["bytes_out"] = file_size(out_pdf)
+        except Exception as e:
+            _render_error(st, e)
+
+    kwargs = {"concurrency": concurrency} if concurrency else {}
+    with report.stage("translate_render" if render_pdf else "translate") as st:
+        translate_html_claude.translate_document(soup, ko_html, out_dir / "tm.sqlite", write_output=False,
+                                                 on_output=render if render_pdf else None, **kwargs)
+    st["items"] = translate_html_claude.USAGE.summary()["calls"]
+
+# 파일 경유/메모리 경유가 같은 일을 하는 구간 (extract는 측정용 재파싱이라 뺌)
+FUSED_STAGES = ("convert", "translate", "render", "translate_render")
+
+def fusion_savings(files: Dict, memory: Dict) -> Dict:
+    """파일 경유 실행 대비 메모리 경유 실행이 줄인 시간/최대 RSS (둘 다 RunReport.to_dict 결과)"""
+    def totals(result: Dict) -> Dict:
+        stages = [s for s in result["stages"] if s["stage"] in FUSED_STAGES]
+        return {"wall_s": round(sum(s["wall_s"] for s in stages), 3),
+                "peak_rss_bytes": max((s["peak_rss_bytes"] for s in stages), default=0)}
+    before, after = totals(files), totals(memory)
+    return {"files": before, "in_memory": after,
+            "wall_s_saved": round(before["wall_s"] - after["wall_s"], 3),
+            "peak_rss_bytes_saved": before["peak_rss_bytes"] - after["peak_rss_bytes"]}
+
+def compare(baseline: Dict, current: Dict, tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """기준선보다 시간/메모리가 tolerance 넘게 늘어난 단계 목록 (설명 문자열)"""
+    base = {s["stage"]: s for s in baseline.get("stages", [])}
+    regressions = []
+    for stage in current.get("stages", []):
+        old = base.get(stage["stage"])
+        if old is None or "error" in stage or "error" in old:
+            continue
+        for key in ("wall_s", "peak_rss_bytes"):
+            before, after = old.get(key) or 0, stage.get(key) or 0
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{stage['stage']}.{key}: {before} → {after} (+{after / before - 1:.0%})")
+    base_llm, llm = baseline.get("llm") or {}, current.get("llm") or {}
+    before, after = base_llm.get("latency_p95_s") or 0, llm.get("latency_p95_s") or 0
+    if before and after > before * (1 + tolerance):
+        regressions.append(f"llm.latency_p95_s: {before} → {after} (+{after / before - 1:.0%})")
+    return regressions
+
+def _print_summary(result: Dict) -> None:
+    print(f"\n[BENCH] 합성 책: {json.dumps(result['info'], ensure_ascii=False)}")
+    for s in result["stages"]:
+        rate = f", {s['items_per_s']}/s" if "items_per_s" in s else ""
+        mbps = f", {s['mb_per_s']} MB/s" if "mb_per_s" in s else ""
+        err = f"  (실패: {s['error']})" if "error" in s else ""
+        print(f"  {s['stage']:<10} {s['wall_s']:>8.2f}s  CPU {s['cpu_s']:>7.2f}s"
+              f"  RSS {s['peak_rss_bytes'] >> 20:>5}MB{rate}{mbps}{err}")
+    llm = result["llm"]
+    print(f"  LLM 호출 {llm['calls']}회, 재시도 {llm['retries']}회, p50 {llm['latency_p50_s']}s"
+          f" / p95 {llm['latency_p95_s']}s, 중복 제거 {llm.get('dedup_ratio', 0.0):.1%}, 카운터 {llm['counters']}")
+
+def main(argv=None) -> int:
+    from fake_llm_server import FakeLLMServer
+
+    parser = argparse.ArgumentParser(description="합성 책과 가짜 LLM 서버로 파이프라인 전 단계 벤치마크")
+    parser.add_argument("--chapters", type=int, default=12)
+    parser.add_argument("--paragraphs", type=int, default=30, help="챕터당 문단 수")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency", type=float, default=0.05, help="가짜 서버 기본 응답 지연(초)")
+    parser.add_argument("--latency-jitter", type=float, default=0.02, help="추가 지연 평균(지수 분포)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="529 응답 비율 (0~1)")
+    parser.add_argument("--concurrency", type=int, default=None, help="동시 번역 요청 수 (기본 cfg 값)")
+    parser.add_argument("--rpm", type=int, default=100000, help="요청 한도 (실제 API 한도 대신)")
+    parser.add_argument("--tpm", type=int, default=10 ** 9, help="토큰 한도")
+    parser.add_argument("--merge-docx", action="store_true", help="docx 병합 후 변환 경로로 측정")
+    parser.add_argument("--skip-pdf", action="store_true", help="렌더링 단계 생략")
+    parser.add_argument("--in-memory", action="store_true", help="단계 사이에 책 HTML을 파일로 주고받지 않음")
+    parser.add_argument("--fusion", action="store_true",
+                        help="파일 경유와 메모리 경유를 같은 책으로 한 번씩 돌려 줄어든 시간/메모리 표시")
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 기준선으로 저장")
+    parser.add_argument("--compare", action="store_true", help="기준선과 비교, 회귀가 있으면 종료 코드 1")
+    args = parser.parse_args(argv)
+
+    # 가짜 서버를 재는 것이므로 실제 API 한도는 적용하지 않음 (make_limiter가 이 값을 읽음)
+    RATE_LIMITS["anthropic"] = {"rpm": args.rpm, "tpm": args.tpm}
+
+    corpus = make_corpus(BENCH_DIR / "corpus", args.chapters, args.paragraphs, args.seed)
+    with FakeLLMServer(min_cacheable_tokens=0, latency=args.latency, latency_jitter=args.latency_jitter,
+                       error_rate=args.error_rate, seed=args.seed) as server:
+        run = partial(run_pipeline, corpus, base_url=server.base_url, merge_docx=args.merge_docx,
+                      render_pdf=not args.skip_pdf, concurrency=args.concurrency)
+        if args.fusion:
+            files_report, files_llm = run(BENCH_DIR / "run_files", in_memory=False)
+            files_result = files_report.to_dict(files_llm)
+        report, llm = run(BENCH_DIR / "run", in_memory=args.in_memory or args.fusion)
+        llm["server_requests"], llm["server_errors"] = server.requests, server.errors
+    report.info = {k: v for k, v in vars(args).items() if k not in ("save_baseline", "compare", "fusion")}
+    report.info["in_memory"] = args.in_memory or args.fusion
+    if args.fusion:
+        report.info["fusion"] = fusion_savings(files_result, report.to_dict(llm))
+    result = report.to_dict(llm)
+    path = report.write_json(BENCH_DIR / "reports", llm)
+    _print_summary(result)
+    if args.fusion:
+        f = result["info"]["fusion"]
+        print(f"[BENCH] 메모리 경유: {f['files']['wall_s']}s → {f['in_memory']['wall_s']}s"
+              f" ({f['wall_s_saved']:+.2f}s 절약), 최대 RSS {f['files']['peak_rss_bytes'] >> 20}MB"
+              f" → {f['in_memory']['peak_rss_bytes'] >> 20}MB")
+    print(f"[BENCH] 결과: {path}")
+
+    status = 0
+    if args.compare:
+        if not BASELINE.exists():
+            print(f"[BENCH] 기준선 없음: {BASELINE} (--save-baseline으로 먼저 저장)")
+        else:
+            baseline = json.loads(BASELINE.read_text(encoding="utf-8"))
+            if baseline.get("info") != result["info"]:
+                print("[WARN] 기준선과 벤치마크 설정이 다름 - 비교가 정확하지 않을 수 있음")
+            regressions = compare(baseline, result)
+            for line in regressions:
+                print(f"[회귀] {line}")
+            print(f"[BENCH] 기준선 대비 회귀 {len(regressions)}건")
+            status = 1 if regressions else 0
+    if args.save_baseline:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[BENCH] 기준선 저장: {BASELINE}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""스킵 판정 벤치마크: 노드별 should_skip_node(기존) vs 한 번의 트리 순회(현재)
+
+    python bench_skip_classifier.py                  # 합성 HTML
+    python bench_skip_classifier.py work/master_en.html
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup, NavigableString
+
+from utils import MONO_FONTS, is_codey_text
+from translate_html_claude import extract_translatable_texts, is_code_or_special_format
+
+# ---- 비교 기준: 이전 구현 그대로 (패턴을 호출마다 re 모듈에 넘기고, 노드마다 부모 목록 생성)
+
+def legacy_is_codey_text(text: str) -> bool:
+    if not text or len(text.strip()) < 3:
+        return False
+    text = text.strip()
+    code_patterns = [
+        r'^\w+\(\)', r'^\w+\.\w+', r'[{}[\]();]', r'^\$\s', r'^[A-Z_]+=["\']', r'^\w+:',
+        r'import\s+\w+', r'from\s+\w+', r'def\s+\w+', r'class\s+\w+', r'^\s*#\s', r'^\s*//',
+        r'^\s*<!--', r'^\s*\*\s',
+    ]
+    for pattern in code_patterns:
+        if re.search(pattern, text, re.MULTILINE):
+            return True
+    special_chars = len(re.findall(r'[{}[\]();=<>]', text))
+    if len(text) > 10 and special_chars / len(text) > 0.1:
+        return True
+    return False
+
+def legacy_should_skip_node(node) -> bool:
+    if not isinstance(node, NavigableString):
+        return False
+    parents = [p.name for p in node.parents if getattr(p, "name", None)]
+    if any(p in ("code", "pre", "kbd", "samp") for p in parents):
+        return True
+    if "td" in parents or "th" in parents:
+        if legacy_is_codey_text(str(node)):
+            return True
+    parent = node.parent
+    if parent:
+        style = (parent.get("style", "") or "").lower()
+        if "font-family" in style and any(m in style for m in MONO_FONTS):
+            return True
+    return legacy_is_codey_text(str(node))
+
+def legacy_is_code_or_special_format(text: str) -> bool:
+    text = text.strip()
+    if len(text) < 5:
+        return True
+    code_indicators = [
+        r'^\s*[{}\[\]();]', r'^\s*\w+\s*[:=]\s*', r'^\s*[A-Z_]+\s*=', r'^\s*\$\s*\w+',
+        r'^\s*[a-zA-Z_]\w*\(', r'^\s*import\s+', r'^\s*from\s+\w+', r'^\s*def\s+\w+',
+        r'^\s*class\s+\w+', r'^\s*#.*', r'^\s*//.*', r'^\s*<!--.*-->', r'^\s*<[^>]+>.*</[^>]+>$',
+    ]
+    for pattern in code_indicators:
+        if re.search(pattern, text, re.MULTILINE):
+            return True
+    special_chars = len(re.findall(r'[{}[\]();=<>]', text))
+    if len(text) > 10 and special_chars / len(text) > 0.15:
+        return True
+    return False
+
+def legacy_extract_translatable_texts(soup: BeautifulSoup) -> list:
+    translatable_nodes = []
+    for element in soup.find_all(string=True):
+        if isinstance(element, NavigableString):
+            if legacy_should_skip_node(element):
+                continue
+            text = str(element).strip()
+            if not text or len(text) < 3:
+                continue
+            if legacy_is_code_or_special_format(text):
+                continue
+            parent = element.parent
+            if parent and parent.get('class'):
+                classes = parent.get('class')
+                if any(cls in ['code', 'highlight', 'language-', 'hljs'] for cls in classes):
+                    continue
+            translatable_nodes.append(element)
+    return translatable_nodes
+
+# ---- 합성 입력
+
+def synthetic_html(sections: int = 400) -> str:
+    """문단/인라인 코드/코드 블록/표/monospace 스타일이 섞인 책 모양 HTML"""
+    parts = ["<html><body>"]
+    for i in range(sections):
+        parts.append(f"<h2>Chapter {i}: Agentic patterns</h2>")
+        parts.append(
+            f"<div><section><p>An <strong>agent</strong> calls a <code>tool()</code> "
+            f"and reflects on result number {i}.</p>"
+            f"<p>The orchestrator routes prompt {i % 17} to the planner.</p></section></div>"
+        )
+        parts.append(f"<pre class='code'>def step_{i}(x):\n    return x + {i}</pre>")
+        parts.append(
+            "<table><tr><th>Name</th><th>Value</th></tr>"
+            f"<tr><td>timeout</td><td>config.timeout = {i}</td></tr>"
+            f"<tr><td>Description of row {i}</td><td>Used by the agent</td></tr></table>"
+        )
+        parts.append(f"<p><span style='font-family: Consolas'>pip install agent{i}</span> then run it.</p>")
+        parts.append("<ul><li>Note: reuse the memory</li><li>See the References section</li></ul>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def bench(html: str, repeat: int = 3) -> dict:
+    soup = BeautifulSoup(html, "lxml")
+
+    def timed(fn):
+        best = float("inf")
+        for _ in range(repeat):
+            is_codey_text.cache_clear()
+            is_code_or_special_format.cache_clear()
+            start = time.perf_counter()
+            result = fn(soup)
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    legacy_s, legacy_nodes = timed(legacy_extract_translatable_texts)
+    new_s, new_nodes = timed(extract_translatable_texts)
+    same = [id(n) for n in legacy_nodes] == [id(n) for n in new_nodes]
+    return {
+        "nodes": len(new_nodes),
+        "legacy_s": legacy_s,
+        "single_pass_s": new_s,
+        "speedup": legacy_s / new_s if new_s else float("inf"),
+        "same_node_set": same,
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        html = Path(sys.argv[1]).read_text(encoding="utf-8")
+        label = sys.argv[1]
+    else:
+        html = synthetic_html()
+        label = "synthetic"
+    r = bench(html)
+    print(f"[BENCH] {label}: {r['nodes']}개 번역 대상 노드")
+    print(f"  기존(노드별)   : {r['legacy_s']*1000:.1f} ms")
+    print(f"  단일 순회      : {r['single_pass_s']*1000:.1f} ms")
+    print(f"  속도 향상      : {r['speedup']:.1f}x, 노드 집합 동일: {r['same_node_set']}")
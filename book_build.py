@@ -0,0 +1,210 @@
+"""기본 빌드: 챕터 단위 파이프라인 (변환 → 번역 → 렌더링을 겹쳐 실행)
+
+book_sources의 docx를 챕터마다 (프로세스 풀에서 미리) 변환하고, TranslationSession 하나(TM/속도 제한/이벤트
+루프 공유)로 번역한 뒤, html_to_pdf_chunked와 같은 규칙(CHUNK_MIN_CHARS)으로 청크에
+모아 PartRenderer 하나로 렌더링합니다. 세 단계는 stage_pipeline으로 겹쳐 실행되어
+챕터 N을 번역하는 동안 앞 챕터의 청크를 렌더링합니다. 끝나면 부분 PDF를 순서대로
+합치고 전체 기준 쪽번호와 머리말을 찍습니다.
+
+자동 목차는 모든 챕터의 제목이 있어야 만들 수 있으므로 마지막 항목으로 번역해
+전체 빌드처럼 첫 청크 맨 앞에 넣습니다. 첫 청크가 어디서 끝나는지는 목차 길이에
+달려 있으므로, 혼자서 CHUNK_MIN_CHARS를 넘는 챕터가 처음 나올 때까지의 앞부분만
+목차를 기다리고 나머지 청크는 번역이 끝나는 대로 렌더링합니다.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from html_to_pdf import CHUNK_MIN_CHARS, PartRenderer, merge_parts_with_page_numbers
+from merge_to_html import CHAPTER_BREAK, auto_toc, docx_to_html_fragment, number_headings
+from stage_pipeline import Stage, run_stages
+from translate_html_claude import TranslationSession, language_path
+
+class BookPart:
+    """파이프라인 항목 하나: 챕터(source) 또는 책 끝을 알리는 자동 목차 항목(source=None)"""
+
+    def __init__(self, index: int, source: Optional[Path] = None):
+        self.index = index
+        self.source = source
+        self.soup: Optional[BeautifulSoup] = None  # 변환 결과 (번역이 끝나면 버림)
+        self.en = ""                               # 변환된 본문 HTML
+        self.html: Dict[str, str] = {}             # 언어 → 번역된 본문 HTML
+
+    @property
+    def name(self) -> str:
+        return "toc" if self.source is None else f"{self.index:03d}-{self.source.stem}"
+
+def _body_contents(soup: BeautifulSoup) -> str:
+    return (soup.body or soup).decode_contents()
+
+class ChunkPlan:
+    """번역된 챕터를 split_parts_by_chapter와 같은 규칙으로 청크에 모음 (언어 하나)
+
+    청크가 min_chars 이상이 된 뒤에 오는 챕터부터 새 청크를 시작합니다. wait_for_toc면
+    목차가 붙을 첫 청크의 경계를 아직 모르므로, 혼자서 min_chars를 넘는 챕터가 나올
+    때까지는 앞부분에 모아 두었다가 finish()에서 목차와 함께 나눕니다.
+    """
+
+    def __init__(self, min_chars: int = CHUNK_MIN_CHARS, wait_for_toc: bool = False):
+        self.min_chars = min_chars
+        self.head: List[str] = []  # 목차를 기다리는 앞부분 챕터
+        self.head_open = wait_for_toc
+        self.current: List[str] = []
+        self.size = 0
+
+    def add(self, html: str) -> List[List[str]]:
+        """챕터 하나를 더하고 이제 내용이 확정된 청크(챕터 HTML 목록) 목록 반환"""
+        if self.head_open:
+            self.head.append(html)
+            # 이 챕터가 든 청크는 목차 길이와 관계없이 min_chars 이상이므로 다음 챕터부터 새 청크
+            self.head_open = len(html) < self.min_chars
+            return []
+        ready = []
+        if self.current and self.size >= self.min_chars:
+            ready.append(self.current)
+            self.current, self.size = [], 0
+        self.current.append(html)
+        self.size += len(html)
+        return ready
+
+    def finish(self, toc_html: str = "") -> Tuple[List[List[str]], List[List[str]]]:
+        """(목차가 붙은 앞부분 청크들, 남은 마지막 청크) 반환 - 앞부분은 책 맨 앞에 옴"""
+        head: List[List[str]] = []
+        size = 0
+        for i, html in enumerate(self.head):
+            if not head or size >= self.min_chars:
+                head.append([])
+                size = 0
+            # 전체 빌드처럼 목차는 첫 챕터(표지) 앞, 같은 청크에
+            html = toc_html + html if i == 0 else html
+            head[-1].append(html)
+            size += len(html)
+        if toc_html and not head:
+            head.append([toc_html])
+        tail = [self.current] if self.current else []
+        return head, tail
+
+class BookRenderer:
+    """렌더링 단계: 언어마다 청크를 모아 PartRenderer로 부분 PDF를 만들고 순서를 기록"""
+
+    def __init__(self, renderer: PartRenderer, languages: List[str], html_dir: Path, stem_html: Path,
+                 wait_for_toc: bool, min_chars: int = CHUNK_MIN_CHARS):
+        self.renderer = renderer
+        self.html_dir = html_dir  # 이미지 상대 경로 기준 (변환 때의 html_dir)
+        self.stems = {lang: language_path(stem_html, lang).stem for lang in languages}
+        self.plans = {lang: ChunkPlan(min_chars, wait_for_toc) for lang in languages}
+        self.head: Dict[str, List[Path]] = {lang: [] for lang in languages}
+        self.tail: Dict[str, List[Path]] = {lang: [] for lang in languages}
+        self.files: List[Path] = []
+        self.count = {lang: 0 for lang in languages}
+
+    def _job(self, lang: str, chapters: List[str]) -> Tuple[Path, Path]:
+        # 번호는 만든 순서 (목차가 붙는 앞부분 청크는 마지막에 만들어짐, 순서는 pdfs()가 맞춤)
+        html_path = self.html_dir / f"{self.stems[lang]}.part{self.count[lang]:03d}.html"
+        pdf_path = html_path.with_suffix(".pdf")
+        self.count[lang] += 1
+        self.files += [html_path, pdf_path]
+        html_path.write_text("<html><body>" + "".join(chapters) + "</body></html>", encoding="utf-8")
+        return html_path, pdf_path
+
+    def render(self, parts: List[BookPart]) -> None:
+        jobs = []
+        for part in parts:
+            for lang, plan in self.plans.items():
+                if part.source is not None:
+                    chunks = [(self.tail, chunk) for chunk in plan.add(part.html[lang])]
+                else:
+                    head, tail = plan.finish(part.html.get(lang, ""))
+                    chunks = [(self.head, chunk) for chunk in head] + [(self.tail, chunk) for chunk in tail]
+                for order, chunk in chunks:
+                    job = self._job(lang, chunk)
+                    order[lang].append(job[1])
+                    jobs.append(job)
+        self.renderer.render(jobs)
+
+    def pdfs(self, lang: str) -> List[Path]:
+        return self.head[lang] + self.tail[lang]
+
+    def cleanup(self) -> None:
+        for path in self.files:
+            path.unlink(missing_ok=True)
+
+def build_book(sources: List[Path], insert_auto_toc: bool, html_dir: Path, master_en_html: Path,
+               master_ko_html: Path, tm_path: Path, out_pdf: Path, languages: List[str],
+               resume: bool = False, journal_dir: Optional[Path] = None,
+               min_chars: int = CHUNK_MIN_CHARS) -> dict:
+    """챕터 파이프라인으로 책을 만들고 {"pages": {언어: 쪽수}, "times": 단계별 작업 시간} 반환
+
+    출력(master_en.html, 언어별 master_ko.html, PDF)은 전체 빌드와 같은 경로에 씁니다.
+    번역 저널은 journal_dir(기본 html_dir/journal) 아래에 챕터/언어별로 남습니다.
+    """
+    parts = [BookPart(i, src) for i, src in enumerate(sources)] + [BookPart(len(sources))]
+    toc_entries: List[Tuple[str, str]] = []
+
+    fragments = []  # 챕터 순서대로의 변환 작업 (프로세스 풀에서 미리 진행)
+
+    def convert(part: BookPart) -> None:
+        if part.source is None:
+            # 모든 챕터가 변환된 뒤이므로 책 전체의 제목으로 목차를 만듦
+            soup = BeautifulSoup("<html><body></body></html>", "lxml")
+            toc = auto_toc(soup, toc_entries) if insert_auto_toc else None
+            if toc is not None:
+                soup.body.append(toc)
+                part.soup, part.en = soup, str(toc)
+            return
+        print(f"[변환] {part.source.name}")
+        soup = BeautifulSoup(fragments[part.index].result(), "lxml")
+        # 제목 id는 앞 챕터까지의 제목 수에 이어 붙임 (전체에 add_auto_toc를 한 것과 같음)
+        toc_entries.extend(number_headings(soup, start=len(toc_entries) + 1))
+        part.soup = soup
+        part.en = (CHAPTER_BREAK if part.index else "") + _body_contents(soup)
+
+    def translate(part: BookPart) -> None:
+        if part.soup is None:
+            return
+        print(f"[번역] {part.source.name if part.source else '자동 목차'}")
+
+        def keep(lang: str, soup: BeautifulSoup) -> None:
+            if part.source is None:
+                part.html[lang] = str(soup.find("div", class_="auto-toc"))
+            else:
+                part.html[lang] = (CHAPTER_BREAK if part.index else "") + _body_contents(soup)
+
+        session.translate(part.soup, part.name, keep)
+        part.soup = None
+
+    with ProcessPoolExecutor() as pool, \
+            TranslationSession(tm_path, journal_dir or html_dir / "journal", master_ko_html, resume=resume,
+                               languages=languages) as session, \
+            PartRenderer() as renderer:
+        fragments.extend(pool.submit(docx_to_html_fragment, src, html_dir) for src in sources)
+        book = BookRenderer(renderer, session.languages, html_dir, master_ko_html, insert_auto_toc, min_chars)
+        try:
+            stages = [Stage("convert", convert), Stage("translate", translate),
+                      Stage("render", book.render, batch=True)]
+            times = run_stages(parts, stages)
+            session.finish()
+            print("[PIPELINE] " + " / ".join(f"{name} {sec:.1f}s" for name, sec in times.items()))
+
+            # 5) 부분 PDF를 순서대로 합치고 전체 기준 쪽번호/머리말을 찍음 (언어마다 하나)
+            pages = {}
+            for lang in session.languages:
+                pdf_path = language_path(out_pdf, lang)
+                pages[lang] = merge_parts_with_page_numbers(book.pdfs(lang), pdf_path)
+                print(f"[DONE] PDF: {pdf_path.resolve()} ({pages[lang]}쪽)")
+        finally:
+            book.cleanup()
+
+    # 전체 빌드와 같은 책 HTML도 남김 (batch_job, 미리보기 등이 읽음)
+    toc = parts[-1]
+    chapters = parts[:-1]
+    master_en_html.write_text("<html><body>" + toc.en + "".join(p.en for p in chapters) + "</body></html>",
+                              encoding="utf-8")
+    for lang in session.languages:
+        language_path(master_ko_html, lang).write_text(
+            "<html><body>" + toc.html.get(lang, "") + "".join(p.html[lang] for p in chapters)
+            + "</body></html>", encoding="utf-8")
+    return {"pages": pages, "times": times}
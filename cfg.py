@@ -21,9 +21,86 @@ span[style-name='Code'] => code
 span[style-name='Inline Code'] => code
 """
 
+# 이미지 축소 기준 DPI (본문 폭 기준, 0이면 원본 그대로 저장 / Pillow 필요)
+IMAGE_TARGET_DPI = int(os.getenv("IMAGE_TARGET_DPI", "0"))
+
 # OpenAI 설정
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 
 # Anthropic 설정
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241218")
+# API 주소를 바꿀 때만 지정 (예: fake_llm_server.py로 로컬 테스트)
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL") or None
+
+# 번역 메모리 백엔드 ("sqlite" 기본, 기존 방식은 "json")
+TM_BACKEND = os.getenv("TM_BACKEND", "sqlite")
+
+# 용어집 ({영어 용어: 한국어 용어 또는 허용 목록}) - 번역 후 용어 검사에 사용
+# 다른 언어는 같은 폴더의 glossary.<언어>.json (예: glossary.ja.json)이 있으면 사용
+GLOSSARY_PATH = Path(os.getenv("GLOSSARY_PATH", "glossary.json"))
+
+# 번역할 언어 (한 번 파싱/분할한 결과로 언어별 HTML/PDF를 함께 만듦, 예: "ko,ja,zh")
+TARGET_LANGUAGES = [l.strip() for l in os.getenv("TARGET_LANGUAGES", "ko").split(",") if l.strip()]
+
+# 유사 문장 TM 검색 (sqlite 백엔드 전용): 이 유사도 이상이면 이전 번역을 고쳐 쓰도록 요청
+FUZZY_TM = os.getenv("FUZZY_TM", "1") == "1"
+FUZZY_TM_THRESHOLD = float(os.getenv("FUZZY_TM_THRESHOLD", "0.85"))
+
+# 동시 번역 설정 (한 번에 처리 중인 최대 요청 수)
+TRANSLATE_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "8"))
+
+# 번역 단위 ("block": 문단/목록/제목/표 셀 단위, "node": 텍스트 노드 단위)
+SEGMENT_MODE = os.getenv("SEGMENT_MODE", "block")
+
+# 스트리밍 번역 시 한 번에 읽어 번역하는 본문 분량 (HTML 글자 수 기준)
+STREAM_WINDOW_CHARS = int(os.getenv("STREAM_WINDOW_CHARS", "200000"))
+
+# PDF 청크 동시 렌더링 수 (브라우저 컨텍스트 수)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 챕터 파이프라인(변환 → 번역 → 렌더링)에서 단계 사이 큐에 쌓아 둘 수 있는 챕터 수
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+
+# 렌더 데몬 (render_daemon.py) 소켓 경로와 페이지 교체 주기(작업 수)
+RENDER_SOCKET = Path(os.getenv("RENDER_SOCKET", str(WORK / "render.sock")))
+RENDER_RECYCLE_AFTER = int(os.getenv("RENDER_RECYCLE_AFTER", "50"))
+# 데몬 응답 대기 한도(초): 상태 확인/요청 줄 읽기는 짧게, 렌더 작업은 대기열 포함 넉넉히
+RENDER_PROBE_TIMEOUT_S = float(os.getenv("RENDER_PROBE_TIMEOUT_S", "2"))
+RENDER_JOB_TIMEOUT_S = float(os.getenv("RENDER_JOB_TIMEOUT_S", "600"))
+
+# --in-memory 빌드에서 중간 HTML(master_en.html, master_ko.html)을 디버깅용으로 남길지
+DEBUG_SNAPSHOTS = os.getenv("DEBUG_SNAPSHOTS", "0") == "1"
+
+# 원고 폴더 색인 (docx 경로/크기/수정 시각/해시, 다음 실행에서 바뀐 파일만 다시 해시)
+SOURCE_MANIFEST = Path(os.getenv("SOURCE_MANIFEST", str(WORK / "source_manifest.json")))
+
+# 감시 모드(watch.py): 미리보기 서버 포트와 watchdog이 없을 때 원고 폴더를 다시 훑는 간격(초)
+PREVIEW_PORT = int(os.getenv("PREVIEW_PORT", "8800"))
+WATCH_POLL_S = float(os.getenv("WATCH_POLL_S", "1.0"))
+
+# 실행 보고서(JSON, 실행마다 하나)와 Prometheus textfile collector용 지표 파일
+REPORT_DIR = Path(os.getenv("REPORT_DIR", str(WORK / "reports")))
+METRICS_TEXTFILE = Path(os.getenv("METRICS_TEXTFILE", str(WORK / "metrics.prom")))
+
+# 번역 공급자 순서 (앞이 우선, 키가 설정된 공급자만 사용)와 재시도/회로 차단/hedge 설정
+TRANSLATE_PROVIDERS = [p.strip() for p in os.getenv("TRANSLATE_PROVIDERS", "anthropic,openai").split(",") if p.strip()]
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1.0"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_S = float(os.getenv("BREAKER_RESET_S", "30"))
+HEDGE_AFTER_S = float(os.getenv("HEDGE_AFTER_S", "0"))  # 0이면 hedge 요청 안 보냄
+
+# 공급자별 분당 요청 수(RPM) / 분당 토큰 수(TPM) 한도
+RATE_LIMITS = {
+    "anthropic": {
+        "rpm": int(os.getenv("ANTHROPIC_RPM", "50")),
+        "tpm": int(os.getenv("ANTHROPIC_TPM", "40000")),
+    },
+    "openai": {
+        "rpm": int(os.getenv("OPENAI_RPM", "500")),
+        "tpm": int(os.getenv("OPENAI_TPM", "30000")),
+    },
+}
@@ -0,0 +1,208 @@
+"""챕터 단위 증분 빌드
+
+챕터(docx)마다 변환 HTML → 번역 HTML → 부분 PDF를 만들어 work/cache/ 아래에
+내용 해시 키로 저장합니다. 다시 실행하면 원본 docx, 스타일 맵, 모델, 프롬프트가
+바뀐 챕터만 새로 만들고 나머지는 캐시를 그대로 씁니다. 세 단계는 챕터 단위
+파이프라인(stage_pipeline)으로 겹쳐 실행되어, 챕터 N을 번역하는 동안 N-1을
+렌더링합니다. 자동 목차는 전체 빌드와 같은 add_auto_toc 목차를 따로 번역/렌더링해
+맨 앞에 두고, 마지막에 부분 PDF를 합치면서 전체 기준 쪽번호를 찍습니다.
+"""
+
+import hashlib
+import json
+from importlib.metadata import version
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from bs4 import BeautifulSoup
+
+from asset_store import rebase_image_refs
+from cfg import ASSETS, IMAGE_TARGET_DPI, MAMMOTH_STYLE_MAP, SEGMENT_MODE, WORK
+from html_to_pdf import PDF_FORMAT, PDF_MARGIN, PartRenderer, merge_parts_with_page_numbers, render_parts
+from merge_to_html import CHAPTER_BREAK, add_auto_toc, book_sources, docx_to_html_fragment
+from source_index import SourceIndex, file_sha256
+from stage_pipeline import Stage, run_stages
+from translate_html_claude import CLAUDE_MODEL, PROMPT_VERSION, translate_html
+
+CACHE = WORK / "cache"
+BUILD_MANIFEST = WORK / "chapters.json"
+
+def content_key(*parts: str) -> str:
+    """여러 입력을 묶은 캐시 키 (어느 하나라도 바뀌면 키가 바뀜)"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:32]
+
+# 단계별 설정 지문: 여기 값이 바뀌면 해당 단계 이후가 모두 다시 만들어짐
+CONVERT_FINGERPRINT = content_key(MAMMOTH_STYLE_MAP, version("mammoth"), str(IMAGE_TARGET_DPI))
+TRANSLATE_FINGERPRINT = content_key(CLAUDE_MODEL, PROMPT_VERSION, SEGMENT_MODE)
+RENDER_FINGERPRINT = content_key(PDF_FORMAT, json.dumps(PDF_MARGIN, sort_keys=True))
+
+class Chapter:
+    """챕터 하나의 원본과 단계별 산출물 경로"""
+
+    def __init__(self, source: Path, sha256: Optional[str] = None):
+        self.source = source
+        # 원고 색인에 해시가 있으면 docx를 다시 읽지 않음
+        self.en_key = content_key(sha256 or file_sha256(source), CONVERT_FINGERPRINT)
+        self.ko_key = content_key(self.en_key, TRANSLATE_FINGERPRINT)
+        self.pdf_key = content_key(self.ko_key, RENDER_FINGERPRINT)
+        self.en_html = CACHE / "en" / f"{self.en_key}.html"
+        self.ko_html = CACHE / "ko" / f"{self.ko_key}.html"
+        self.pdf = CACHE / "pdf" / f"{self.pdf_key}.pdf"
+
+    @property
+    def is_current(self) -> bool:
+        return self.pdf.exists()
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+def convert_chapter(ch: Chapter) -> None:
+    # 이미지는 work/images/에 저장되고 src는 캐시 HTML 기준 상대 경로 (en/ko가 같은 깊이)
+    soup = BeautifulSoup(docx_to_html_fragment(ch.source, html_dir=ch.en_html.parent), "lxml")
+    _write_atomic(ch.en_html, str(soup))
+
+def translate_chapter(ch: Chapter, tm_path: Path) -> None:
+    tmp = ch.ko_html.with_suffix(".html.tmp")
+    ch.ko_html.parent.mkdir(parents=True, exist_ok=True)
+    translate_html(ch.en_html, tmp, tm_path)
+    tmp.replace(ch.ko_html)
+
+def render_chapters(chapters: List[Chapter], render: Optional[Callable] = None) -> None:
+    # 브라우저 한 번으로 모아서 렌더링, 다 만든 뒤 이름을 바꿔 캐시에 등록
+    # (render를 주면 그것으로: 파이프라인에서는 묶음 사이에 브라우저를 재사용하는 PartRenderer)
+    jobs = []
+    for ch in chapters:
+        ch.pdf.parent.mkdir(parents=True, exist_ok=True)
+        jobs.append((ch.ko_html, ch.pdf.with_suffix(".pdf.tmp")))
+    (render or render_parts)(jobs)
+    for _, tmp in jobs:
+        tmp.replace(tmp.with_suffix(""))
+
+def build_chapters(chapters: List[Chapter], tm_path: Path, on_ready: Optional[Callable] = None) -> dict:
+    """챕터들을 변환 → 번역 → 렌더링 파이프라인으로 만들고 단계별 작업 시간 반환
+
+    각 단계 산출물이 이미 있으면 그 단계는 건너뜁니다. on_ready(챕터)는 부분 PDF가
+    캐시에 등록될 때마다 불립니다. 번역이 느려 렌더링이 여러 묶음으로 나뉘어도
+    브라우저는 한 번만 띄웁니다.
+    """
+    def convert(ch: Chapter) -> None:
+        if not ch.en_html.exists():
+            print(f"[변환] {ch.source.name}")
+            convert_chapter(ch)
+
+    def translate(ch: Chapter) -> None:
+        if not ch.ko_html.exists():
+            print(f"[번역] {ch.source.name}")
+            translate_chapter(ch, tm_path)
+
+    with PartRenderer() as renderer:
+        stages = [Stage("convert", convert), Stage("translate", translate),
+                  Stage("render", lambda batch: render_chapters(batch, renderer.render), batch=True)]
+        times = run_stages(chapters, stages, on_done=on_ready)
+    if chapters:
+        print("[PIPELINE] " + " / ".join(f"{name} {sec:.1f}s" for name, sec in times.items()))
+    return times
+
+def _body_html(path: Path) -> str:
+    text = path.read_text(encoding="utf-8")
+    start = text.find("<body>")
+    end = text.rfind("</body>")
+    return text[start + len("<body>"):end] if start >= 0 and end >= 0 else text
+
+def _book_soup(paths: List[Path]) -> BeautifulSoup:
+    # 전체 빌드(chapters_to_soup)처럼 챕터 본문을 경계 표시로 이어 붙임
+    return BeautifulSoup("<html><body>" + CHAPTER_BREAK.join(_body_html(p) for p in paths)
+                         + "</body></html>", "lxml")
+
+class BookToc:
+    """전체 빌드와 같은 자동 목차 (모든 챕터의 변환 결과가 키, Chapter와 같은 경로 속성)"""
+
+    def __init__(self, chapters: List[Chapter]):
+        self.chapters = chapters
+        self.en_key = content_key("toc", *(ch.en_key for ch in chapters))
+        self.ko_key = content_key(self.en_key, TRANSLATE_FINGERPRINT)
+        self.pdf_key = content_key(self.ko_key, RENDER_FINGERPRINT)
+        self.en_html = CACHE / "en" / f"toc-{self.en_key}.html"
+        self.ko_html = CACHE / "ko" / f"toc-{self.ko_key}.html"
+        self.pdf = CACHE / "pdf" / f"toc-{self.pdf_key}.pdf"
+
+    def build(self, tm_path: Path) -> bool:
+        """add_auto_toc 목차만 떼어 번역하고 렌더링 (제목이 하나도 없으면 목차 없이 False)
+
+        목차 항목은 본문 제목과 같은 문장이라 본문 번역 때 TM에 들어가 있습니다.
+        """
+        if not self.ko_html.exists():
+            for ch in self.chapters:
+                if not ch.en_html.exists():
+                    convert_chapter(ch)
+            soup = _book_soup([ch.en_html for ch in self.chapters])
+            add_auto_toc(soup)
+            div = soup.find("div", class_="auto-toc")
+            if div is None:
+                return False
+            _write_atomic(self.en_html, f"<html><body>{div}</body></html>")
+            print("[번역] 자동 목차")
+            translate_chapter(self, tm_path)
+        if not self.pdf.exists():
+            render_chapters([self])
+        return True
+
+def run_incremental(file_list: List[Path], out_pdf: Path, tm_path: Path,
+                    master_ko_html: Optional[Path] = None,
+                    cover_docx: Optional[Path] = ASSETS / "cover.docx",
+                    toc_docx: Optional[Path] = ASSETS / "toc.docx",
+                    index: Optional[SourceIndex] = None) -> dict:
+    """바뀐 챕터만 다시 변환/번역/렌더링하고 최종 PDF를 조립
+
+    index(원고 색인)를 주면 챕터 해시를 색인에서 가져오고, 색인이 바뀌었다고
+    알려 준 챕터를 재빌드 목록에 표시합니다.
+    """
+    sources, insert_auto_toc = book_sources(file_list, WORK, cover_docx, toc_docx)
+    chapters = [Chapter(src, index.sha256(src) if index else None) for src in sources]
+    stale = [ch for ch in chapters if not ch.is_current]
+    print(f"[INCREMENTAL] 챕터 {len(chapters)}개 중 {len(stale)}개 재빌드 필요")
+    if index is not None:
+        for ch in stale:
+            if index.is_changed(ch.source):
+                print(f"  바뀐 원고: {ch.source.name}")
+
+    # 1) 변환 → 2) 번역 → 3) 부분 PDF를 챕터 단위로 겹쳐 실행 (끝난 챕터 PDF는 바로 캐시에 있음)
+    build_chapters(stale, tm_path, on_ready=lambda ch: print(f"[준비됨] {ch.source.name} → {ch.pdf}"))
+
+    # 4) 자동 목차: 전체 빌드처럼 add_auto_toc 목차를 책 맨 앞에 (앵커 목차, 쪽번호 없음)
+    toc = BookToc(chapters) if insert_auto_toc else None
+    if toc is not None and not toc.build(tm_path):
+        toc = None
+    parts = ([toc.pdf] if toc is not None else []) + [ch.pdf for ch in chapters]
+
+    # 5) 조립: 전체 기준 쪽번호/머리말을 찍어 합치기
+    total_pages = merge_parts_with_page_numbers(parts, out_pdf)
+
+    if master_ko_html is not None:
+        soup = _book_soup([ch.ko_html for ch in chapters])
+        if toc is not None:
+            # 제목 id를 전체 빌드와 같게 붙인 뒤 목차는 번역된 것으로 바꿈
+            add_auto_toc(soup)
+            translated = BeautifulSoup(toc.ko_html.read_text(encoding="utf-8"), "lxml")
+            soup.find("div", class_="auto-toc").replace_with(translated.find("div", class_="auto-toc"))
+        rebase_image_refs(soup, CACHE / "ko", master_ko_html.parent)
+        _write_atomic(master_ko_html, str(soup))
+
+    manifest = {
+        "chapters": [
+            {"source": str(ch.source), "en_key": ch.en_key, "ko_key": ch.ko_key,
+             "pdf_key": ch.pdf_key, "rebuilt": ch in stale}
+            for ch in chapters
+        ],
+        "total_pages": total_pages,
+    }
+    _write_atomic(BUILD_MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
+    print(f"[INCREMENTAL] 재빌드 {len(stale)}개 / 캐시 사용 {len(chapters) - len(stale)}개, 총 {total_pages}쪽")
+    return manifest
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""테스트 공용 fixture"""
+
+import anthropic
+import pytest
+
+import translate_html_claude
+from fake_llm_server import FakeLLMServer
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """가짜 LLM 서버를 띄우고 translate_html_claude의 Anthropic 공급자가 그 서버로 요청하게 함
+
+    fake_llm(**서버 옵션)을 부를 때마다 새 서버를 띄워 반환하고 (공급자는 마지막 서버를
+    가리킴), 테스트가 끝나면 모두 멈춥니다. 클라이언트는 실제 SDK 그대로입니다.
+    """
+    servers = []
+
+    def start(**options) -> FakeLLMServer:
+        server = FakeLLMServer(**options).start()
+        servers.append(server)
+        monkeypatch.setattr(translate_html_claude.ANTHROPIC, "client",
+                            anthropic.AsyncAnthropic(api_key="test", base_url=server.base_url))
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
@@ -0,0 +1,213 @@
+"""테스트용 로컬 LLM 서버 (Anthropic Messages API 흉내)
+
+실제 API 대신 base_url을 이 서버로 돌려 토큰/캐시 집계를 확인할 때 씁니다.
+번역 결과는 원문 앞에 "[KO] "(요청이 다른 언어면 "[JA] " 등)를 붙인 문자열이고, 프롬프트 캐시는 다음처럼
+흉내 냅니다.
+
+- cache_control이 붙은 블록까지의 앞부분(system → messages 순서)이 캐시 단위
+- 이미 본 앞부분이면 그 토큰은 cache_read_input_tokens
+- 처음 보는 앞부분은 마지막 cache_control 블록까지 cache_creation_input_tokens
+- min_cacheable_tokens보다 짧은 앞부분은 캐시하지 않음 (실제 API는 1024/2048)
+- 나머지는 input_tokens
+
+응답 지연(latency + 평균 latency_jitter인 지수 분포 꼬리)과 오류율(error_rate만큼
+529 과부하 응답)을 정할 수 있어 벤치마크(bench_pipeline.py)에도 씁니다.
+
+    python fake_llm_server.py --port 8765 --latency 0.05 --error-rate 0.02
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+from async_engine import estimate_tokens
+
+def _blocks(content) -> List[dict]:
+    # system/content는 문자열이거나 블록 목록
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    return [b for b in content or [] if b.get("type") == "text"]
+
+def prompt_blocks(body: dict) -> List[Tuple[str, bool]]:
+    """캐시 앞부분 순서대로 (텍스트, cache_control 여부) 목록"""
+    blocks = [(b["text"], "cache_control" in b) for b in _blocks(body.get("system"))]
+    for message in body.get("messages", []):
+        blocks += [(b["text"], "cache_control" in b) for b in _blocks(message.get("content"))]
+    return blocks
+
+# 지시문 첫 줄의 언어 이름 → 번역 앞에 붙일 표시
+LANGUAGE_TAGS = {"Japanese": "[JA] ", "Chinese": "[ZH] "}
+
+def fake_translation(body: dict) -> str:
+    """마지막 사용자 메시지에서 번역할 원문을 찾아 "[KO] "(언어 표시)를 붙여 반환"""
+    text = "".join(b["text"] for b in _blocks(body["messages"][-1]["content"]))
+    if "New source:\n" in text:
+        source = text.rsplit("New source:\n", 1)[1]
+    else:
+        source = text.split("\n\n", 1)[-1]
+    first_line = text.split("\n", 1)[0]
+    tag = next((tag for name, tag in LANGUAGE_TAGS.items() if name in first_line), "[KO] ")
+    return tag + source
+
+class PromptCache:
+    """앞부분 해시 → 토큰 수"""
+
+    def __init__(self, min_cacheable_tokens: int = 1024):
+        self.min_cacheable_tokens = min_cacheable_tokens
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def usage(self, model: str, blocks: List[Tuple[str, bool]]) -> dict:
+        h = hashlib.sha256(model.encode("utf-8"))
+        tokens = 0
+        breakpoints = []  # (앞부분 키, 앞부분 토큰 수)
+        for text, cached in blocks:
+            h.update(text.encode("utf-8") + b"\0")
+            tokens += estimate_tokens(text)
+            if cached and tokens >= self.min_cacheable_tokens:
+                breakpoints.append((h.hexdigest(), tokens))
+
+        read = write = 0
+        with self._lock:
+            for key, size in reversed(breakpoints):
+                if key in self.entries:
+                    read = size
+                    break
+            if breakpoints and breakpoints[-1][1] > read:
+                write = breakpoints[-1][1] - read
+            for key, size in breakpoints:
+                self.entries[key] = size
+        return {
+            "input_tokens": tokens - read - write,
+            "cache_creation_input_tokens": write,
+            "cache_read_input_tokens": read,
+        }
+
+class FakeLLMServer:
+    """백그라운드 스레드에서 도는 가짜 API 서버 (with 문으로 시작/종료)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 min_cacheable_tokens: int = 1024, latency: float = 0.0,
+                 latency_jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.cache = PromptCache(min_cacheable_tokens)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.fail_next = 0  # 이 수만큼 다음 요청에 529(과부하)로 응답 (재시도 확인용)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/v1/messages":
+                    self._reply(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if server.take_failure():
+                    self._reply(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+                    return
+                self._reply(200, server.handle_messages(body))
+
+            def _reply(self, status: int, payload: dict):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def take_failure(self) -> bool:
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                self.errors += 1
+                return True
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.errors += 1
+                return True
+        return False
+
+    def _delay(self) -> float:
+        with self._lock:
+            jitter = self.rng.expovariate(1 / self.latency_jitter) if self.latency_jitter else 0.0
+        return self.latency + jitter
+
+    def handle_messages(self, body: dict) -> dict:
+        with self._lock:
+            self.requests += 1
+            request_id = self.requests
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        model = body.get("model", "")
+        text = fake_translation(body)
+        usage = self.cache.usage(model, prompt_blocks(body))
+        usage["output_tokens"] = estimate_tokens(text)
+        return {
+            "id": f"msg_fake_{request_id}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": usage,
+        }
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="테스트용 로컬 LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--min-cacheable-tokens", type=int, default=1024)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답마다 기다릴 초")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="추가 지연의 평균 (지수 분포)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="529로 응답할 비율 (0~1)")
+    args = parser.parse_args(argv)
+    server = FakeLLMServer(args.host, args.port, args.min_cacheable_tokens, args.latency,
+                           args.latency_jitter, args.error_rate)
+    print(f"[가짜 LLM 서버] {server.base_url} 대기 중")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""번역 메모리 유사 문장 검색 (MinHash LSH)
+
+수정된 원고에서 공백/따옴표/숫자/단어 하나만 바뀐 문장도 TM에서 찾을 수 있도록
+정규화한 텍스트의 단어 2-gram으로 MinHash 서명을 만들고, 서명을 밴드로 나눠
+LSH 버킷 키를 만듭니다. 버킷 키는 SQLite 표(tm_lsh)에 넣어 두고 같은 버킷에
+걸린 후보만 실제 유사도로 다시 확인하므로 항목이 수십만 개여도 빠릅니다.
+"""
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+from difflib import SequenceMatcher
+from typing import List, NamedTuple
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS  # 밴드당 4행 → Jaccard 약 0.6부터 후보로 잡힘
+MIN_TOKENS = 4            # 이보다 짧은 문장은 정확 일치만 사용
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240601)  # 프로세스가 달라도 같은 서명이 나오도록 고정 시드
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-", "\xa0": " "})
+_SPACE_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"<[^>]+>|\w+", re.UNICODE)
+
+class NearMatch(NamedTuple):
+    score: float   # 정규화한 텍스트의 유사도 (1.0이면 정규화 후 동일)
+    source: str
+    target: str
+
+def normalize(text: str) -> str:
+    """유사도 비교용 정규화 (유니코드/대소문자/따옴표·대시/공백 통일, 자리표시자는 유지)"""
+    text = unicodedata.normalize("NFKC", text).translate(_QUOTES).casefold()
+    return _SPACE_RE.sub(" ", text).strip()
+
+def shingles(normalized: str) -> List[bytes]:
+    """단어(자리표시자 포함) 2-gram 목록"""
+    tokens = _TOKEN_RE.findall(normalized)
+    if len(tokens) < MIN_TOKENS:
+        return []
+    return [f"{a} {b}".encode("utf-8") for a, b in zip(tokens, tokens[1:])]
+
+def signature(normalized: str) -> List[int]:
+    """MinHash 서명 (NUM_PERM개), 문장이 너무 짧으면 빈 목록"""
+    grams = shingles(normalized)
+    if not grams:
+        return []
+    hashes = [int.from_bytes(hashlib.blake2b(g, digest_size=8).digest(), "little") for g in set(grams)]
+    return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS]
+
+def band_keys(sig: List[int]) -> List[int]:
+    """LSH 밴드별 버킷 키 목록 (밴드 번호도 키에 섞어 밴드끼리 겹치지 않게 함)"""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<B{ROWS}Q", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+def similarity(a_normalized: str, b_normalized: str) -> float:
+    """정규화한 두 텍스트의 문자 단위 유사도 (0~1)"""
+    if a_normalized == b_normalized:
+        return 1.0
+    return SequenceMatcher(None, a_normalized, b_normalized, autojunk=False).ratio()
@@ -0,0 +1,158 @@
+"""용어집 데이터와 번역 후 용어 검사
+
+glossary.json의 {영어 용어: 한국어 용어(또는 허용 목록)}을 읽어 원문/번역 쌍에서
+원문에 용어가 나왔는데 번역에 정해진 한국어 용어가 없는 경우를 찾습니다.
+용어가 수천 개여도 원문과 번역을 각각 한 번씩만 훑도록 Aho-Corasick 자동자를
+씁니다.
+
+    python glossary.py work/tm.sqlite     # TM 전체 검사
+"""
+
+import json
+import sqlite3
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cfg import GLOSSARY_PATH
+
+class AhoCorasick:
+    """여러 문자열을 한 번에 찾는 자동자 (대소문자 구분 없음)"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pattern in patterns:
+            self._add(pattern.casefold())
+        self._build()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build(self) -> None:
+        # 너비 우선으로 실패 링크를 만들고 출력 목록을 이어 붙임
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """(시작, 끝, 패턴 번호)를 끝 위치 순서로 반환"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text.casefold()):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                yield i + 1 - len(self.patterns[idx]), i + 1, idx
+
+def _is_word_match(text: str, start: int, end: int) -> bool:
+    # 영어 단어 경계 (복수형 -s/-es는 같은 용어로 봄)
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    rest = text[end:end + 3].casefold()
+    for suffix in ("es", "s", ""):
+        if rest.startswith(suffix):
+            after = rest[len(suffix):len(suffix) + 1]
+            if not after or not after.isalnum():
+                return True
+    return False
+
+class Glossary:
+    """영어 용어 → 허용되는 번역 용어 목록 (기본은 한국어)"""
+
+    def __init__(self, terms: Dict[str, List[str]], language: str = "Korean"):
+        self.terms = terms
+        self.language = language
+        self.sources = list(terms)
+        self._source_ac = AhoCorasick(self.sources)
+        self.targets = sorted({t for ts in terms.values() for t in ts})
+        self._target_ac = AhoCorasick(self.targets)
+
+    @classmethod
+    def load(cls, path: Path = GLOSSARY_PATH, language: str = "Korean") -> "Glossary":
+        path = Path(path)
+        if not path.exists():
+            return cls({}, language)
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        return cls({src: [tgt] if isinstance(tgt, str) else list(tgt) for src, tgt in raw.items()}, language)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def source_terms(self, source: str) -> List[str]:
+        """원문에 나온 용어 (단어 단위, 중복 제거)"""
+        found = {}
+        for start, end, idx in self._source_ac.finditer(source):
+            if _is_word_match(source, start, end):
+                found[self.sources[idx]] = None
+        return list(found)
+
+    def missing_terms(self, source: str, translated: str) -> List[str]:
+        """원문에 나왔지만 번역에 정해진 한국어 용어가 하나도 없는 용어"""
+        terms = self.source_terms(source)
+        if not terms:
+            return []
+        present = {self.targets[idx] for _, _, idx in self._target_ac.finditer(translated)}
+        return [term for term in terms if not any(t in present for t in self.terms[term])]
+
+    def violations(self, pairs: Iterable[Tuple[str, Optional[str]]]) -> Dict[int, List[str]]:
+        """{쌍 번호: 빠진 용어} (번역이 없거나 원문을 그대로 둔 쌍은 건너뜀)"""
+        result = {}
+        for i, (source, translated) in enumerate(pairs):
+            if not translated or translated == source:
+                continue
+            missing = self.missing_terms(source, translated)
+            if missing:
+                result[i] = missing
+        return result
+
+    def instruction(self, terms: Iterable[str]) -> str:
+        """재번역 요청에 붙이는 용어 지시문"""
+        rules = "; ".join(f"{term} → {' / '.join(self.terms[term])}" for term in terms)
+        return f"Use these {self.language} terms exactly: {rules}."
+
+    def prompt_section(self) -> str:
+        """시스템 프롬프트 뒤에 붙이는 전체 용어 목록 (용어집이 비어 있으면 빈 문자열)"""
+        if not self.terms:
+            return ""
+        lines = [f"- {term} → {' / '.join(targets)}" for term, targets in self.terms.items()]
+        return f"Glossary (always use these {self.language} terms):\n" + "\n".join(lines)
+
+def main(argv=None):
+    args = argv if argv is not None else sys.argv[1:]
+    if not args:
+        raise SystemExit("usage: python glossary.py <tm.sqlite> [glossary.json]")
+    glossary = Glossary.load(Path(args[1]) if len(args) > 1 else GLOSSARY_PATH)
+    conn = sqlite3.connect(args[0])
+    rows = conn.execute("SELECT source, target FROM tm").fetchall()
+    found = glossary.violations(rows)
+    print(f"[용어 검사] 용어 {len(glossary)}개, TM {len(rows)}개 중 위반 {len(found)}개")
+    for i, missing in list(found.items())[:20]:
+        print(f"  - {', '.join(missing)}: {rows[i][0][:80]}")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""HTML을 통째로 읽지 않고 본문 최상위 블록 단위로 흘려 보내는 도구
+
+파일을 조금씩 읽으면서 태그 깊이만 세어 <body>의 직계 자식이 닫힐 때마다 그
+블록(뒤따르는 텍스트 포함)의 원문을 그대로 내보냅니다. 메모리에는 읽는 중인
+블록 하나와 읽기 버퍼만 남으므로 책 크기와 상관없이 사용량이 일정합니다.
+
+lxml의 HTML iterparse는 이미 처리한 입력을 버리지 않아 입력 크기만큼 메모리가
+늘어나므로 쓰지 않습니다. 블록을 잘게 나누려면 이 프로젝트에서 만드는 HTML
+(mammoth + BeautifulSoup 출력)처럼 태그가 모두 닫혀 있어야 하며, 그렇지 않으면
+블록이 커질 뿐 결과는 같습니다.
+"""
+
+import re
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from bs4 import BeautifulSoup, NavigableString
+
+READ_CHARS = 1 << 16
+
+# 닫는 태그가 없는 요소
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+))
+# 안쪽을 태그로 해석하지 않는 요소
+RAW_TEXT_TAGS = frozenset(("script", "style", "textarea", "title"))
+
+# 주석/선언/처리명령 또는 태그 하나 (속성 값 안의 '>'는 따옴표로 건너뜀)
+TOKEN_RE = re.compile(
+    r"<!--.*?-->|<![^>]*>|<\?[^>]*>"
+    r"|<(/?)([A-Za-z][\w:.-]*)((?:\"[^\"]*\"|'[^']*'|[^'\">])*)>",
+    re.DOTALL,
+)
+
+TAG_START_RE = re.compile(r"[A-Za-z!?/]")
+
+def _open_tags(prologue: str) -> str:
+    # <body> 여는 태그까지를 BeautifulSoup으로 직렬화해 전체 파싱 결과와 모양을 맞춤
+    closing = "</body></html>"
+    text = str(BeautifulSoup(prologue + closing, "lxml"))
+    return text[:-len(closing)] if text.endswith(closing) else text
+
+def iter_html_parts(input_html: Path) -> Iterator[Tuple[str, str]]:
+    """("open", 여는 태그들) → ("block", 본문 블록)... → ("close", 닫는 태그들) 순서로 반환
+
+    <head>는 "open"에 포함되고, 블록 사이의 텍스트는 앞 블록에 붙습니다.
+    """
+    buf = ""
+    pos = 0           # buf에서 아직 해석하지 않은 위치
+    start = 0         # buf에서 아직 내보내지 않은 위치
+    eof = False
+    in_head = in_body = False
+    depth = 0         # <body> 안에서의 태그 깊이
+    raw_end = None    # script/style 안쪽을 건너뛸 때 찾는 닫는 태그
+
+    with open(input_html, "r", encoding="utf-8") as f:
+        while True:
+            m = None
+            if raw_end is not None:
+                end = raw_end.search(buf, pos)
+                if end:
+                    pos, raw_end = end.start(), None
+                    continue
+            else:
+                lt = buf.find("<", pos)
+                m = TOKEN_RE.match(buf, lt) if lt >= 0 else None
+                if m is None and lt >= 0 and (eof or TAG_START_RE.match(buf, lt + 1) is None
+                                              and lt + 1 < len(buf)):
+                    pos = lt + 1  # 태그가 아닌 '<'
+                    continue
+
+            if m is None:
+                if eof:
+                    break
+                # 내보낸 앞부분은 버리고 더 읽음
+                buf, pos, start = buf[start:], pos - start, 0
+                chunk = f.read(READ_CHARS)
+                eof = not chunk
+                buf += chunk
+                continue
+
+            pos = m.end()
+            closing, name, attrs = m.group(1), (m.group(2) or "").lower(), m.group(3) or ""
+            if not name:
+                continue  # 주석/선언
+            opens = not closing and name not in VOID_TAGS and not attrs.rstrip().endswith("/")
+            if opens and name in RAW_TEXT_TAGS:
+                raw_end = re.compile(rf"</{name}\s*>", re.IGNORECASE)
+
+            if not in_body:
+                if name == "head":
+                    in_head = not closing
+                elif name == "body" and not closing:
+                    yield "open", _open_tags(buf[start:pos])
+                    in_body, start = True, pos
+                elif not in_head and not closing and name != "html":
+                    # <body> 없이 본문이 시작된 문서
+                    yield "open", _open_tags(buf[start:lt] + "<body>")
+                    in_body, start, pos, raw_end = True, lt, lt, None
+                continue
+
+            if closing and name == "body" and depth == 0:
+                if buf[start:lt]:
+                    yield "block", buf[start:lt]
+                yield "close", "</body></html>"
+                return
+            if opens:
+                depth += 1
+                continue
+            if closing:
+                depth = max(depth - 1, 0)
+            if depth == 0:
+                # 최상위 블록이 닫힘 (앞 블록 뒤의 텍스트는 이 블록 앞에 붙어 있음)
+                yield "block", buf[start:pos]
+                start = pos
+
+    # </body> 없이 끝난 문서
+    if not in_body:
+        yield "open", _open_tags(buf[start:] + "<body>")
+    elif buf[start:]:
+        yield "block", buf[start:]
+    yield "close", "</body></html>"
+
+def iter_soup_parts(soup: BeautifulSoup) -> Iterator[Tuple[str, str]]:
+    """iter_html_parts와 같은 조각을 파일 없이 파싱된 트리에서 바로 반환
+
+    이어 붙이면 str(soup)을 파일로 썼다가 iter_html_parts로 읽은 것과 같습니다.
+    전체를 한 문자열로 직렬화하지 않고 최상위 블록을 하나씩 직렬화합니다.
+    """
+    body = soup.body
+    if body is None:
+        yield "open", _open_tags("<body>")
+        if soup.contents:
+            yield "block", soup.decode()
+        yield "close", "</body></html>"
+        return
+    # 문서 선언(<!DOCTYPE> 등)은 output_ready로 꺾쇠까지 포함해 직렬화
+    prologue = "".join(node.output_ready() if isinstance(node, NavigableString) else str(node)
+                       for node in soup.contents if node is not soup.html)
+    if soup.html is not None:
+        prologue += _start_tag(soup.html) + (str(soup.head) if soup.head else "")
+    yield "open", _open_tags(prologue + _start_tag(body))
+    pending = ""  # 블록 사이의 텍스트는 다음 블록 앞에 붙임
+    for node in body.contents:
+        if isinstance(node, NavigableString):
+            pending += node.output_ready()  # 텍스트/주석 (str(soup)처럼 엔티티 치환)
+        else:
+            yield "block", pending + str(node)
+            pending = ""
+    if pending:
+        yield "block", pending
+    yield "close", "</body></html>"
+
+def _start_tag(tag) -> str:
+    # 속성만 같은 빈 태그를 직렬화해 여는 태그만 얻음
+    empty = BeautifulSoup("", "lxml").new_tag(tag.name, attrs=dict(tag.attrs))
+    return str(empty)[:-len(f"</{tag.name}>")]
+
+def iter_windows(input_html: Path, window_chars: int) -> Iterator[Tuple[str, List[str]]]:
+    """iter_html_parts 결과에서 본문 블록을 window_chars 글자 안팎으로 묶어 반환
+
+    ("open", [...]), ("window", [블록, ...])..., ("close", [...]) 순서입니다.
+    """
+    window: List[str] = []
+    size = 0
+    for kind, text in iter_html_parts(input_html):
+        if kind != "block":
+            if window:
+                yield "window", window
+                window, size = [], 0
+            yield kind, [text]
+            continue
+        window.append(text)
+        size += len(text)
+        if size >= window_chars:
+            yield "window", window
+            window, size = [], 0
+    if window:
+        yield "window", window
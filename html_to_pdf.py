@@ -1,6 +1,43 @@
 from pathlib import Path
 import asyncio
+import re
+from typing import Iterable, List, Tuple
+from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
+from pypdf import PdfReader, PdfWriter
+
+from cfg import RENDER_WORKERS
+from html_stream import iter_html_parts, iter_soup_parts
+from render_daemon import running_daemon
+
+# PDF 페이지 설정 (본문/부분 PDF/머리말·꼬리말 오버레이가 모두 같은 값을 써야 위치가 맞음)
+PDF_FORMAT = "A4"
+PDF_MARGIN = {
+    "top": "1in",
+    "bottom": "1in", 
+    "left": "0.8in",
+    "right": "0.8in"
+}
+HEADER_TEMPLATE = """
+            <div style="font-size: 10px; margin: 0 auto; width: 100%; text-align: center;">
+                <span>Agentic Design Patterns - Korean Edition</span>
+            </div>
+            """
+FOOTER_TEMPLATE = """
+            <div style="font-size: 10px; margin: 0 auto; width: 100%; text-align: center;">
+                <span class="pageNumber"></span> / <span class="totalPages"></span>
+            </div>
+            """
+
+# page.pdf 옵션 (format/margin 제외): 전체 렌더링 / 부분 PDF / 쪽번호 오버레이
+FULL_PDF_OPTIONS = {
+    "print_background": True,
+    "display_header_footer": True,
+    "header_template": HEADER_TEMPLATE,
+    "footer_template": FOOTER_TEMPLATE,
+}
+PART_PDF_OPTIONS = {"print_background": True, "display_header_footer": False}
+OVERLAY_PDF_OPTIONS = {**FULL_PDF_OPTIONS, "print_background": False}
 
 async def html_to_pdf_async(html_path: Path, pdf_path: Path) -> None:
     """HTML을 PDF로 변환 (비동기)"""
@@ -11,31 +48,8 @@ async def html_to_pdf_async(html_path: Path, pdf_path: Path) -> None:
         # HTML 파일 로드
         await page.goto(f"file://{html_path.absolute()}")
         
-        # PDF 생성 옵션
-        pdf_options = {
-            "path": str(pdf_path),
-            "format": "A4",
-            "print_background": True,
-            "margin": {
-                "top": "1in",
-                "bottom": "1in", 
-                "left": "0.8in",
-                "right": "0.8in"
-            },
-            "display_header_footer": True,
-            "header_template": """
-            <div style="font-size: 10px; margin: 0 auto; width: 100%; text-align: center;">
-                <span>Agentic Design Patterns - Korean Edition</span>
-            </div>
-            """,
-            "footer_template": """
-            <div style="font-size: 10px; margin: 0 auto; width: 100%; text-align: center;">
-                <span class="pageNumber"></span> / <span class="totalPages"></span>
-            </div>
-            """
-        }
-        
-        await page.pdf(**pdf_options)
+        # PDF 생성
+        await page.pdf(path=str(pdf_path), format=PDF_FORMAT, margin=PDF_MARGIN, **FULL_PDF_OPTIONS)
         await browser.close()
 
 def html_to_pdf(html_path: Path, pdf_path: Path) -> None:
@@ -45,8 +59,245 @@ def html_to_pdf(html_path: Path, pdf_path: Path) -> None:
     # 출력 디렉토리 생성
     pdf_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # 비동기 함수 실행
-    asyncio.run(html_to_pdf_async(html_path, pdf_path))
+    # 렌더 데몬이 떠 있으면 데몬에 맡기고, 아니면 브라우저를 직접 띄움
+    daemon = running_daemon()
+    if daemon:
+        asyncio.run(daemon.render(html_path, pdf_path, FULL_PDF_OPTIONS))
+    else:
+        asyncio.run(html_to_pdf_async(html_path, pdf_path))
     
     print(f"[PDF 완료] {pdf_path.absolute()}")
 
+
+async def _render_with_browser(browser, jobs: List[Tuple[Path, Path]], workers: int) -> None:
+    # 컨텍스트 workers개가 작업 큐에서 하나씩 가져가 동시에 렌더링
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    async def worker():
+        context = await browser.new_context()
+        page = await context.new_page()
+        try:
+            while not queue.empty():
+                html_path, pdf_path = queue.get_nowait()
+                await page.goto(f"file://{html_path.absolute()}")
+                await page.pdf(path=str(pdf_path), format=PDF_FORMAT, margin=PDF_MARGIN,
+                               **PART_PDF_OPTIONS)
+                print(f"[PDF 부분] {html_path.name} -> {pdf_path.name}")
+        finally:
+            await context.close()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(jobs))))))
+
+async def render_parts_async(jobs: List[Tuple[Path, Path]], workers: int = 1) -> None:
+    """여러 HTML을 머리말/꼬리말 없는 부분 PDF로 변환
+
+    브라우저는 한 번만 띄우고, 컨텍스트 workers개가 작업 큐에서 하나씩 가져가
+    동시에 렌더링합니다 (컨텍스트마다 렌더러 프로세스가 따로 돌아 여러 코어 사용).
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        try:
+            await _render_with_browser(browser, jobs, workers)
+        finally:
+            await browser.close()
+
+def render_parts(jobs: List[Tuple[Path, Path]], workers: int = RENDER_WORKERS) -> None:
+    """render_parts_async 동기 래퍼 (렌더 데몬이 떠 있으면 데몬의 워커로 처리)"""
+    if not jobs:
+        return
+    daemon = running_daemon()
+    if daemon:
+        asyncio.run(daemon.render_many(jobs, PART_PDF_OPTIONS))
+    else:
+        asyncio.run(render_parts_async(jobs, workers))
+
+class PartRenderer:
+    """render_parts를 여러 번 부를 때 브라우저를 처음 한 번만 띄워 계속 쓰는 렌더러
+
+    번역이 느려 렌더링이 챕터 몇 개씩 나눠 들어와도 묶음마다 Chromium을 새로 띄우지
+    않습니다. 이벤트 루프를 하나 들고 있으므로 한 번에 한 스레드에서만 부르고, 다 쓰면
+    close()(또는 with 블록)로 닫습니다. 렌더 데몬이 떠 있으면 render_parts처럼 데몬에 맡깁니다.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS):
+        self.workers = workers
+        self._loop = None
+        self._playwright = None
+        self._browser = None
+
+    def render(self, jobs: List[Tuple[Path, Path]]) -> None:
+        if not jobs:
+            return
+        daemon = running_daemon()
+        if daemon:
+            asyncio.run(daemon.render_many(jobs, PART_PDF_OPTIONS))
+            return
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._render(jobs))
+
+    async def _render(self, jobs: List[Tuple[Path, Path]]) -> None:
+        if self._browser is None:
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch()
+        await _render_with_browser(self._browser, jobs, self.workers)
+
+    async def _shutdown(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        try:
+            self._loop.run_until_complete(self._shutdown())
+        finally:
+            self._loop.close()
+            self._loop = self._playwright = self._browser = None
+
+    def __enter__(self) -> "PartRenderer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+# 이보다 짧은 챕터는 다음 챕터와 같은 청크로 묶음 (HTML 글자 수)
+CHUNK_MIN_CHARS = 20000
+
+# 새 청크를 시작하는 최상위 블록: 챕터 경계 표시(merge_to_html.CHAPTER_BREAK)
+CHUNK_START_RE = re.compile(r'\s*<div class="chapter-break"')
+
+def split_html_by_chapter(html_path: Path, out_dir: Path, min_chars: int = 0) -> List[Path]:
+    """HTML을 챕터 경계에서 잘라 각각 완전한 HTML 파일로 저장하고 경로 목록 반환
+
+    청크마다 따로 렌더링하므로 각 청크는 새 쪽에서 시작합니다 (경계 표시 자체는 레이아웃에
+    영향이 없음). 경계 표시가 없는 HTML(docx 병합 방식)은 청크 하나가 됩니다.
+    min_chars보다 짧은 챕터는 다음 챕터와 같은 청크로 묶습니다. 이미지 상대 경로가
+    그대로 풀리도록 out_dir은 html_path와 같은 폴더여야 합니다.
+    """
+    return split_parts_by_chapter(iter_html_parts(html_path), html_path.stem, out_dir, min_chars)
+
+def split_parts_by_chapter(parts: Iterable[Tuple[str, str]], stem: str, out_dir: Path,
+                           min_chars: int = 0) -> List[Path]:
+    """iter_html_parts/iter_soup_parts 조각을 챕터 경계에서 잘라 <stem>.partNNN.html로 저장"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    chunks: List[Path] = []
+    opening = ""
+    current = None
+    size = 0
+
+    def next_chunk():
+        path = out_dir / f"{stem}.part{len(chunks):03d}.html"
+        chunks.append(path)
+        f = open(path, "w", encoding="utf-8")
+        f.write(opening)
+        return f
+
+    try:
+        for kind, text in parts:
+            if kind == "open":
+                opening = text
+            elif kind == "block":
+                if current is None or (size >= min_chars and CHUNK_START_RE.match(text)):
+                    if current is not None:
+                        current.write("</body></html>")
+                        current.close()
+                    current, size = next_chunk(), 0
+                current.write(text)
+                size += len(text)
+        if current is None:
+            current = next_chunk()
+        current.write("</body></html>")
+    finally:
+        if current is not None:
+            current.close()
+    return chunks
+
+def html_to_pdf_chunked(html_path: Path, pdf_path: Path, workers: int = RENDER_WORKERS,
+                        min_chars: int = CHUNK_MIN_CHARS) -> int:
+    """챕터 단위로 나눠 동시에 렌더링한 뒤 합치는 html_to_pdf (총 쪽수 반환)
+
+    부분 PDF는 머리말/꼬리말 없이 만들고, 합친 뒤 전체 기준 쪽번호와 머리말을
+    한 번에 찍으므로 "N / 전체" 번호가 청크 사이에서 끊기지 않습니다.
+    """
+    print(f"[PDF 변환] {html_path} -> {pdf_path} (청크 동시 렌더링 {workers}개)")
+    return _render_chunked(iter_html_parts(html_path), html_path.stem, html_path.parent, pdf_path,
+                           workers, min_chars)
+
+def soup_to_pdf_chunked(soup: BeautifulSoup, pdf_path: Path, html_dir: Path, stem: str,
+                        workers: int = RENDER_WORKERS, min_chars: int = CHUNK_MIN_CHARS) -> int:
+    """파싱된 트리를 책 HTML 파일로 쓰지 않고 바로 청크로 잘라 렌더링 (총 쪽수 반환)
+
+    html_dir은 이미지 상대 경로의 기준 폴더(책 HTML이 있었을 폴더)입니다.
+    """
+    print(f"[PDF 변환] (메모리) -> {pdf_path} (청크 동시 렌더링 {workers}개)")
+    return _render_chunked(iter_soup_parts(soup), stem, html_dir, pdf_path, workers, min_chars)
+
+def _render_chunked(parts: Iterable[Tuple[str, str]], stem: str, html_dir: Path, pdf_path: Path,
+                    workers: int, min_chars: int) -> int:
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    chunks = split_parts_by_chapter(parts, stem, html_dir, min_chars=min_chars)
+    jobs = [(chunk, chunk.with_suffix(".pdf")) for chunk in chunks]
+    try:
+        render_parts(jobs, workers)
+        total = merge_parts_with_page_numbers([pdf for _, pdf in jobs], pdf_path)
+    finally:
+        for chunk, pdf in jobs:
+            chunk.unlink(missing_ok=True)
+            pdf.unlink(missing_ok=True)
+    print(f"[PDF 완료] {pdf_path.absolute()} (청크 {len(chunks)}개, {total}쪽)")
+    return total
+
+def _page_number_overlay_html(total_pages: int) -> str:
+    # 빈 페이지 total_pages장 (배경 없이 머리말/꼬리말만 찍혀 본문 위에 겹칠 수 있음)
+    pages = "".join(
+        '<div style="page-break-after: always">&nbsp;</div>' for _ in range(total_pages - 1)
+    ) + "<div>&nbsp;</div>"
+    return f"<html><body>{pages}</body></html>"
+
+async def _render_page_number_overlay(html_path: Path, pdf_path: Path) -> None:
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page()
+        await page.goto(f"file://{html_path.absolute()}")
+        await page.pdf(path=str(pdf_path), format=PDF_FORMAT, margin=PDF_MARGIN,
+                       **OVERLAY_PDF_OPTIONS)
+        await browser.close()
+
+def stamp_pages(content_pages: list, overlay_pdf: Path, pdf_path: Path) -> None:
+    """본문 페이지마다 같은 번호의 오버레이 페이지(머리말/꼬리말)를 겹쳐 저장"""
+    overlay = PdfReader(str(overlay_pdf))
+    if len(overlay.pages) != len(content_pages):
+        print(f"[WARN] 쪽번호 오버레이 {len(overlay.pages)}쪽 / 본문 {len(content_pages)}쪽 불일치")
+    writer = PdfWriter()
+    for i, page in enumerate(content_pages):
+        page = writer.add_page(page)
+        if i < len(overlay.pages):
+            page.merge_page(overlay.pages[i])
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+
+def merge_parts_with_page_numbers(parts: List[Path], pdf_path: Path) -> int:
+    """부분 PDF를 순서대로 합치고, 전체 기준 쪽번호("N / 전체")와 머리말을 찍음
+
+    부분 PDF는 머리말/꼬리말 없이 렌더링되어 있어야 합니다. 쪽번호는 합친 뒤
+    한 번에 찍으므로 부분을 따로 만들어도 번호가 끊기지 않습니다.
+    """
+    content_pages = [page for part in parts for page in PdfReader(str(part)).pages]
+    overlay_pdf = pdf_path.with_suffix(".overlay.pdf")
+    overlay_html = pdf_path.with_suffix(".overlay.html")
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    overlay_html.write_text(_page_number_overlay_html(len(content_pages)), encoding="utf-8")
+    daemon = running_daemon()
+    if daemon:
+        asyncio.run(daemon.render(overlay_html, overlay_pdf, OVERLAY_PDF_OPTIONS))
+    else:
+        asyncio.run(_render_page_number_overlay(overlay_html, overlay_pdf))
+    stamp_pages(content_pages, overlay_pdf, pdf_path)
+    overlay_pdf.unlink(missing_ok=True)
+    overlay_html.unlink(missing_ok=True)
+    return len(content_pages)
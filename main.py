@@ -1,24 +1,54 @@
+import argparse
 from pathlib import Path
-from bs4 import BeautifulSoup
 
-from cfg import SRC_DIR, WORK, OUT, ASSETS
+from cfg import (SRC_DIR, WORK, OUT, ASSETS, METRICS_TEXTFILE, REPORT_DIR, SOURCE_MANIFEST, TARGET_LANGUAGES,
+                 DEBUG_SNAPSHOTS)
 from build_order import build_order
-from merge_to_html import merge_docx_in_order, master_docx_to_html
-from translate_html_claude import translate_html
-from html_to_pdf import html_to_pdf
-from utils import inline_images_as_data_uri
+from merge_to_html import (book_sources, chapters_to_html, chapters_to_soup, merge_docx_in_order,
+                           master_docx_to_html, master_docx_to_soup)
+from metrics import RunReport, file_size
+from source_index import SourceIndex
+from translate_html_claude import (DEFAULT_LANGUAGE, USAGE, language_path, translate_document, translate_html,
+                                   translate_html_streaming)
+from html_to_pdf import html_to_pdf, html_to_pdf_chunked, soup_to_pdf_chunked
+from book_build import build_book
 
 def ensure_dirs():
     for d in [WORK, OUT]:
         d.mkdir(parents=True, exist_ok=True)
 
-def run():
+def run(incremental: bool = False, merge_docx: bool = False, stream: bool = False,
+        single_render: bool = False, resume: bool = False, in_memory: bool = False):
+    if resume and stream:
+        raise SystemExit("--resume은 --stream과 함께 쓸 수 없습니다 (스트리밍 번역은 저널 없음)")
+    if in_memory and (stream or incremental):
+        raise SystemExit("--in-memory는 --stream/--incremental과 함께 쓸 수 없습니다")
     ensure_dirs()
+    report = RunReport()
+    report.info = {"incremental": incremental, "merge_docx": merge_docx, "stream": stream,
+                   "single_render": single_render, "resume": resume, "in_memory": in_memory,
+                   "languages": ",".join(TARGET_LANGUAGES)}
+    try:
+        _run_stages(report, incremental, merge_docx, stream, single_render, resume, in_memory)
+    finally:
+        # 실패한 실행도 어디까지 갔는지 남김
+        usage = USAGE.summary()
+        path = report.write_json(REPORT_DIR, usage)
+        report.write_prometheus(METRICS_TEXTFILE, usage)
+        print(f"[METRICS] 보고서: {path} / {METRICS_TEXTFILE}")
 
-    # 0) 사용자가 지정한 목차 순서로 파일 목록 구성
-    file_list = build_order(Path(SRC_DIR))
-    if not file_list:
-        raise SystemExit(f"No docx files found under {SRC_DIR}")
+def _run_stages(report: RunReport, incremental: bool, merge_docx: bool, stream: bool,
+                single_render: bool, resume: bool = False, in_memory: bool = False):
+    # 0) 사용자가 지정한 목차 순서로 파일 목록 구성 (원고 폴더는 색인으로 한 번만 훑음)
+    with report.stage("order") as st:
+        index = SourceIndex.load(Path(SRC_DIR), SOURCE_MANIFEST).scan()
+        file_list = build_order(Path(SRC_DIR), index)
+        if not file_list:
+            raise SystemExit(f"No docx files found under {SRC_DIR}")
+        index.save()
+        st["files"] = len(file_list)
+        st["changed"] = len(index.changed)
+        st["bytes_in"] = sum(file_size(p) for p in file_list)
     print("[ORDER] Total files:", len(file_list))
     for p in file_list[:5]: print("  ", p.name, "…")
     if len(file_list) > 5: print("  ...")
@@ -26,33 +56,178 @@ def run():
     master_docx = WORK / "master_en.docx"
     master_en_html = WORK / "master_en.html"
     master_ko_html = WORK / "master_ko.html"
-    tm_path = WORK / "tm.json"
+    tm_path = WORK / "tm.sqlite"  # 기존 work/tm.json이 있으면 처음 한 번 가져옴
     out_pdf = OUT / "Agentic_Design_Patterns_KO.pdf"
 
-    # 1) 병합 (표지/목차 배치)
+    # 여러 언어 번역은 전체 빌드에서만 (증분/스트리밍은 한국어만)
+    languages = TARGET_LANGUAGES
+    if (incremental or stream) and languages != [DEFAULT_LANGUAGE]:
+        print(f"[WARN] --incremental/--stream은 한국어만 번역합니다 (TARGET_LANGUAGES={','.join(languages)} 무시)")
+        languages = [DEFAULT_LANGUAGE]
+
+    # 챕터 단위 증분 빌드: 바뀐 챕터만 변환/번역/렌더링
+    if incremental:
+        from chapter_build import run_incremental
+        with report.stage("incremental") as st:
+            run_incremental(file_list, out_pdf, tm_path, master_ko_html=master_ko_html, index=index)
+            st["bytes_out"] = file_size(out_pdf)
+        print(f"[DONE] PDF: {out_pdf.resolve()}")
+        return
+
     cover_docx = ASSETS / "cover.docx"  # 있으면 사용
     toc_docx   = ASSETS / "toc.docx"    # 있으면 사용
-    master_docx, insert_auto_toc = merge_docx_in_order(
-        file_list, master_docx, cover_docx=cover_docx, toc_docx=toc_docx
-    )
-    print(f"[OK] Merged: {master_docx}")
+    if in_memory:
+        _run_in_memory(report, file_list, languages, merge_docx, single_render, resume,
+                       master_docx, master_en_html, master_ko_html, tm_path, out_pdf, cover_docx, toc_docx)
+        return
+    if not (merge_docx or stream or single_render):
+        _run_pipeline(report, file_list, languages, resume, master_en_html, master_ko_html, tm_path,
+                      out_pdf, cover_docx, toc_docx)
+        return
+    if merge_docx:
+        # 1) 병합 (표지/목차 배치)
+        with report.stage("merge") as st:
+            master_docx, insert_auto_toc = merge_docx_in_order(
+                file_list, master_docx, cover_docx=cover_docx, toc_docx=toc_docx
+            )
+            st["bytes_out"] = file_size(master_docx)
+        print(f"[OK] Merged: {master_docx}")
 
-    # 2) HTML 변환 (+ 자동 TOC 옵션)
-    master_docx_to_html(master_docx, master_en_html, insert_auto_toc)
+        # 2) HTML 변환 (+ 자동 TOC 옵션)
+        with report.stage("convert") as st:
+            master_docx_to_html(master_docx, master_en_html, insert_auto_toc)
+            st["bytes_in"] = file_size(master_docx)
+            st["bytes_out"] = file_size(master_en_html)
+    else:
+        # 1~2) 챕터별 병렬 HTML 변환 후 이어 붙이기 (+ 자동 TOC 옵션)
+        with report.stage("merge") as st:
+            sources, insert_auto_toc = book_sources(
+                file_list, WORK, cover_docx=cover_docx, toc_docx=toc_docx
+            )
+            st["chapters"] = len(sources)
+        with report.stage("convert") as st:
+            chapters_to_html(sources, master_en_html, insert_auto_toc)
+            st["bytes_in"] = sum(file_size(p) for p in sources)
+            st["bytes_out"] = file_size(master_en_html)
     print(f"[OK] To HTML: {master_en_html}")
 
-    # 3) 이미지 인라인(경로 문제 예방)
-    soup = BeautifulSoup(master_en_html.read_text(encoding="utf-8"), "lxml")
-    inline_images_as_data_uri(soup, master_en_html.parent)
-    master_en_html.write_text(str(soup), encoding="utf-8")
+    # 3) 이미지는 변환 단계에서 work/images/에 내용 해시 이름으로 저장되고,
+    #    HTML에는 상대 경로만 남음 (PDF 렌더링 때 브라우저가 읽음)
+
+    # 4) 번역(코드/명령/코드표 스킵) + 캐시 (stream이면 블록 단위로 읽고 쓰며 메모리 제한)
+    #    (세그먼트마다 저널에 체크포인트를 남기므로 중단되면 --resume으로 이어서)
+    #    TARGET_LANGUAGES가 여럿이면 한 번 파싱해 언어별 HTML(master_ja.html 등)을 함께 만듦
+    translated = [language_path(master_ko_html, lang) for lang in languages]
+    with report.stage("translate") as st:
+        if stream:
+            translate_html_streaming(master_en_html, master_ko_html, tm_path)
+        else:
+            translate_html(master_en_html, master_ko_html, tm_path, resume=resume, languages=languages)
+        st["languages"] = len(languages)
+        st["bytes_in"] = file_size(master_en_html)
+        st["bytes_out"] = sum(file_size(p) for p in translated)
+    for path in translated:
+        print(f"[OK] Translated HTML: {path}")
+
+    # 5) PDF 출력(페이지번호/한글폰트) - 챕터별로 나눠 동시에 렌더링한 뒤 합침 (언어마다 하나)
+    with report.stage("render") as st:
+        for html_path, lang in zip(translated, languages):
+            pdf_path = language_path(out_pdf, lang)
+            if single_render:
+                html_to_pdf(html_path, pdf_path)
+            else:
+                st["pages"] = st.get("pages", 0) + html_to_pdf_chunked(html_path, pdf_path)
+            print(f"[DONE] PDF: {pdf_path.resolve()}")
+        st["bytes_in"] = sum(file_size(p) for p in translated)
+        st["bytes_out"] = sum(file_size(language_path(out_pdf, lang)) for lang in languages)
+
+def _run_pipeline(report: RunReport, file_list: list, languages: list, resume: bool, master_en_html: Path,
+                  master_ko_html: Path, tm_path: Path, out_pdf: Path, cover_docx: Path, toc_docx: Path):
+    """기본 빌드: 챕터마다 변환 → 번역 → 청크 렌더링을 겹쳐 실행한 뒤 부분 PDF를 합침 (book_build)"""
+    with report.stage("merge") as st:
+        sources, insert_auto_toc = book_sources(
+            file_list, WORK, cover_docx=cover_docx, toc_docx=toc_docx
+        )
+        st["chapters"] = len(sources)
+    translated = [language_path(master_ko_html, lang) for lang in languages]
+    with report.stage("pipeline") as st:
+        result = build_book(sources, insert_auto_toc, WORK, master_en_html, master_ko_html, tm_path,
+                            out_pdf, languages, resume=resume)
+        for name, seconds in result["times"].items():
+            st[f"{name}_s"] = round(seconds, 3)
+        st["languages"] = len(languages)
+        st["pages"] = sum(result["pages"].values())
+        st["bytes_in"] = sum(file_size(p) for p in sources)
+        st["bytes_out"] = sum(file_size(language_path(out_pdf, lang)) for lang in languages)
+    for path in translated:
+        print(f"[OK] Translated HTML: {path}")
+
+def _run_in_memory(report: RunReport, file_list: list, languages: list, merge_docx: bool,
+                   single_render: bool, resume: bool, master_docx: Path, master_en_html: Path,
+                   master_ko_html: Path, tm_path: Path, out_pdf: Path, cover_docx: Path, toc_docx: Path):
+    """변환 → 번역 → 렌더링을 파싱된 트리 하나로 이어서 실행 (책 HTML을 쓰고 다시 읽지 않음)
+
+    중간 HTML은 DEBUG_SNAPSHOTS=1일 때만 남깁니다. --single-render는 브라우저가 읽을
+    번역 HTML 파일이 있어야 하므로 번역본만 파일로 씁니다.
+    """
+    with report.stage("merge") as st:
+        if merge_docx:
+            master_docx, insert_auto_toc = merge_docx_in_order(
+                file_list, master_docx, cover_docx=cover_docx, toc_docx=toc_docx
+            )
+            st["bytes_out"] = file_size(master_docx)
+        else:
+            sources, insert_auto_toc = book_sources(
+                file_list, WORK, cover_docx=cover_docx, toc_docx=toc_docx
+            )
+            st["chapters"] = len(sources)
+    with report.stage("convert") as st:
+        if merge_docx:
+            soup = master_docx_to_soup(master_docx, WORK, insert_auto_toc)
+            st["bytes_in"] = file_size(master_docx)
+        else:
+            soup = chapters_to_soup(sources, WORK, insert_auto_toc)
+            st["bytes_in"] = sum(file_size(p) for p in sources)
+        if DEBUG_SNAPSHOTS:
+            master_en_html.write_text(str(soup), encoding="utf-8")
+            print(f"[SNAPSHOT] {master_en_html}")
+    print("[OK] To HTML (메모리)")
 
-    # 4) 번역(코드/명령/코드표 스킵) + 캐시
-    translate_html(master_en_html, master_ko_html, tm_path)
-    print(f"[OK] Translated HTML: {master_ko_html}")
+    # 4~5) 언어마다 번역을 트리에 반영한 채로 바로 청크를 잘라 렌더링
+    pages = {}
+    def render(lang, translated, output_html):
+        pdf_path = language_path(out_pdf, lang)
+        if single_render:
+            html_to_pdf(output_html, pdf_path)
+        else:
+            pages[lang] = soup_to_pdf_chunked(translated, pdf_path, WORK, output_html.stem)
+        print(f"[DONE] PDF: {pdf_path.resolve()}")
 
-    # 5) PDF 출력(페이지번호/한글폰트)
-    html_to_pdf(master_ko_html, out_pdf)
-    print(f"[DONE] PDF: {out_pdf.resolve()}")
+    with report.stage("translate_render") as st:
+        translate_document(soup, master_ko_html, tm_path, resume=resume, languages=languages,
+                           write_output=DEBUG_SNAPSHOTS or single_render, on_output=render)
+        st["languages"] = len(languages)
+        if pages:
+            st["pages"] = sum(pages.values())
+        st["bytes_out"] = sum(file_size(language_path(out_pdf, lang)) for lang in languages)
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(
+        description="Agentic Design Patterns 한국어판 빌드 (기본: 챕터마다 변환/번역/렌더링을 겹쳐 실행, "
+                    "--merge-docx/--stream/--single-render/--in-memory는 단계를 차례로 실행)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="챕터 단위 캐시(work/cache)를 사용해 바뀐 챕터만 다시 빌드")
+    parser.add_argument("--merge-docx", action="store_true",
+                        help="챕터별 병렬 변환 대신 docx를 하나로 병합한 뒤 변환 (이전 방식)")
+    parser.add_argument("--stream", action="store_true",
+                        help="HTML 전체를 메모리에 올리지 않고 블록 단위로 번역해 바로 기록")
+    parser.add_argument("--single-render", action="store_true",
+                        help="책 전체를 한 페이지에 올려 한 번에 PDF로 렌더링 (이전 방식)")
+    parser.add_argument("--resume", action="store_true",
+                        help="중단된 번역을 저널에서 이어서 진행 (기본 빌드는 work/journal/의 챕터별 저널, "
+                             "그 밖에는 work/master_ko.journal.jsonl)")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="변환/번역/렌더링 사이에 책 HTML을 쓰고 다시 읽지 않음 (DEBUG_SNAPSHOTS=1이면 남김)")
+    args = parser.parse_args()
+    run(incremental=args.incremental, merge_docx=args.merge_docx, stream=args.stream,
+        single_render=args.single_render, resume=args.resume, in_memory=args.in_memory)
@@ -1,11 +1,27 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from docxcompose.composer import Composer
 from docx import Document
 import mammoth
 from bs4 import BeautifulSoup
 
+from asset_store import IMAGE_DIR, AssetStore
 from cfg import MAMMOTH_STYLE_MAP
 
+# 챕터(docx) 경계 표시: 스타일 없는 빈 요소라 레이아웃은 docx 병합 방식과 같고,
+# PDF를 챕터 단위로 나눠 렌더링할 때 자르는 기준으로만 쓰임
+# (주석은 번역 대상 텍스트로 추출되므로 요소를 씀)
+CHAPTER_BREAK = '<div class="chapter-break"></div>'
+
+def make_auto_cover(cover_path: Path) -> Path:
+    """표지 docx가 없을 때 쓰는 심플 표지 생성"""
+    c = Document()
+    c.add_heading("Agentic Design Patterns", 0)
+    c.add_paragraph("Korean Edition (Auto-compiled)")
+    c.save(cover_path)
+    return cover_path
+
 def merge_docx_in_order(file_list: list[Path], master_docx: Path,
                         cover_docx: Path | None = None,
                         toc_docx: Path | None = None) -> tuple[Path, bool]:
@@ -17,11 +33,8 @@ def merge_docx_in_order(file_list: list[Path], master_docx: Path,
         comp.append(Document(str(cover_docx)))
     else:
         # 심플 표지
-        c = Document()
-        c.add_heading("Agentic Design Patterns", 0)
-        c.add_paragraph("Korean Edition (Auto-compiled)")
-        tmp = master_docx.parent / "_auto_cover.docx"
-        c.save(tmp); comp.append(Document(str(tmp)))
+        tmp = make_auto_cover(master_docx.parent / "_auto_cover.docx")
+        comp.append(Document(str(tmp)))
 
     # 2) 목차(원문을 docx로 제공한 경우)
     if toc_docx and toc_docx.exists():
@@ -37,29 +50,107 @@ def merge_docx_in_order(file_list: list[Path], master_docx: Path,
     comp.save(str(master_docx))
     return master_docx, insert_auto_toc
 
-def master_docx_to_html(master_docx: Path, master_html: Path, insert_auto_toc: bool) -> Path:
-    with open(master_docx, "rb") as f:
-        r = mammoth.convert_to_html(f, style_map=MAMMOTH_STYLE_MAP)
-    soup = BeautifulSoup(r.value, "lxml")
+def _convert_docx(docx_path: Path, html_dir: Path | None, image_dir: Path) -> str:
+    # html_dir이 있으면 이미지는 저장소에 두고 html_dir 기준 상대 경로로, 없으면 base64 인라인
+    options = {"style_map": MAMMOTH_STYLE_MAP}
+    if html_dir is not None:
+        options["convert_image"] = AssetStore(image_dir).image_converter(html_dir)
+    with open(docx_path, "rb") as f:
+        r = mammoth.convert_to_html(f, **options)
+    return r.value
+
+def docx_to_html_fragment(docx_path: Path, html_dir: Path | None = None,
+                          image_dir: Path = IMAGE_DIR) -> str:
+    """docx 하나를 HTML 조각으로 변환 (병합 없이 챕터 단위로 쓸 때)"""
+    return _convert_docx(docx_path, html_dir, image_dir)
+
+def number_headings(soup: BeautifulSoup, start: int = 1) -> list[tuple[str, str]]:
+    """h1/h2 제목에 id를 붙이고 목차 항목 [(id, 제목)] 반환 (id 없는 제목엔 h{번호}, 번호는 start부터)
+
+    책을 챕터별로 따로 처리할 때는 앞 챕터까지의 제목 수 + 1을 start로 주면 책 전체에
+    add_auto_toc를 한 것과 같은 id가 붙습니다.
+    """
+    entries = []
+    for i, h in enumerate(soup.find_all(["h1", "h2"]), start=start):
+        hid = h.get("id") or f"h{i}"
+        h["id"] = hid
+        entries.append((hid, h.get_text(strip=True)[:200]))
+    return entries
+
+def auto_toc(soup: BeautifulSoup, entries: list[tuple[str, str]]):
+    """목차 항목으로 자동 목차 <div class="auto-toc"> 생성 (항목이 없으면 None)"""
+    if not entries:
+        return None
+    toc = soup.new_tag("div", **{"class":"auto-toc"})
+    toc_h = soup.new_tag("h1"); toc_h.string = "Contents"
+    toc.append(toc_h)
+    ol = soup.new_tag("ol")
+    for hid, text in entries:
+        li = soup.new_tag("li")
+        a = soup.new_tag("a", href=f"#{hid}")
+        a.string = text
+        li.append(a); ol.append(li)
+    toc.append(ol)
+    return toc
+
+def add_auto_toc(soup: BeautifulSoup) -> None:
+    """h1/h2 제목으로 자동 목차를 만들어 본문 맨 앞에 삽입 (id 없는 제목엔 h{번호} 부여)"""
+    toc = auto_toc(soup, number_headings(soup))
+    if toc is not None:
+        body = soup.body or soup
+        body.insert(0, toc)
+
+def master_docx_to_soup(master_docx: Path, html_dir: Path, insert_auto_toc: bool,
+                        image_dir: Path = IMAGE_DIR) -> BeautifulSoup:
+    """병합 docx를 변환해 파싱된 트리로 반환 (이미지 경로는 html_dir 기준)"""
+    soup = BeautifulSoup(_convert_docx(master_docx, html_dir, image_dir), "lxml")
 
     if insert_auto_toc:
-        heads = soup.find_all(["h1","h2"])
-        if heads:
-            toc = soup.new_tag("div", **{"class":"auto-toc"})
-            toc_h = soup.new_tag("h1"); toc_h.string = "Contents"
-            toc.append(toc_h)
-            ol = soup.new_tag("ol")
-            for i,h in enumerate(heads, start=1):
-                hid = h.get("id") or f"h{i}"
-                h["id"] = hid
-                li = soup.new_tag("li")
-                a = soup.new_tag("a", href=f"#{hid}")
-                a.string = h.get_text(strip=True)[:200]
-                li.append(a); ol.append(li)
-            toc.append(ol)
-            body = soup.body or soup
-            body.insert(0, toc)
+        add_auto_toc(soup)
+    return soup
 
+def master_docx_to_html(master_docx: Path, master_html: Path, insert_auto_toc: bool,
+                        image_dir: Path = IMAGE_DIR) -> Path:
+    soup = master_docx_to_soup(master_docx, master_html.parent, insert_auto_toc, image_dir)
     master_html.write_text(str(soup), encoding="utf-8")
     return master_html
 
+def book_sources(file_list: list[Path], work_dir: Path,
+                 cover_docx: Path | None = None,
+                 toc_docx: Path | None = None) -> tuple[list[Path], bool]:
+    """merge_docx_in_order와 같은 순서(표지 → 목차 → 본문)의 docx 목록과 자동 목차 여부"""
+    if cover_docx and cover_docx.exists():
+        sources = [cover_docx]
+    else:
+        sources = [make_auto_cover(work_dir / "_auto_cover.docx")]
+    if toc_docx and toc_docx.exists():
+        sources.append(toc_docx)
+        insert_auto_toc = False
+    else:
+        insert_auto_toc = True
+    return sources + list(file_list), insert_auto_toc
+
+def chapters_to_soup(sources: list[Path], html_dir: Path, insert_auto_toc: bool,
+                     workers: int | None = None, image_dir: Path = IMAGE_DIR) -> BeautifulSoup:
+    """docx 병합 없이 챕터별로 병렬 변환한 뒤 순서대로 이어 붙여 책 전체를 파싱된 트리로 반환
+
+    각 docx를 프로세스 풀에서 mammoth로 변환하고, 이어 붙인 뒤 자동 목차를
+    만들므로 제목 id(h1, h2, …)와 목차는 병합 방식과 같게 나옵니다. 챕터 사이에는
+    CHAPTER_BREAK를 넣습니다. 이미지 경로는 html_dir 기준 상대 경로입니다.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        convert = partial(docx_to_html_fragment, html_dir=html_dir, image_dir=image_dir)
+        fragments = list(pool.map(convert, sources))
+    soup = BeautifulSoup(CHAPTER_BREAK.join(fragments), "lxml")
+    del fragments
+
+    if insert_auto_toc:
+        add_auto_toc(soup)
+    return soup
+
+def chapters_to_html(sources: list[Path], master_html: Path, insert_auto_toc: bool,
+                     workers: int | None = None, image_dir: Path = IMAGE_DIR) -> Path:
+    """chapters_to_soup 결과를 책 HTML 파일로 저장"""
+    soup = chapters_to_soup(sources, master_html.parent, insert_auto_toc, workers, image_dir)
+    master_html.write_text(str(soup), encoding="utf-8")
+    return master_html
@@ -0,0 +1,174 @@
+"""빌드 단계별 측정과 실행 보고서 (JSON + Prometheus textfile)
+
+단계마다 벽시계 시간, CPU 시간(자식 프로세스 포함), 최대 메모리(RSS), 입출력
+바이트를 재고, 실행이 끝나면 LLM 호출 사용량(usage_meter)과 묶어 두 가지로
+남깁니다.
+
+- work/reports/run-<시각>.json : 실행마다 하나씩 쌓이는 보고서 (실행 간 비교용)
+- work/metrics.prom           : node_exporter textfile collector가 읽는 최신 값
+
+최대 RSS는 리눅스면 단계 시작 때 /proc/self/clear_refs로 최고치를 초기화해
+단계별 값을 얻고, 그 밖의 환경에서는 프로세스 시작 이후 최고치입니다. 자식
+프로세스(변환 워커, 브라우저)의 CPU/메모리는 끝난 자식만 집계됩니다.
+"""
+
+import json
+import os
+import platform
+import resource
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+METRIC_PREFIX = "adp"
+
+def _reset_peak_rss() -> bool:
+    # "5"를 쓰면 VmHWM(최대 RSS)이 현재 값으로 초기화됨 (리눅스 4.0+)
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_bytes() -> int:
+    try:
+        for line in PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if platform.system() == "Darwin" else maxrss * 1024
+
+def _children_peak_rss_bytes() -> int:
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return maxrss if platform.system() == "Darwin" else maxrss * 1024
+
+def file_size(path: Path) -> int:
+    """파일 크기 (없으면 0)"""
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+class RunReport:
+    """실행 하나의 단계별 측정값"""
+
+    def __init__(self, name: str = "build"):
+        self.name = name
+        self.started = time.time()
+        self.stages: List[Dict] = []
+        self.info: Dict = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict]:
+        """단계 하나를 측정 (넘겨받은 dict에 bytes_in/bytes_out 등을 더 적을 수 있음)"""
+        entry: Dict = {"stage": name}
+        _reset_peak_rss()
+        wall = time.perf_counter()
+        cpu = os.times()
+        try:
+            yield entry
+        finally:
+            end = os.times()
+            entry["wall_s"] = round(time.perf_counter() - wall, 3)
+            entry["cpu_s"] = round((end.user - cpu.user) + (end.system - cpu.system), 3)
+            entry["children_cpu_s"] = round((end.children_user - cpu.children_user)
+                                            + (end.children_system - cpu.children_system), 3)
+            entry["peak_rss_bytes"] = _peak_rss_bytes()
+            entry["children_peak_rss_bytes"] = _children_peak_rss_bytes()
+            self.stages.append(entry)
+            print(f"[METRICS] {name}: {entry['wall_s']}s (CPU {entry['cpu_s']}s"
+                  f" + 자식 {entry['children_cpu_s']}s, 최대 RSS {entry['peak_rss_bytes'] >> 20}MB)")
+
+    def to_dict(self, usage: Optional[Dict] = None) -> Dict:
+        return {
+            "name": self.name,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "duration_s": round(time.time() - self.started, 3),
+            "info": self.info,
+            "stages": self.stages,
+            "llm": usage or {},
+        }
+
+    def write_json(self, report_dir: Path, usage: Optional[Dict] = None) -> Path:
+        """report_dir/run-<시작 시각>.json으로 저장하고 경로 반환"""
+        stamp = datetime.fromtimestamp(self.started).strftime("%Y%m%d-%H%M%S")
+        path = report_dir / f"run-{stamp}.json"
+        _write_atomic(path, json.dumps(self.to_dict(usage), ensure_ascii=False, indent=2))
+        return path
+
+    def write_prometheus(self, path: Path, usage: Optional[Dict] = None) -> Path:
+        _write_atomic(path, prometheus_text(self.to_dict(usage)))
+        return path
+
+def _write_atomic(path: Path, text: str) -> None:
+    # textfile collector가 쓰다 만 파일을 읽지 않도록 이름 바꾸기로 교체
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus_text(report: Dict) -> str:
+    """to_dict() 결과를 Prometheus 텍스트 형식으로 변환"""
+    lines: List[str] = []
+
+    def metric(name: str, help_text: str, samples) -> None:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        full = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} gauge")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{full}{{{label_text}}} {value}" if label_text else f"{full} {value}")
+
+    run = {"run": report["name"]}
+    stages = report["stages"]
+    metric("run_start_timestamp_seconds", "Run start time (unix seconds).",
+           [(run, round(datetime.fromisoformat(report["started"]).timestamp()))])
+    metric("run_duration_seconds", "Wall time of the whole run.", [(run, report["duration_s"])])
+    for key, name, help_text in (
+        ("wall_s", "stage_wall_seconds", "Wall time per pipeline stage."),
+        ("cpu_s", "stage_cpu_seconds", "CPU time (user+system) of this process per stage."),
+        ("children_cpu_s", "stage_children_cpu_seconds", "CPU time of finished child processes per stage."),
+        ("peak_rss_bytes", "stage_peak_rss_bytes", "Peak resident set size during the stage."),
+        ("bytes_in", "stage_input_bytes", "Bytes read by the stage."),
+        ("bytes_out", "stage_output_bytes", "Bytes written by the stage."),
+    ):
+        metric(name, help_text, [({**run, "stage": s["stage"]}, s.get(key)) for s in stages])
+
+    llm = report.get("llm") or {}
+    if llm:
+        metric("llm_calls", "LLM API calls in this run.", [(run, llm["calls"])])
+        metric("llm_errors", "LLM API calls that raised.", [(run, llm["errors"])])
+        metric("llm_retries", "HTTP retries made inside LLM calls.", [(run, llm["retries"])])
+        metric("llm_tokens", "LLM tokens by type.", [
+            ({**run, "type": "input"}, llm["input_tokens"]),
+            ({**run, "type": "output"}, llm["output_tokens"]),
+            ({**run, "type": "cache_write"}, llm["cache_creation_input_tokens"]),
+            ({**run, "type": "cache_read"}, llm["cache_read_input_tokens"]),
+        ])
+        metric("llm_bytes", "Request/response text bytes of LLM calls.", [
+            ({**run, "direction": "in"}, llm["bytes_in"]),
+            ({**run, "direction": "out"}, llm["bytes_out"]),
+        ])
+        metric("llm_cache_hit_ratio", "Share of prompt tokens read from the prompt cache.",
+               [(run, llm["cache_hit_rate"])])
+        metric("llm_latency_seconds", "LLM call latency quantiles.", [
+            ({**run, "quantile": "0.5"}, llm["latency_p50_s"]),
+            ({**run, "quantile": "0.95"}, llm["latency_p95_s"]),
+        ])
+        metric("segment_dedup_ratio", "Share of translation units that reused a duplicate's translation.",
+               [(run, llm.get("dedup_ratio", 0.0))])
+        metric("segments", "Translation units by outcome (TM hit/miss, skipped, fuzzy).",
+               [({**run, "result": k}, v) for k, v in sorted(llm.get("counters", {}).items())])
+    return "\n".join(lines) + "\n"
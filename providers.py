@@ -0,0 +1,339 @@
+"""번역 공급자(Anthropic/OpenAI) 공통 호출 계층
+
+요청 파라미터(dict)는 Anthropic Messages 형식(system 키)이나 Chat Completions
+형식(system 역할 메시지) 어느 쪽이든 되고, 공급자마다 자기 API 형식으로 바꿔
+보냅니다 (model은 공급자의 모델로 바뀜). ProviderRouter가 그 위에서
+
+- 429/5xx/연결 오류를 지수 백오프(+ 지터)로 재시도 (Retry-After가 더 길면 그만큼 대기)
+- 공급자별 회로 차단기: 연속 실패가 쌓이면 한동안 그 공급자를 건너뜀
+- 재시도를 다 써도 실패하거나 4xx로 거절되면 다음 공급자로 넘김 (failover)
+- hedge_after초 안에 응답이 없으면 같은 요청을 하나 더 보내 먼저 온 응답 사용
+  (추가 요청도 속도 제한 예산을 따로 받음)
+
+을 처리하고, 모든 공급자가 실패하면 TranslationFailed를 던집니다. API 응답이 아닌
+오류(잘못된 인자로 인한 TypeError 등)는 공급자를 바꿔도 같으므로 그대로 올립니다.
+SDK 자체 재시도는 끄고(max_retries=0) 여기서만 재시도합니다.
+"""
+
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import anthropic
+import openai
+
+from async_engine import Limiters, RateLimiter, estimate_tokens
+from cfg import (ANTHROPIC_API_KEY, ANTHROPIC_BASE_URL, ANTHROPIC_MODEL, BREAKER_FAILURES,
+                 BREAKER_RESET_S, HEDGE_AFTER_S, OPENAI_API_KEY, OPENAI_MODEL, RETRY_BASE_DELAY,
+                 RETRY_MAX_ATTEMPTS, RETRY_MAX_DELAY)
+from usage_meter import http_event_hooks
+
+RETRYABLE_STATUS = frozenset((408, 409, 429))
+CONNECTION_ERRORS = (anthropic.APIConnectionError, openai.APIConnectionError,
+                     asyncio.TimeoutError, ConnectionError)
+STATUS_ERRORS = (anthropic.APIStatusError, openai.APIStatusError)
+# 공통 요청 파라미터 중 Anthropic Messages API로 보내지 않는 인자
+MESSAGES_UNSUPPORTED = frozenset(("response_format", "temperature"))
+
+class TranslationFailed(Exception):
+    """모든 공급자가 요청을 처리하지 못함 (errors: [(공급자, 오류 요약)])"""
+
+    def __init__(self, errors: List[Tuple[str, str]]):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors) or "no provider available")
+
+def is_retryable(exc: BaseException) -> bool:
+    """잠시 뒤 다시 보내면 성공할 수 있는 오류 (429, 5xx, 연결/시간 초과)"""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return isinstance(exc, CONNECTION_ERRORS)
+
+def is_client_error(exc: BaseException) -> bool:
+    """공급자가 요청을 거절한 4xx 응답 (다른 공급자로 넘길 대상)"""
+    return isinstance(exc, STATUS_ERRORS) and 400 <= exc.status_code < 500 and not is_retryable(exc)
+
+def retry_after(exc: BaseException) -> float:
+    """응답의 Retry-After 헤더 (초, 없으면 0)"""
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0)) if response is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+def _error_text(exc: BaseException) -> str:
+    status = getattr(exc, "status_code", None)
+    return f"{type(exc).__name__}({status})" if status else f"{type(exc).__name__}: {exc}"[:200]
+
+class Completion:
+    """공급자 응답 (usage는 Anthropic 필드 이름으로 맞춤)"""
+
+    def __init__(self, text: str, usage: Any, provider: str):
+        self.text = text
+        self.usage = usage
+        self.provider = provider
+
+class Provider:
+    """공급자 하나 (client는 해당 SDK의 비동기 클라이언트)"""
+
+    name = ""
+
+    def __init__(self, client, model: str):
+        self.client = client
+        self.model = model
+        self.breaker = CircuitBreaker()
+
+    async def complete(self, params: Dict[str, Any]) -> Completion:
+        raise NotImplementedError
+
+class AnthropicProvider(Provider):
+    name = "anthropic"
+
+    @classmethod
+    def from_config(cls, model: str) -> "AnthropicProvider":
+        # 요청 훅은 failover/hedge를 포함한 실제 HTTP 요청 수를 호출별로 셈
+        client = anthropic.AsyncAnthropic(
+            api_key=ANTHROPIC_API_KEY, base_url=ANTHROPIC_BASE_URL, max_retries=0,
+            http_client=anthropic.DefaultAsyncHttpxClient(event_hooks=http_event_hooks(is_async=True)),
+        )
+        return cls(client, model)
+
+    @staticmethod
+    def messages_params(params: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat Completions 형식이면 system 메시지를 system으로 옮기고 Messages가 받지 않는 인자는 버림
+
+        temperature는 OpenAI로 넘길 때만 쓰입니다 (현재 anthropic SDK의 messages.create는
+        temperature 인자가 없어 TypeError가 남).
+        """
+        params = {k: v for k, v in params.items() if k not in MESSAGES_UNSUPPORTED}
+        messages = list(params["messages"])
+        if "system" not in params and messages and messages[0]["role"] == "system":
+            params["system"] = messages.pop(0)["content"]
+        params["messages"] = messages
+        return params
+
+    async def complete(self, params: Dict[str, Any]) -> Completion:
+        response = await self.client.messages.create(**{**self.messages_params(params), "model": self.model})
+        return Completion(response.content[0].text.strip(), getattr(response, "usage", None), self.name)
+
+class OpenAIProvider(Provider):
+    name = "openai"
+
+    @classmethod
+    def from_config(cls, model: str) -> "OpenAIProvider":
+        client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY, max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(event_hooks=http_event_hooks(is_async=True)),
+        )
+        return cls(client, model)
+
+    @staticmethod
+    def chat_params(params: Dict[str, Any]) -> Dict[str, Any]:
+        """Anthropic 형식 파라미터 → Chat Completions 파라미터 (캐시 표시는 버림)"""
+        system = params.get("system") or ""
+        if not isinstance(system, str):
+            system = "\n\n".join(block["text"] for block in system)
+        messages = ([{"role": "system", "content": system}] if system else []) + list(params["messages"])
+        chat = {"messages": messages, "max_tokens": params["max_tokens"]}
+        for key in ("temperature", "response_format"):
+            if key in params:
+                chat[key] = params[key]
+        return chat
+
+    async def complete(self, params: Dict[str, Any]) -> Completion:
+        response = await self.client.chat.completions.create(model=self.model, **self.chat_params(params))
+        usage = getattr(response, "usage", None)
+        cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        normalized = None
+        if usage is not None:
+            normalized = SimpleNamespace(
+                input_tokens=(usage.prompt_tokens or 0) - cached,
+                output_tokens=usage.completion_tokens or 0,
+                cache_creation_input_tokens=0,
+                cache_read_input_tokens=cached,
+            )
+        return Completion(response.choices[0].message.content.strip(), normalized, self.name)
+
+class CircuitBreaker:
+    """연속 failures번 실패하면 reset_after초 동안 열림, 그 뒤 한 번 시험 호출을 허용(반열림)"""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET_S):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial:
+            self._trial = True  # 시험 호출은 한 번에 하나만
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive = 0
+        self.opened_at = None
+        self._trial = False
+
+    def release(self) -> None:
+        """공급자 상태와 무관하게 끝난 호출 (시험 호출 자리만 돌려줌)"""
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.consecutive += 1
+        if self._trial or self.consecutive >= self.failures:
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+class ProviderRouter:
+    """공급자 목록(앞쪽이 우선)에 재시도/회로 차단/failover/hedge를 적용해 요청"""
+
+    def __init__(self, providers: List[Provider], max_attempts: int = RETRY_MAX_ATTEMPTS,
+                 base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY,
+                 hedge_after: float = HEDGE_AFTER_S, stats=None):
+        self.providers = providers
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.stats = stats  # UsageMeter 같은 count(name)을 가진 객체 (없으면 집계 안 함)
+
+    @property
+    def primary(self) -> Provider:
+        return self.providers[0]
+
+    def _count(self, name: str) -> None:
+        if self.stats is not None:
+            self.stats.count(name)
+
+    def backoff(self, attempt: int) -> float:
+        """attempt번째 재시도 전 대기 시간 (full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def _hedge(self, provider: Provider, params: Dict[str, Any], limiter: RateLimiter,
+                     tokens: int) -> Completion:
+        await limiter.acquire(tokens)
+        return await provider.complete(params)
+
+    async def _hedged(self, provider: Provider, params: Dict[str, Any], limiter: RateLimiter,
+                      tokens: int) -> Completion:
+        # hedge_after초 안에 끝나지 않으면 같은 요청을 하나 더 보내고 먼저 성공한 쪽을 사용
+        # (추가 요청은 자기 몫의 RPM/TPM을 받은 뒤 나가고, 그동안 첫 요청이 끝나도 됨)
+        if not self.hedge_after:
+            return await provider.complete(params)
+        # 호출한 쪽이 취소되면 어느 단계에서든 아직 진행 중인 요청을 모두 취소 (토큰 낭비 방지)
+        first = asyncio.ensure_future(provider.complete(params))
+        pending = {first}
+        error: Optional[BaseException] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done:
+                return first.result()
+            self._count("hedged")
+            second = asyncio.ensure_future(self._hedge(provider, params, limiter, tokens))
+            pending.add(second)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("hedge_won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def complete(self, params: Dict[str, Any], limiters: Optional[Limiters] = None,
+                       expected_output_tokens: int = 0) -> Completion:
+        """우선순위대로 공급자를 시도해 응답을 반환 (전부 실패하면 TranslationFailed)
+
+        limiters는 이번 실행의 공급자별 리미터 (없으면 이 호출에서만 쓰는 리미터를 만듦)
+        """
+        if limiters is None:
+            limiters = Limiters()
+        system = params.get("system") or ""
+        texts = [system] if isinstance(system, str) else [b["text"] for b in system]
+        tokens = sum(estimate_tokens(t) for t in texts) + sum(
+            estimate_tokens(str(m["content"])) for m in params["messages"]) + expected_output_tokens
+
+        errors: List[Tuple[str, str]] = []
+        for provider in self.providers:
+            if not provider.breaker.allow():
+                errors.append((provider.name, "circuit open"))
+                self._count("breaker_skip")
+                continue
+            if errors:
+                self._count("failover")
+            for attempt in range(self.max_attempts):
+                provider_limiter = limiters[provider.name]
+                await provider_limiter.acquire(tokens)
+                try:
+                    completion = await self._hedged(provider, params, provider_limiter, tokens)
+                except asyncio.CancelledError:
+                    provider.breaker.release()
+                    raise
+                except Exception as e:
+                    if is_client_error(e):
+                        # 요청 자체 문제(400/401 등)는 재시도하지 않고 다음 공급자로
+                        # (공급자는 응답했으므로 회로 차단기에는 정상으로 기록)
+                        provider.breaker.record_success()
+                        errors.append((provider.name, _error_text(e)))
+                        break
+                    if not is_retryable(e):
+                        # API 응답이 아닌 오류는 다른 공급자로 넘겨도 같으므로 그대로 올림
+                        provider.breaker.release()
+                        raise
+                    provider.breaker.record_failure()
+                    if provider.breaker.state != "closed" or attempt + 1 == self.max_attempts:
+                        errors.append((provider.name, _error_text(e)))
+                        break
+                    self._count("retry")
+                    await asyncio.sleep(max(self.backoff(attempt), retry_after(e)))
+                    continue
+                provider.breaker.record_success()
+                return completion
+        raise TranslationFailed(errors)
+
+def default_providers(primary: Provider, order: List[str]) -> List[Provider]:
+    """cfg.TRANSLATE_PROVIDERS 순서대로 공급자 목록 구성 (키가 없는 공급자는 뺌)
+
+    primary는 이미 만든 공급자 (해당 모듈의 TM 모델과 같은 공급자)이고 항상 맨 앞입니다.
+    """
+    providers = [primary]
+    for name in order:
+        if name == primary.name:
+            continue
+        if name == "anthropic" and ANTHROPIC_API_KEY:
+            providers.append(AnthropicProvider.from_config(ANTHROPIC_MODEL))
+        elif name == "openai" and OPENAI_API_KEY:
+            providers.append(OpenAIProvider.from_config(OPENAI_MODEL))
+    return providers
+
+def failure_report_path(output_html: Path) -> Path:
+    """번역하지 못한 텍스트 목록 파일 (출력 HTML 옆의 <이름>.failed.json)"""
+    return output_html.with_name(output_html.stem + ".failed.json")
+
+def write_failure_report(output_html: Path, entries: List[Dict[str, str]]) -> None:
+    """[{"text": 원문, "error": 이유}]를 보고서로 남김 (실패가 없으면 이전 보고서 삭제)"""
+    path = failure_report_path(output_html)
+    if not entries:
+        path.unlink(missing_ok=True)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    print(f"[번역 실패] {len(entries)}개 텍스트가 영어로 남음 → {path}")
@@ -0,0 +1,240 @@
+"""상시 실행 PDF 렌더링 데몬
+
+Chromium을 한 번 띄워 둔 채 로컬 유닉스 소켓으로 렌더링 작업을 받습니다.
+워커마다 브라우저 컨텍스트/페이지를 하나씩 들고 있다가 recycle_after건을
+처리하면 새로 만들어 메모리 누수를 막습니다. 실행 중이면 html_to_pdf가
+알아서 이 데몬을 사용합니다.
+
+    python render_daemon.py serve      # 데몬 실행
+    python render_daemon.py stats      # 대기열 길이, 처리 건수, 지연 시간
+    python render_daemon.py stop
+
+프로토콜: 연결마다 JSON 한 줄 요청 → JSON 한 줄 응답
+    {"op": "render", "html": "/abs/in.html", "pdf": "/abs/out.pdf", "options": {...}}
+    {"op": "stats"} / {"op": "stop"}
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cfg import (RENDER_JOB_TIMEOUT_S, RENDER_PROBE_TIMEOUT_S, RENDER_RECYCLE_AFTER, RENDER_SOCKET,
+                 RENDER_WORKERS)
+
+class RenderService:
+    """워커 수만큼 페이지를 데워 두고 작업 큐를 처리"""
+
+    def __init__(self, workers: int = RENDER_WORKERS, recycle_after: int = RENDER_RECYCLE_AFTER,
+                 pdf_defaults: Optional[dict] = None):
+        self.workers = workers
+        self.recycle_after = recycle_after
+        self.pdf_defaults = pdf_defaults or {}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.latencies: deque = deque(maxlen=500)
+        self.counters = {"completed": 0, "failed": 0, "in_flight": 0, "recycled": 0}
+        self.started = time.time()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self, browser) -> None:
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(browser)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def render(self, html_path: str, pdf_path: str, options: dict) -> float:
+        """작업을 큐에 넣고 끝날 때까지 기다림 (대기 포함 소요 시간 반환)"""
+        done = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((html_path, pdf_path, options, time.perf_counter(), done))
+        return await done
+
+    async def _worker(self, browser) -> None:
+        context = page = None
+        used = 0
+        try:
+            while True:
+                html_path, pdf_path, options, queued_at, done = await self.queue.get()
+                self.counters["in_flight"] += 1
+                try:
+                    # 페이지 생성도 작업 안에서 처리해야 실패가 요청자에게 전달되고 워커가 살아남음
+                    if page is None or used >= self.recycle_after:
+                        if context is not None:
+                            old, context, page = context, None, None
+                            self.counters["recycled"] += 1
+                            await old.close()
+                        context = await browser.new_context()
+                        page = await context.new_page()
+                        used = 0
+                    await page.goto(Path(html_path).absolute().as_uri())
+                    await page.pdf(path=pdf_path, **{**self.pdf_defaults, **options})
+                    elapsed = time.perf_counter() - queued_at
+                    self.latencies.append(elapsed)
+                    self.counters["completed"] += 1
+                    done.set_result(elapsed)
+                except Exception as e:
+                    self.counters["failed"] += 1
+                    # 페이지 상태를 믿을 수 없으므로 다음 작업 전에 새로 만듦
+                    used = self.recycle_after
+                    done.set_exception(e)
+                finally:
+                    used += 1
+                    self.counters["in_flight"] -= 1
+        finally:
+            if context is not None:
+                await context.close()
+
+    def stats(self) -> dict:
+        lat = sorted(self.latencies)
+        return {
+            "queue_depth": self.queue.qsize(),
+            **self.counters,
+            "workers": self.workers,
+            "uptime_s": round(time.time() - self.started, 1),
+            "latency_p50_s": round(statistics.median(lat), 3) if lat else None,
+            "latency_p95_s": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 3) if lat else None,
+        }
+
+async def handle_client(service: RenderService, stop: asyncio.Event,
+                        reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        # 요청 줄을 보내지 않는 연결이 핸들러를 붙잡아 두지 않도록 읽기에도 한도를 둠
+        line = await asyncio.wait_for(reader.readline(), RENDER_PROBE_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        writer.close()
+        return
+    try:
+        request = json.loads(line)
+        op = request.get("op")
+        if op == "render":
+            try:
+                seconds = await service.render(request["html"], request["pdf"], request.get("options", {}))
+                reply = {"ok": True, "seconds": round(seconds, 3)}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+        elif op == "stats":
+            reply = {"ok": True, "stats": service.stats()}
+        elif op == "stop":
+            stop.set()
+            reply = {"ok": True}
+        else:
+            reply = {"ok": False, "error": f"unknown op: {op}"}
+    except (json.JSONDecodeError, KeyError) as e:
+        reply = {"ok": False, "error": f"bad request: {e}"}
+    writer.write((json.dumps(reply) + "\n").encode("utf-8"))
+    await writer.drain()
+    writer.close()
+
+async def serve(service: RenderService, browser, socket_path: Path = RENDER_SOCKET) -> None:
+    """browser로 service를 시작하고 stop 요청이 올 때까지 socket_path에서 작업을 받음"""
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True)
+    stop = asyncio.Event()
+    service.start(browser)
+    server = await asyncio.start_unix_server(
+        lambda r, w: handle_client(service, stop, r, w), path=str(socket_path)
+    )
+    print(f"[렌더 데몬] {socket_path} 대기 중 (워커 {service.workers}개, {service.recycle_after}건마다 페이지 교체)")
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await service.stop()
+        socket_path.unlink(missing_ok=True)
+        print("[렌더 데몬] 종료")
+
+async def run_daemon(socket_path: Path = RENDER_SOCKET, workers: int = RENDER_WORKERS,
+                     recycle_after: int = RENDER_RECYCLE_AFTER) -> None:
+    from playwright.async_api import async_playwright
+    from html_to_pdf import PDF_FORMAT, PDF_MARGIN
+
+    service = RenderService(workers, recycle_after,
+                            pdf_defaults={"format": PDF_FORMAT, "margin": PDF_MARGIN})
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        try:
+            await serve(service, browser, socket_path)
+        finally:
+            await browser.close()
+
+class RenderClient:
+    """렌더 데몬 클라이언트 (요청마다 연결 하나)
+
+    연결부터 응답 줄까지 timeout초 안에 끝나지 않으면 asyncio.TimeoutError
+    (멈췄거나 긴 작업에 묶인 데몬 때문에 빌드가 무한정 기다리지 않도록)
+    """
+
+    def __init__(self, socket_path: Path = RENDER_SOCKET, probe_timeout: float = RENDER_PROBE_TIMEOUT_S,
+                 job_timeout: float = RENDER_JOB_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.probe_timeout = probe_timeout
+        self.job_timeout = job_timeout
+
+    async def request(self, payload: dict, timeout: Optional[float] = None) -> dict:
+        return await asyncio.wait_for(self._exchange(payload), timeout or self.probe_timeout)
+
+    async def _exchange(self, payload: dict) -> dict:
+        reader, writer = await asyncio.open_unix_connection(str(self.socket_path))
+        try:
+            writer.write((json.dumps(payload) + "\n").encode("utf-8"))
+            await writer.drain()
+            return json.loads(await reader.readline())
+        finally:
+            writer.close()
+
+    async def render(self, html_path: Path, pdf_path: Path, options: dict) -> float:
+        reply = await self.request({"op": "render", "html": str(Path(html_path).absolute()),
+                                    "pdf": str(Path(pdf_path).absolute()), "options": options},
+                                   self.job_timeout)
+        if not reply.get("ok"):
+            raise RuntimeError(f"렌더 데몬 오류: {reply.get('error')}")
+        return reply["seconds"]
+
+    async def render_many(self, jobs: List[Tuple[Path, Path]], options: dict) -> None:
+        await asyncio.gather(*(self.render(h, p, options) for h, p in jobs))
+
+    async def stats(self) -> Dict:
+        return (await self.request({"op": "stats"}))["stats"]
+
+    def is_running(self) -> bool:
+        """소켓에 연결되어 상태 응답이 오면 True (남은 소켓 파일이나 응답 없는 데몬은 False)"""
+        if not hasattr(asyncio, "open_unix_connection") or not self.socket_path.exists():
+            return False
+        try:
+            return asyncio.run(self.stats()) is not None
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError):
+            return False
+
+def running_daemon(socket_path: Path = RENDER_SOCKET) -> Optional[RenderClient]:
+    """실행 중인 렌더 데몬의 클라이언트, 없으면 None"""
+    client = RenderClient(socket_path)
+    return client if client.is_running() else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="상시 실행 PDF 렌더링 데몬")
+    parser.add_argument("command", choices=["serve", "stats", "stop"])
+    parser.add_argument("--socket", type=Path, default=RENDER_SOCKET)
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS)
+    parser.add_argument("--recycle-after", type=int, default=RENDER_RECYCLE_AFTER)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        asyncio.run(run_daemon(args.socket, args.workers, args.recycle_after))
+        return
+    client = RenderClient(args.socket)
+    if not client.is_running():
+        raise SystemExit(f"[렌더 데몬] 실행 중이 아님: {args.socket}")
+    if args.command == "stats":
+        print(json.dumps(asyncio.run(client.stats()), ensure_ascii=False, indent=2))
+    else:
+        asyncio.run(client.request({"op": "stop"}))
+        print("[렌더 데몬] 종료 요청 보냄")
+
+if __name__ == "__main__":
+    main()
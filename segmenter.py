@@ -0,0 +1,212 @@
+import copy
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Union
+
+from bs4 import NavigableString, Tag
+
+from utils import find_unskipped_strings, is_codey_text, is_monospace_tag
+
+# 하나의 번역 단위가 되는 블록 태그
+BLOCK_TAGS = frozenset(("p", "li", "h1", "h2", "h3", "h4", "h5", "h6", "td", "th"))
+
+# 블록 안에 있으면 그 블록을 단위로 삼지 않는 태그 (안쪽 블록이 단위가 됨)
+NESTED_BLOCK_TAGS = BLOCK_TAGS | {
+    "div", "section", "article", "table", "ul", "ol", "dl", "pre", "blockquote", "figure",
+}
+
+# 번호 자리표시자로 바꿔 번역문 안에서 위치를 옮길 수 있는 인라인 태그
+INLINE_TAGS = frozenset((
+    "a", "b", "strong", "i", "em", "u", "s", "span", "sup", "sub", "mark", "small", "abbr", "cite",
+))
+
+# <g1>…</g1>: 내용을 번역하는 인라인 태그, <x1/>: 그대로 보존하는 요소(코드, 이미지 등)
+MARKER_RE = re.compile(r"<(/?)([gx])(\d+)(/?)>")
+
+# 자리표시자가 있는 세그먼트에 붙이는 지시문
+MARKER_INSTRUCTION = (
+    "The text contains placeholder tags: <g1>...</g1> wraps formatted text (translate its content), "
+    "<x1/> stands for code, images or links that must stay as they are. "
+    "Keep every placeholder exactly once, correctly nested, and move it with the words it belongs to."
+)
+
+def has_markers(text: str) -> bool:
+    return MARKER_RE.search(text) is not None
+
+def strip_markers(text: str) -> str:
+    """자리표시자를 지운 순수 텍스트 (코드 판정 등에 사용)"""
+    return MARKER_RE.sub("", text)
+
+def markers_match(source: str, translated: str) -> bool:
+    """번역문의 자리표시자가 원문과 같은 집합이고 올바르게 중첩되었는지 확인"""
+    if Counter(m.group(0) for m in MARKER_RE.finditer(source)) != \
+       Counter(m.group(0) for m in MARKER_RE.finditer(translated)):
+        return False
+    stack: List[str] = []
+    for m in MARKER_RE.finditer(translated):
+        closing, kind, num, _ = m.groups()
+        if kind != "g":
+            continue
+        if closing:
+            if not stack or stack.pop() != num:
+                return False
+        else:
+            stack.append(num)
+    return not stack
+
+class Segment:
+    """번역 단위 하나: 텍스트 노드 하나("text") 또는 블록 요소 하나("block")"""
+
+    def __init__(self, node: Union[Tag, NavigableString], source: str, kind: str = "text",
+                 slots: Optional[Dict[int, Union[Tag, NavigableString]]] = None,
+                 nodes: Optional[List[NavigableString]] = None):
+        self.node = node
+        self.source = source
+        self.kind = kind
+        self.slots = slots or {}
+        # 블록 안의 번역 대상 텍스트 노드 (복원 실패 시 노드 단위로 재시도)
+        self.nodes = nodes if nodes is not None else [node]
+        self._undo = None  # apply 이전 상태 (revert용)
+
+    def accepts(self, translated: str) -> bool:
+        """번역 결과를 이 세그먼트에 적용할 수 있는지 (자리표시자 구조 검사)"""
+        return self.kind == "text" or markers_match(self.source, translated)
+
+    def apply(self, translated: str) -> bool:
+        """번역문을 문서에 반영. 구조가 맞지 않으면 아무것도 바꾸지 않고 False"""
+        if self.kind == "text":
+            if translated and translated != self.source:
+                self._undo = NavigableString(translated)
+                self.node.replace_with(self._undo)
+            return True
+        if not self.accepts(translated):
+            return False
+
+        block = self.node
+        # 인라인 태그는 속성만 복사한 빈 껍데기로, 보존 요소는 원본을 그대로 다시 사용
+        shells = {}
+        children, moved = list(block.contents), []
+        for num, el in sorted(self.slots.items()):
+            if isinstance(el, Tag) and el.name in INLINE_TAGS and self._is_paired(num):
+                shell = copy.copy(el)
+                shell.clear()
+                shells[num] = shell
+            else:
+                moved.append((el, el.parent, el.parent.index(el)))
+        # 위치를 모두 기록한 뒤에 떼어 냄 (먼저 떼면 같은 부모 안의 뒤쪽 위치가 당겨짐)
+        for el, _, _ in moved:
+            el.extract()
+        self._undo = (children, moved)
+        block.clear()
+
+        stack = [block]
+        pos = 0
+        for m in MARKER_RE.finditer(translated):
+            if m.start() > pos:
+                stack[-1].append(NavigableString(translated[pos:m.start()]))
+            closing, kind, num, _ = m.groups()
+            num = int(num)
+            if kind == "x":
+                stack[-1].append(self.slots[num])
+            elif closing:
+                stack.pop()
+            else:
+                stack[-1].append(shells[num])
+                stack.append(shells[num])
+            pos = m.end()
+        if pos < len(translated):
+            stack[-1].append(NavigableString(translated[pos:]))
+        return True
+
+    def revert(self) -> None:
+        """apply 이전 상태로 되돌림 (같은 분할 결과에 다른 언어 번역을 다시 적용할 때)"""
+        if self._undo is None:
+            return
+        if self.kind == "text":
+            self._undo.replace_with(self.node)
+        else:
+            children, moved = self._undo
+            self.node.clear()
+            for child in children:
+                self.node.append(child)
+            # 인라인 태그 안에 있던 보존 요소는 원래 자리로 (떼기 전 위치를 앞에서부터 넣으므로 맞음)
+            for el, parent, index in moved:
+                if parent is not self.node:
+                    parent.insert(index, el)
+        self._undo = None
+
+    def _is_paired(self, num: int) -> bool:
+        return f"<g{num}>" in self.source
+
+def _has_prose(tag: Tag) -> bool:
+    """코드 태그/코드 같은 텍스트를 빼고도 번역할 글이 남는지"""
+    return any(s.strip() for s in find_unskipped_strings(tag))
+
+def _is_leaf_block(tag: Tag) -> bool:
+    return tag.find(list(NESTED_BLOCK_TAGS)) is None
+
+def _mark_up(block: Tag, slots: Dict[int, Union[Tag, NavigableString]]) -> str:
+    """블록 내용을 자리표시자 문자열로 직렬화
+
+    코드가 섞인 인라인 태그도 <gN>으로 내려가 코드 부분만 <xN/>이 되고, 분류기가
+    코드로 본 텍스트(is_codey_text)는 모델에 보내지 않도록 <xN/>로 보존합니다.
+    """
+    parts: List[str] = []
+    for child in block.contents:
+        if isinstance(child, NavigableString):
+            if type(child) is NavigableString and not is_codey_text(str(child)):
+                parts.append(str(child))
+            else:
+                # 주석/CDATA/코드 같은 텍스트는 보존
+                num = len(slots) + 1
+                slots[num] = child
+                parts.append(f"<x{num}/>")
+            continue
+        num = len(slots) + 1
+        slots[num] = child
+        if child.name in INLINE_TAGS and not is_monospace_tag(child) and _has_prose(child):
+            parts.append(f"<g{num}>{_mark_up(child, slots)}</g{num}>")
+        else:
+            parts.append(f"<x{num}/>")
+    return "".join(parts)
+
+def build_segments(translatable_nodes: List[NavigableString], mode: str = "block") -> List[Segment]:
+    """번역 대상 텍스트 노드를 번역 단위로 묶기 (문서 순서 유지)
+
+    mode="block"이면 p/li/h1~h6/td/th 중 안쪽에 다른 블록이 없는 요소를 하나의
+    단위로 삼고, 인라인 태그는 <gN>…</gN>, 코드·이미지 등은 <xN/>로 바꿉니다.
+    블록에 속하지 않은 노드와 mode="node"일 때는 기존처럼 텍스트 노드 단위입니다.
+    """
+    if mode == "node":
+        return [Segment(node, str(node).strip()) for node in translatable_nodes]
+    if mode != "block":
+        raise ValueError(f"알 수 없는 세그먼트 모드: {mode}")
+
+    segments: List[Segment] = []
+    by_block: Dict[int, Segment] = {}
+    leaf_cache: Dict[int, bool] = {}
+    for node in translatable_nodes:
+        block = next((p for p in node.parents if p.name in BLOCK_TAGS), None)
+        if block is not None:
+            key = id(block)
+            if key not in leaf_cache:
+                leaf_cache[key] = _is_leaf_block(block)
+            if leaf_cache[key]:
+                seg = by_block.get(key)
+                if seg is None:
+                    slots: Dict[int, Union[Tag, NavigableString]] = {}
+                    source = _mark_up(block, slots).strip()
+                    seg = Segment(block, source, kind="block", slots=slots, nodes=[])
+                    by_block[key] = seg
+                    segments.append(seg)
+                seg.nodes.append(node)
+                continue
+        segments.append(Segment(node, str(node).strip()))
+
+    # 원문이 텍스트 노드 하나와 같은 블록은 노드 단위로 두어 기존 TM 항목을 그대로 재사용
+    return [
+        Segment(seg.nodes[0], seg.source)
+        if seg.kind == "block" and len(seg.nodes) == 1 and seg.source == str(seg.nodes[0]).strip()
+        else seg
+        for seg in segments
+    ]
@@ -0,0 +1,142 @@
+"""원고 폴더 색인 (한 번 훑어 docx 경로/크기/수정 시각/내용 해시를 기록)
+
+build_order의 파일/폴더 찾기는 목차 항목마다 폴더 전체를 rglob으로 다시 훑었는데,
+네트워크 드라이브처럼 느린 곳에서는 이것만으로 오래 걸립니다. 여기서는 폴더를 한
+번만 돌며 docx와 하위 폴더 목록을 모으고, 찾기는 모두 이 색인에서 답합니다.
+
+색인은 work/source_manifest.json에 저장되고, 다음 실행에서는 크기와 수정 시각이
+그대로인 파일의 해시를 다시 계산하지 않습니다. 훑기 자체는 os.walk + stat만 하고,
+내용 해시는 sha256()/changed로 처음 물을 때나 색인을 저장할 때 계산하므로 이름/폴더
+찾기만 하는 build_order는 docx를 읽지 않습니다. 새로 생기거나 바뀐 파일(changed)과
+사라진 파일(removed)은 챕터 증분 빌드가 재빌드 대상을 고르는 데 씁니다.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def natural_key(s: str):
+    # "Chapter 10 ..." 이 "Chapter 2 ..." 뒤로 가도록 자연 정렬 키
+    return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", s)]
+
+class SourceIndex:
+    """원고 폴더의 docx/폴더 색인 (키는 root 기준 상대 경로)"""
+
+    def __init__(self, root: Path, path: Optional[Path] = None):
+        self.root = Path(root)
+        self.path = path  # None이면 저장하지 않음
+        self.files: Dict[str, Dict] = {}  # 상대 경로 → {"size", "mtime_ns", "sha256"(아직 모르면 None)}
+        self.dirs: List[str] = []
+        self.removed: List[str] = []
+        self._touched: Dict[str, Optional[str]] = {}  # 크기/시각이 바뀐 파일 → 이전 해시 (새 파일은 None)
+
+    @classmethod
+    def load(cls, root: Path, path: Path) -> "SourceIndex":
+        """저장된 색인을 읽음 (없거나 다른 폴더의 색인이면 빈 색인)"""
+        index = cls(root, path)
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("root") == str(index.root.resolve()):
+                index.files = data.get("files", {})
+                index.dirs = data.get("dirs", [])
+        return index
+
+    def scan(self, verbose: bool = True) -> "SourceIndex":
+        """폴더를 한 번 훑어 색인 갱신 (크기/수정 시각이 바뀐 docx는 해시를 비워 둠)"""
+        previous = self.files
+        files, dirs, touched = {}, [], {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]  # .git 등
+            rel_dir = Path(dirpath).relative_to(self.root)
+            dirs.extend((rel_dir / d).as_posix() for d in dirnames)
+            for name in filenames:
+                if not name.endswith(".docx"):
+                    continue  # 관계없는 파일은 stat도 하지 않음
+                rel = (rel_dir / name).as_posix()
+                st = os.stat(os.path.join(dirpath, name))
+                old = previous.get(rel)
+                if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                    files[rel] = old
+                    continue
+                files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": None}
+                touched[rel] = old["sha256"] if old else None
+        self.files, self.dirs = files, sorted(dirs)
+        self._touched = touched
+        self.removed = sorted(set(previous) - set(files))
+        if verbose:
+            print(f"[INDEX] docx {len(files)}개 (새로/수정 시각 바뀜 {len(touched)}개, 삭제 {len(self.removed)}개)")
+        return self
+
+    @property
+    def changed(self) -> List[str]:
+        """마지막 scan에서 새로 생기거나 내용이 바뀐 docx (시각만 바뀐 파일은 해시를 비교해 뺌)"""
+        return [rel for rel, old in sorted(self._touched.items())
+                if old is None or self._hash(rel) != old]
+
+    def _hash(self, rel: str) -> str:
+        entry = self.files[rel]
+        if entry["sha256"] is None:
+            entry["sha256"] = file_sha256(self.root / rel)
+        return entry["sha256"]
+
+    def save(self) -> None:
+        """색인 저장 (아직 해시하지 않은 파일은 여기서 해시해 다음 실행이 재사용)"""
+        if self.path is None:
+            return
+        for rel in self.files:
+            self._hash(rel)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"root": str(self.root.resolve()), "files": self.files, "dirs": self.dirs}
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def _rel(self, path: Path) -> str:
+        return Path(path).relative_to(self.root).as_posix()
+
+    def sha256(self, path: Path) -> Optional[str]:
+        """색인에 있는 docx의 내용 해시 (색인 밖 파일이면 None)"""
+        try:
+            rel = self._rel(path)
+        except ValueError:
+            return None
+        return self._hash(rel) if rel in self.files else None
+
+    def is_changed(self, path: Path) -> bool:
+        try:
+            return self._rel(path) in self.changed
+        except ValueError:
+            return False
+
+    def find_one_file(self, keyword: str) -> Optional[Path]:
+        # '파일명'에 keyword가 포함된 단일 파일 (가장 얕은 경로/자연 정렬 우선)
+        cands = [rel for rel in self.files if keyword.lower() in Path(rel).stem.lower()]
+        if not cands:
+            return None
+        cands.sort(key=lambda rel: (len(Path(rel).parts), natural_key(Path(rel).name)))
+        return self.root / cands[0]
+
+    def find_dir(self, keyword: str) -> Optional[Path]:
+        # 폴더명에 keyword가 포함된 폴더 (가장 얕은 경로/이름순 우선)
+        dirs = [rel for rel in self.dirs if keyword.lower() in Path(rel).name.lower()]
+        if not dirs:
+            return None
+        dirs.sort(key=lambda rel: (len(Path(rel).parts), Path(rel).name.lower()))
+        return self.root / dirs[0]
+
+    def list_chapters_in_dir(self, dirpath: Path) -> List[Path]:
+        # 폴더 바로 아래 docx를 챕터 순서대로 자연 정렬해 나열
+        rel_dir = self._rel(dirpath)
+        docs = [rel for rel in self.files if Path(rel).parent.as_posix() == rel_dir]
+        docs.sort(key=lambda rel: natural_key(Path(rel).name))
+        return [self.root / rel for rel in docs]
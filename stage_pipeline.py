@@ -0,0 +1,120 @@
+"""챕터 단위 단계 파이프라인 (변환 → 번역 → 렌더링을 겹쳐 실행)
+
+단계마다 스레드 하나가 앞 단계의 크기 제한 큐에서 항목을 꺼내 처리하고 다음
+큐로 넘깁니다. 챕터 N을 번역하는 동안 N+1을 변환하고 N-1을 렌더링하므로
+CPU 위주 단계(변환/PDF)와 네트워크 위주 단계(번역)가 겹치고, 전체 시간은
+가장 느린 단계에 가까워집니다. 큐 크기(PIPELINE_QUEUE_SIZE)가 앞 단계가
+얼마나 앞서 나갈 수 있는지(= 메모리에 쌓이는 양)를 정합니다.
+
+단계마다 스레드가 하나라 항목 순서는 유지되고, 한 단계 안에서는 전역 상태를
+쓰는 함수(translate_html 등)도 동시에 불리지 않습니다. batch 단계는 큐에 쌓인
+항목을 한 번에 받아 처리합니다 (렌더링: 브라우저를 한 번 띄워 여러 챕터).
+한 단계에서 예외가 나면 모든 단계를 멈추고 그 예외를 다시 올립니다.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cfg import PIPELINE_QUEUE_SIZE
+
+_DONE = object()  # 입력이 끝났음을 알리는 표시
+
+class Stage:
+    """파이프라인 단계 하나 (batch면 func가 항목 목록을 받음)"""
+
+    def __init__(self, name: str, func: Callable, batch: bool = False):
+        self.name = name
+        self.func = func
+        self.batch = batch
+
+class _Stopped(Exception):
+    pass
+
+def run_stages(items: Iterable, stages: List[Stage], queue_size: int = PIPELINE_QUEUE_SIZE,
+               on_done: Optional[Callable] = None) -> Dict[str, float]:
+    """items를 stages 순서대로 흘려 처리하고 단계별 작업 시간(초)과 전체 시간("wall")을 반환
+
+    on_done(항목)은 마지막 단계를 마친 항목마다 바로 불립니다 (다른 챕터를 기다리지 않음).
+    """
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    queues = [queue.Queue(maxsize=max(queue_size, 1)) for _ in stages]
+    busy = {stage.name: 0.0 for stage in stages}
+
+    def put(q: queue.Queue, item) -> None:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise _Stopped()
+
+    def get(q: queue.Queue):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise _Stopped()
+
+    def worker(i: int, stage: Stage) -> None:
+        inbox = queues[i]
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        try:
+            done = False
+            while not done:
+                batch = [get(inbox)]
+                if stage.batch:
+                    # 이미 쌓여 있는 항목은 함께 처리
+                    while batch[-1] is not _DONE:
+                        try:
+                            batch.append(inbox.get_nowait())
+                        except queue.Empty:
+                            break
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+                if batch:
+                    start = time.perf_counter()
+                    if stage.batch:
+                        stage.func(batch)
+                    else:
+                        stage.func(batch[0])
+                    busy[stage.name] += time.perf_counter() - start
+                for item in batch:
+                    if outbox is not None:
+                        put(outbox, item)
+                    elif on_done:
+                        on_done(item)
+            if outbox is not None:
+                put(outbox, _DONE)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    wall = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i, stage), name=f"stage-{stage.name}", daemon=True)
+               for i, stage in enumerate(stages)]
+    for t in threads:
+        t.start()
+    try:
+        for item in items:
+            put(queues[0], item)
+        put(queues[0], _DONE)
+    except _Stopped:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    busy["wall"] = time.perf_counter() - wall
+    return busy
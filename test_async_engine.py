@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import asyncio
+import time
+
+from async_engine import RateLimiter, run_in_order
+
+def test_run_in_order_keeps_document_order():
+    # 늦게 끝나는 작업이 섞여 있어도 결과는 입력 순서 그대로여야 함
+    in_flight = 0
+    peak = 0
+
+    async def worker(i):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * ((i * 7) % 5))
+        in_flight -= 1
+        return i * 10
+
+    results = asyncio.run(run_in_order(list(range(40)), worker, concurrency=4, progress_every=0))
+    assert results == [i * 10 for i in range(40)]
+    assert peak <= 4
+
+def test_rate_limiter_throttles_requests_per_minute():
+    # 분당 600건 = 초당 10건: 버킷(600)을 비운 뒤 추가 5건은 약 0.5초 대기
+    async def scenario():
+        limiter = RateLimiter(rpm=600, tpm=10**9)
+        limiter._req_tokens = 0
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire(1)
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(scenario())
+    assert 0.4 <= elapsed < 2.0
+
+if __name__ == "__main__":
+    test_run_in_order_keeps_document_order()
+    test_rate_limiter_throttles_requests_per_minute()
+    print("✅ async_engine 테스트 통과")
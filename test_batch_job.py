@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+import batch_job
+from batch_job import LocalBatchBackend
+
+def test_local_batch_lifecycle(tmp_path: Path):
+    src = tmp_path / "en.html"
+    src.write_text(
+        "<html><body><h1>Prompt Chaining</h1><p>An agent uses tools.</p>"
+        "<p>An agent uses tools.</p><pre>x = call()</pre></body></html>",
+        encoding="utf-8",
+    )
+    out = tmp_path / "ko.html"
+    job = tmp_path / "job"
+    spool = tmp_path / "spool"
+
+    state = batch_job.prepare(job, src, out, tmp_path / "tm.sqlite", LocalBatchBackend(spool))
+    assert state["segments"] == 2  # 중복 문단은 한 번만, 코드 블록은 제외
+
+    # 단계마다 새 백엔드 객체 = 다른 프로세스에서 이어서 실행하는 상황
+    batch_job.submit(job, LocalBatchBackend(spool))
+    assert batch_job.poll(job, LocalBatchBackend(spool), wait=False)["status"] == batch_job.ENDED
+    state = batch_job.collect(job, LocalBatchBackend(spool))
+
+    html = out.read_text(encoding="utf-8")
+    assert state["failed"] == 0 and state["applied"] == 3
+    assert "[KO] Prompt Chaining" in html
+    assert html.count("[KO] An agent uses tools.") == 2
+    assert "<pre>x = call()</pre>" in html
+
+    # 다시 준비하면 모두 TM에 있으므로 요청 없음
+    again = batch_job.prepare(tmp_path / "job2", src, out, tmp_path / "tm.sqlite", LocalBatchBackend(spool))
+    assert again["segments"] == 0
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_local_batch_lifecycle(Path(d))
+    print("✅ batch_job 테스트 통과")
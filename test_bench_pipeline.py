@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+import bench_pipeline
+import translate_html_claude
+from async_engine import RateLimiter
+from build_order import build_order
+from fake_llm_server import FakeLLMServer
+from providers import ProviderRouter
+from usage_meter import UsageMeter
+
+def test_corpus_follows_book_order(tmp_path: Path):
+    corpus = bench_pipeline.make_corpus(tmp_path / "corpus", chapters=5, paragraphs=4)
+    names = [p.stem for p in build_order(corpus)]
+    assert names[:4] == ["Dedication", "Acknowledgment", "Foreword", "Introduction"]
+    assert [n.split("-")[0] for n in names[4:9]] == [f"Chapter {n}" for n in range(1, 6)]
+    assert names[-2:] == ["Conclusion", "Glossary"]
+
+def test_pipeline_stages_against_fake_server(monkeypatch, tmp_path: Path):
+    limiter = lambda provider: RateLimiter(10000, 10**9)
+    monkeypatch.setattr("async_engine.make_limiter", limiter)
+    monkeypatch.setattr(translate_html_claude, "USAGE", UsageMeter())
+    monkeypatch.setattr(translate_html_claude, "ROUTER", ProviderRouter([], base_delay=0.001))
+
+    corpus = bench_pipeline.make_corpus(tmp_path / "corpus", chapters=2, paragraphs=8)
+    with FakeLLMServer(min_cacheable_tokens=0, error_rate=0.2, seed=3) as server:
+        report, llm = bench_pipeline.run_pipeline(corpus, tmp_path / "run", server.base_url,
+                                                  render_pdf=False, concurrency=4)
+    stages = {s["stage"]: s for s in report.stages}
+    assert list(stages) == ["order", "merge", "convert", "extract", "translate"]
+    assert stages["convert"]["images"] >= 2 and stages["extract"]["segments"] > 0
+    assert llm["calls"] >= stages["extract"]["segments"] // 2 and llm["errors"] == 0
+    assert server.errors > 0  # 529는 공급자 계층이 재시도해 흡수
+    ko = (tmp_path / "run" / "master_ko.html").read_text(encoding="utf-8")
+    assert "[KO] " in ko and '<pre class="code">' in ko and "<table" in ko
+
+    # 메모리 경유: 같은 번역을 하되 책 HTML 파일은 쓰지 않음 (TM이 새로 시작하므로 호출 수도 같음)
+    with FakeLLMServer(min_cacheable_tokens=0) as server:
+        fused, fused_llm = bench_pipeline.run_pipeline(corpus, tmp_path / "mem", server.base_url,
+                                                       render_pdf=False, concurrency=4, in_memory=True)
+    assert [s["stage"] for s in fused.stages] == list(stages)
+    assert fused_llm["calls"] == server.requests and server.requests >= stages["extract"]["segments"] // 2
+    assert not list((tmp_path / "mem").glob("master_*.html"))
+    savings = bench_pipeline.fusion_savings(report.to_dict(llm), fused.to_dict(fused_llm))
+    assert set(savings) == {"files", "in_memory", "wall_s_saved", "peak_rss_bytes_saved"}
+
+def test_compare_flags_slower_stages():
+    baseline = {"stages": [{"stage": "convert", "wall_s": 1.0, "peak_rss_bytes": 100},
+                           {"stage": "translate", "wall_s": 2.0, "peak_rss_bytes": 100}],
+                "llm": {"latency_p95_s": 0.1}}
+    current = {"stages": [{"stage": "convert", "wall_s": 1.1, "peak_rss_bytes": 100},
+                          {"stage": "translate", "wall_s": 3.0, "peak_rss_bytes": 200}],
+               "llm": {"latency_p95_s": 0.1}}
+    regressions = bench_pipeline.compare(baseline, current)
+    assert [r.split(":")[0] for r in regressions] == ["translate.wall_s", "translate.peak_rss_bytes"]
+    assert bench_pipeline.compare(baseline, baseline) == []
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
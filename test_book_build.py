@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import random
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import book_build
+import html_to_pdf
+import translate_html_claude
+from merge_to_html import CHAPTER_BREAK, add_auto_toc
+
+FRAGMENTS = {
+    "cover": "<p>Cover page</p>",
+    "one": "<h1>One</h1><p>Short chapter.</p>",
+    "two": "<h1>Two</h1>" + "<p>Long paragraph of text for the second chapter.</p>" * 12,
+    "three": "<h1>Three</h1><h2>Detail</h2><p>Short again.</p>",
+    "four": "<h1>Four</h1><p>Tiny.</p>",
+}
+
+def _fake_fragment(src, html_dir):
+    return FRAGMENTS[src.stem]
+
+async def _fake_translate_languages(segments, targets, concurrency, context="", limiters=None):
+    return {lang: ["KO " + seg.source for seg in segments] for lang in targets}
+
+def _bodies(htmls):
+    return [BeautifulSoup(h, "lxml").body.decode_contents() for h in htmls]
+
+def _group(htmls, min_chars):
+    # split_parts_by_chapter의 규칙: 청크가 min_chars 이상이 된 뒤의 챕터부터 새 청크
+    chunks, size = [], 0
+    for html in htmls:
+        if not chunks or size >= min_chars:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(html)
+        size += len(html)
+    return chunks
+
+def test_chunk_plan_matches_whole_book_grouping():
+    rng = random.Random(7)
+    for _ in range(300):
+        min_chars = 100
+        chapters = [f"<p>{'x' * rng.randrange(1, 160)}</p>" for _ in range(rng.randrange(1, 8))]
+        toc = rng.choice(["", "<div>" + "t" * rng.randrange(1, 200) + "</div>"])
+        plan = book_build.ChunkPlan(min_chars, wait_for_toc=True)
+        chunks = [c for html in chapters for c in plan.add(html)]
+        head, tail = plan.finish(toc)
+        assert head + chunks + tail == _group([toc + chapters[0]] + chapters[1:], min_chars)
+
+def test_pipeline_renders_the_same_chunks_as_the_full_build(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(translate_html_claude, "_translate_languages", _fake_translate_languages)
+    monkeypatch.setattr(book_build, "docx_to_html_fragment", _fake_fragment)
+    sources = [tmp_path / f"{name}.docx" for name in FRAGMENTS]
+    min_chars = 300
+
+    # 전체 빌드: 책 전체를 이어 붙여 목차를 넣고 번역한 뒤 챕터 경계에서 청크로 자름
+    full_dir = tmp_path / "full"
+    full_dir.mkdir()
+    soup = BeautifulSoup(CHAPTER_BREAK.join(FRAGMENTS.values()), "lxml")
+    add_auto_toc(soup)
+    translate_html_claude.translate_document(soup, full_dir / "master_ko.html", full_dir / "tm.sqlite")
+    expected = html_to_pdf.split_html_by_chapter(full_dir / "master_ko.html", full_dir, min_chars)
+    expected = _bodies(p.read_text(encoding="utf-8") for p in expected)
+
+    rendered, merged = {}, []
+
+    class FakeRenderer:
+        def __init__(self, workers=1):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def render(self, jobs):
+            for html_path, pdf_path in jobs:
+                rendered[pdf_path] = html_path.read_text(encoding="utf-8")
+                pdf_path.write_bytes(b"%PDF")
+
+    def fake_merge(parts, pdf_path):
+        merged.extend(parts)
+        return len(parts)
+
+    monkeypatch.setattr(book_build, "PartRenderer", FakeRenderer)
+    monkeypatch.setattr(book_build, "merge_parts_with_page_numbers", fake_merge)
+    work = tmp_path / "work"
+    work.mkdir()
+    result = book_build.build_book(sources, True, work, work / "master_en.html", work / "master_ko.html",
+                                   work / "tm.sqlite", tmp_path / "out" / "book.pdf", ["ko"],
+                                   min_chars=min_chars)
+
+    assert _bodies(rendered[p] for p in merged) == expected
+    assert result["pages"] == {"ko": len(expected)}
+    assert "Contents" in expected[0] and 'id="h4"' in "".join(expected)  # 목차가 첫 청크, 제목 번호는 책 전체 기준
+    # 책 HTML도 전체 빌드와 같게 남고, 청크 파일은 정리됨
+    assert _bodies([(work / "master_ko.html").read_text(encoding="utf-8")]) == \
+        _bodies([(full_dir / "master_ko.html").read_text(encoding="utf-8")])
+    assert sorted(p.name for p in work.iterdir() if "part" in p.name) == []
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import shutil
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from pypdf import PdfReader, PdfWriter
+
+import chapter_build
+from html_to_pdf import stamp_pages
+from merge_to_html import CHAPTER_BREAK, add_auto_toc
+
+SRC = Path(__file__).parent
+
+def _blank_pdf(path: Path, pages: int) -> None:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=595, height=842)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+def _stub_stages(monkeypatch, calls: dict):
+    def fake_translate(en_html, out_html, tm_path):
+        calls["translate"].append(en_html.name)
+        out_html.write_text(en_html.read_text(encoding="utf-8").replace("<body>", "<body><!--ko-->"),
+                            encoding="utf-8")
+
+    def fake_render(jobs):
+        for html_path, pdf_path in jobs:
+            calls["render"].append(html_path.name)
+            _blank_pdf(pdf_path, 2)
+
+    def fake_merge(parts, pdf_path):
+        return sum(len(PdfReader(str(p)).pages) for p in parts)
+
+    monkeypatch.setattr(chapter_build, "translate_html", fake_translate)
+    class FakeRenderer:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def render(self, jobs):
+            fake_render(jobs)
+
+    monkeypatch.setattr(chapter_build, "render_parts", fake_render)
+    monkeypatch.setattr(chapter_build, "PartRenderer", FakeRenderer)
+    monkeypatch.setattr(chapter_build, "merge_parts_with_page_numbers", fake_merge)
+
+def test_only_changed_chapter_is_rebuilt(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(chapter_build, "CACHE", tmp_path / "cache")
+    monkeypatch.setattr(chapter_build, "BUILD_MANIFEST", tmp_path / "chapters.json")
+    docs = []
+    for name in ("Dedication.docx", "Foreword.docx", "Conclusion.docx"):
+        shutil.copy(SRC / name, tmp_path / name)
+        docs.append(tmp_path / name)
+    cover = docs.pop(0)
+
+    calls = {"translate": [], "render": []}
+    _stub_stages(monkeypatch, calls)
+    first = chapter_build.run_incremental(docs, tmp_path / "out.pdf", tmp_path / "tm.sqlite",
+                                          cover_docx=cover, toc_docx=None)
+    assert len(calls["translate"]) == 3
+    # 표지 2쪽 + 본문 2쪽 x 2 (제목이 없는 원고라 전체 빌드처럼 자동 목차도 없음)
+    assert first["total_pages"] == 6
+
+    # 같은 입력으로 다시 실행하면 번역/렌더링 없음
+    calls = {"translate": [], "render": []}
+    _stub_stages(monkeypatch, calls)
+    chapter_build.run_incremental(docs, tmp_path / "out.pdf", tmp_path / "tm.sqlite",
+                                  cover_docx=cover, toc_docx=None)
+    assert calls["translate"] == [] and calls["render"] == []
+
+    # 한 챕터만 바뀌면 그 챕터만 다시 번역/렌더링
+    shutil.copy(SRC / "Acknowledgment.docx", docs[1])
+    calls = {"translate": [], "render": []}
+    _stub_stages(monkeypatch, calls)
+    second = chapter_build.run_incremental(docs, tmp_path / "out.pdf", tmp_path / "tm.sqlite",
+                                           cover_docx=cover, toc_docx=None)
+    assert len(calls["translate"]) == 1
+    assert [c["rebuilt"] for c in second["chapters"]] == [False, False, True]
+
+def test_auto_toc_matches_full_build(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(chapter_build, "CACHE", tmp_path / "cache")
+    calls = {"translate": [], "render": []}
+    _stub_stages(monkeypatch, calls)
+    bodies = ["<p>Cover</p>", "<h1>Routing</h1><p>Text</p><h2>Examples</h2>", "<h1>Memory</h1>"]
+    chapters = []
+    for i, body in enumerate(bodies):
+        ch = chapter_build.Chapter(tmp_path / f"c{i}.docx", sha256=str(i))
+        ch.en_html.parent.mkdir(parents=True, exist_ok=True)
+        ch.en_html.write_text(f"<html><body>{body}</body></html>", encoding="utf-8")
+        chapters.append(ch)
+
+    toc = chapter_build.BookToc(chapters)
+    assert toc.build(tmp_path / "tm.sqlite")
+    full = BeautifulSoup("<html><body>" + CHAPTER_BREAK.join(bodies) + "</body></html>", "lxml")
+    add_auto_toc(full)
+    # 전체 빌드의 "Contents" 앵커 목차를 그대로 번역에 보냄
+    built = BeautifulSoup(toc.en_html.read_text(encoding="utf-8"), "lxml")
+    assert str(built.find("div", class_="auto-toc")) == str(full.find("div", class_="auto-toc"))
+    assert calls["render"] == [toc.ko_html.name] and toc.pdf.exists()
+    # 제목이 바뀌지 않으면 다시 만들지 않음
+    assert chapter_build.BookToc(chapters).build(tmp_path / "tm.sqlite") and len(calls["translate"]) == 1
+
+def test_stamp_pages_overlays_each_page(tmp_path: Path):
+    content, overlay = tmp_path / "content.pdf", tmp_path / "overlay.pdf"
+    _blank_pdf(content, 3)
+    _blank_pdf(overlay, 3)
+    out = tmp_path / "out.pdf"
+    stamp_pages(list(PdfReader(str(content)).pages), overlay, out)
+    assert len(PdfReader(str(out)).pages) == 3
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import asyncio
+from pathlib import Path
+
+import translate_html_claude
+from async_engine import Limiters, RateLimiter
+from glossary import Glossary
+from usage_meter import UsageMeter
+
+CAPTION = "<p>Fig. 1: Overview of the <em>routing</em> pattern</p>"
+HTML = ("<html><body>"
+        + "".join(f"<h2>References</h2><p>Chapter {n} explains a different idea.</p>{CAPTION}"
+                  f"<p>See the  appendix for the full listing.</p>" for n in range(3))
+        + "</body></html>")
+
+def _setup(monkeypatch):
+    meter = UsageMeter()
+    monkeypatch.setattr(translate_html_claude, "USAGE", meter)
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", Glossary({}))
+    monkeypatch.setattr("async_engine.make_limiter", lambda provider: RateLimiter(10000, 10**9))
+    return meter
+
+def test_duplicates_are_translated_once_and_fanned_out(monkeypatch, fake_llm, tmp_path: Path):
+    src, out = tmp_path / "en.html", tmp_path / "ko.html"
+    src.write_text(HTML.replace("the  appendix", "the appendix", 1), encoding="utf-8")  # 공백만 다른 중복
+    server = fake_llm()
+    meter = _setup(monkeypatch)
+    translate_html_claude.translate_html(src, out, tmp_path / "tm.sqlite", concurrency=4)
+    # 고유 원문: References, 캡션, 부록 안내, 챕터 문단 3개
+    assert server.requests == 6
+
+    ko = out.read_text(encoding="utf-8")
+    assert ko.count("<h2>[KO] References</h2>") == 3
+    assert ko.count("[KO] Fig. 1: Overview of the <em>routing</em> pattern") == 3
+    assert ko.count("[KO] See the appendix") == 3
+    summary = meter.summary()
+    assert summary["counters"]["planned"] == 12 and summary["counters"]["deduplicated"] == 6
+    assert summary["dedup_ratio"] == 0.5
+
+def test_concurrent_lookups_share_one_request(monkeypatch, fake_llm):
+    server = fake_llm(latency=0.1)
+    meter = _setup(monkeypatch)
+    tm, limiters = {}, Limiters(anthropic=RateLimiter(10000, 10**9))
+
+    async def both():
+        return await asyncio.gather(
+            translate_html_claude.translate_text_chunk_async("The same caption text.", tm, limiters),
+            translate_html_claude.translate_text_chunk_async(" The same caption text.\n", tm, limiters))
+
+    assert asyncio.run(both()) == ["[KO] The same caption text."] * 2
+    assert server.requests == 1
+    assert meter.summary()["counters"]["coalesced"] == 1
+    assert not translate_html_claude._pending
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
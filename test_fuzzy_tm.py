@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+import tm_store
+import translate_html_claude
+from tm_store import SqliteTranslationMemory
+
+SOURCE = "The routing agent inspects each request and forwards it to one of 3 specialist agents."
+TARGET = "라우팅 에이전트는 각 요청을 살펴보고 3개의 전문 에이전트 중 하나로 전달합니다."
+
+def test_near_matches_small_edits_only(tmp_path: Path):
+    tm = SqliteTranslationMemory(tmp_path / "tm.sqlite", model="m", prompt_version="p")
+    tm[SOURCE] = TARGET
+
+    same = tm.near("the  routing agent inspects each request and forwards it to one of 3 specialist agents.", 0.85)
+    assert same is not None and same.score == 1.0 and same.target == TARGET
+
+    edited = tm.near(SOURCE.replace("3", "4").replace("inspects", "checks"), 0.85)
+    assert edited is not None and 0.85 <= edited.score < 1.0
+
+    assert tm.near("Memory lets an agent keep state between separate conversations.", 0.85) is None
+    assert tm.near("Routing agent", 0.5) is None  # 짧은 문장은 정확 일치만
+    tm.close()
+
+def test_candidates_with_most_shared_buckets_come_first(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(tm_store, "MAX_FUZZY_CANDIDATES", 1)
+    tm = SqliteTranslationMemory(tmp_path / "tm.sqlite", model="m", prompt_version="p")
+    # 먼저 들어간 덜 비슷한 항목이 후보 한도를 차지하지 않아야 함
+    words = SOURCE.split()
+    for i in range(len(words)):
+        tm[" ".join(words[:i] + ["many"] + words[i + 1:])] = f"variant {i}"
+    tm[SOURCE] = TARGET
+    assert tm.near(SOURCE, 0.85).target == TARGET
+    tm.close()
+
+def test_entries_written_without_index_are_indexed_on_open(tmp_path: Path):
+    db = tmp_path / "tm.sqlite"
+    plain = SqliteTranslationMemory(db, model="m", prompt_version="p", fuzzy=False)
+    plain[SOURCE] = TARGET
+    plain.close()
+
+    tm = SqliteTranslationMemory(db, model="m", prompt_version="p")
+    assert tm.near(SOURCE.replace("one of", "any of"), 0.85).target == TARGET
+    tm.close()
+
+def test_near_match_becomes_revision_request(tmp_path: Path):
+    tm = SqliteTranslationMemory(tmp_path / "tm.sqlite", model="m", prompt_version="p")
+    tm[SOURCE] = TARGET
+
+    reused, params = translate_html_claude._request_for(SOURCE.upper(), tm)
+    assert reused == TARGET and params is None
+
+    revised = SOURCE.replace("3", "5")
+    reused, params = translate_html_claude._request_for(revised, tm)
+    content = params["messages"][0]["content"]
+    assert reused is None
+    assert TARGET in content and content.endswith("New source:\n" + revised)
+
+    reused, params = translate_html_claude._request_for("Something completely different happens here today.", tm)
+    assert reused is None and "Previous translation" not in params["messages"][0]["content"]
+    tm.close()
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
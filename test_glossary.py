@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import translate_html_claude
+from async_engine import Limiters, RateLimiter
+from glossary import AhoCorasick, Glossary
+from segmenter import Segment
+
+GLOSSARY = Glossary({"agent": ["에이전트"], "agentic": ["에이전트형"], "tool": ["도구"]})
+
+def test_automaton_finds_overlapping_patterns():
+    ac = AhoCorasick(["he", "she", "his", "hers"])
+    found = sorted((s, e, ac.patterns[i]) for s, e, i in ac.finditer("uSHErs his"))
+    assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers"), (7, 10, "his")]
+
+def test_missing_terms_respect_word_boundaries():
+    source = "Agentic systems give each agent two tools, not a toolkit."
+    assert GLOSSARY.source_terms(source) == ["agentic", "agent", "tool"]
+    assert GLOSSARY.missing_terms(source, "에이전트형 시스템은 각 에이전트에게 도구 두 개를 줍니다.") == []
+    assert GLOSSARY.missing_terms(source, "agentic 시스템은 각 agent에게 tool 두 개를 줍니다.") == \
+        ["agentic", "agent", "tool"]
+    # 번역이 없거나 원문을 그대로 둔(코드 등) 쌍은 검사하지 않음
+    assert GLOSSARY.violations([(source, None), (source, source), (source, "도구")]) == {2: ["agentic", "agent"]}
+
+class FakeMessages:
+    def __init__(self):
+        self.prompts = []
+
+    async def create(self, **params):
+        self.prompts.append(params["messages"][0]["content"])
+        return SimpleNamespace(content=[SimpleNamespace(text="에이전트가 도구를 부릅니다.")])
+
+def test_only_violating_segments_are_requeued(monkeypatch, tmp_path: Path):
+    fake = FakeMessages()
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", GLOSSARY)
+    monkeypatch.setattr(translate_html_claude.async_client, "messages", fake)
+    segments = [Segment(None, "The agent calls a tool."), Segment(None, "The agent waits.")]
+    tm = {}
+
+    texts = asyncio.run(translate_html_claude._enforce_glossary(
+        segments, ["agent가 tool을 부릅니다.", "에이전트가 기다립니다."], tm, Limiters(anthropic=RateLimiter(6000, 10 ** 9)), 2
+    ))
+
+    assert texts == ["에이전트가 도구를 부릅니다.", "에이전트가 기다립니다."]
+    assert len(fake.prompts) == 1 and "agent → 에이전트; tool → 도구" in fake.prompts[0]
+    assert tm == {"The agent calls a tool.": "에이전트가 도구를 부릅니다."}
+
+def test_tm_hits_are_not_rechecked(monkeypatch):
+    fake = FakeMessages()
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", GLOSSARY)
+    monkeypatch.setattr(translate_html_claude.async_client, "messages", fake)
+    segments = [Segment(None, "The agent calls a tool."), Segment(None, "The tool answers the agent.")]
+    # 이전 빌드에서 고치지 못한 위반이 TM에 남아 있어도 다시 요청하지 않음
+    tm = {"The agent calls a tool.": "agent가 tool을 부릅니다."}
+
+    texts = asyncio.run(translate_html_claude._translate_all(segments, tm, 2))
+
+    assert texts == ["agent가 tool을 부릅니다.", "에이전트가 도구를 부릅니다."]
+    assert len(fake.prompts) == 1  # 새로 번역한 세그먼트 하나뿐, 용어 재번역 없음
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import translate_html_claude
+from html_stream import iter_html_parts, iter_soup_parts
+
+HTML = """<html><head><meta charset="utf-8"/><title>Book</title></head><body>
+<h1>Chapter One</h1>
+<p>An <strong>agent</strong> calls <code>route(x)</code> and waits.</p>between blocks
+<ul><li>First item</li><li>Second <em>item</em></li></ul>
+<pre>def run(): pass</pre>
+<table><tr><td>Cell text here</td></tr></table>
+<p>Last paragraph of the chapter.</p>
+</body></html>"""
+
+async def _fake_translate_languages(segments, targets, concurrency, context="", limiters=None):
+    return {lang: ["KO " + seg.source for seg in segments] for lang in targets}
+
+def test_blocks_round_trip_like_full_parse(tmp_path: Path):
+    src = tmp_path / "in.html"
+    src.write_text(HTML, encoding="utf-8")
+    parts = list(iter_html_parts(src))
+    assert parts[0][0] == "open" and parts[-1] == ("close", "</body></html>")
+    assert "".join(text for _, text in parts) == str(BeautifulSoup(HTML, "lxml"))
+
+def test_soup_parts_match_file_parts(tmp_path: Path):
+    for html in (HTML, "<!DOCTYPE html><html lang='ko'><body class='a b'>t &lt; u<p>x</p>tail<!-- c --></body></html>"):
+        soup = BeautifulSoup(html, "lxml")
+        src = tmp_path / "in.html"
+        src.write_text(str(soup), encoding="utf-8")
+        assert list(iter_soup_parts(soup)) == list(iter_html_parts(src))
+
+def test_streaming_output_matches_full_translation(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(translate_html_claude, "_translate_languages", _fake_translate_languages)
+    src = tmp_path / "in.html"
+    src.write_text(HTML, encoding="utf-8")
+
+    translate_html_claude.translate_html(src, tmp_path / "full.html", tmp_path / "tm.sqlite")
+    translate_html_claude.translate_html_streaming(src, tmp_path / "stream.html", tmp_path / "tm.sqlite",
+                                                   window_chars=60)
+
+    full = (tmp_path / "full.html").read_text(encoding="utf-8")
+    assert "KO Chapter One" in full and "def run(): pass" in full
+    assert (tmp_path / "stream.html").read_text(encoding="utf-8") == full
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import html_to_pdf
+from merge_to_html import CHAPTER_BREAK
+
+def _book(tmp_path: Path) -> Path:
+    chapters = [f"<p>Chapter {i} {'text ' * (i * 10)}</p><p><img src=\"images/{i}.png\"/></p>" for i in range(4)]
+    path = tmp_path / "master_ko.html"
+    path.write_text('<html><head><meta charset="utf-8"/></head><body>'
+                    + CHAPTER_BREAK.join(chapters) + "</body></html>", encoding="utf-8")
+    return path
+
+def test_split_at_chapter_breaks_keeps_all_content(tmp_path: Path):
+    book = _book(tmp_path)
+    chunks = html_to_pdf.split_html_by_chapter(book, tmp_path)
+    assert len(chunks) == 4
+    assert all(c.parent == book.parent for c in chunks)  # 이미지 상대 경로 유지
+
+    bodies = [BeautifulSoup(c.read_text(encoding="utf-8"), "lxml") for c in chunks]
+    assert all(b.head.meta["charset"] == "utf-8" for b in bodies)
+    joined = "".join("".join(str(x) for x in b.body.contents) for b in bodies)
+    assert joined == "".join(str(x) for x in BeautifulSoup(book.read_text(encoding="utf-8"), "lxml").body.contents)
+
+    # 짧은 챕터는 묶임
+    assert len(html_to_pdf.split_html_by_chapter(book, tmp_path, min_chars=300)) == 2
+
+def test_chunks_are_rendered_and_numbered_as_one_book(monkeypatch, tmp_path: Path):
+    calls = {}
+
+    def fake_render(jobs, workers):
+        calls["render"] = ([h.name for h, _ in jobs], workers)
+        for _, pdf in jobs:
+            pdf.write_bytes(b"%PDF")
+
+    def fake_merge(parts, pdf_path):
+        calls["merge"] = [p.name for p in parts]
+        return 7
+
+    monkeypatch.setattr(html_to_pdf, "render_parts", fake_render)
+    monkeypatch.setattr(html_to_pdf, "merge_parts_with_page_numbers", fake_merge)
+    book = _book(tmp_path)
+
+    assert html_to_pdf.html_to_pdf_chunked(book, tmp_path / "out" / "book.pdf", workers=3, min_chars=0) == 7
+    assert calls["render"] == ([f"master_ko.part{i:03d}.html" for i in range(4)], 3)
+    assert calls["merge"] == [f"master_ko.part{i:03d}.pdf" for i in range(4)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["master_ko.html", "out"]  # 임시 파일 정리
+
+def test_soup_is_chunked_like_the_written_file(monkeypatch, tmp_path: Path):
+    rendered = {}
+
+    def fake_render(jobs, workers):
+        for html, pdf in jobs:
+            rendered[html.name] = html.read_text(encoding="utf-8")
+            pdf.write_bytes(b"%PDF")
+
+    monkeypatch.setattr(html_to_pdf, "render_parts", fake_render)
+    monkeypatch.setattr(html_to_pdf, "merge_parts_with_page_numbers", lambda parts, pdf_path: len(parts))
+    book = _book(tmp_path)
+    html_to_pdf.html_to_pdf_chunked(book, tmp_path / "file.pdf", min_chars=0)
+    from_file = dict(rendered)
+    rendered.clear()
+
+    soup = BeautifulSoup(book.read_text(encoding="utf-8"), "lxml")
+    book.unlink()
+    assert html_to_pdf.soup_to_pdf_chunked(soup, tmp_path / "mem.pdf", tmp_path, "master_ko", min_chars=0) == 4
+    assert rendered == from_file
+    assert not list(tmp_path.glob("*.html"))
+
+class FakePlaywright:
+    """브라우저 실행 횟수와 렌더링한 파일을 기록하는 async_playwright 대용"""
+
+    def __init__(self, log: dict):
+        self.log = log
+        self.chromium = self
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.log["stopped"] = True
+
+    async def launch(self):
+        self.log["launches"] += 1
+        return self
+
+    async def new_context(self):
+        return self
+
+    async def new_page(self):
+        return self
+
+    async def goto(self, url):
+        self.url = url
+
+    async def pdf(self, path, **options):
+        self.log["pages"].append(Path(path).name)
+
+    async def close(self):
+        pass
+
+def test_part_renderer_launches_browser_once_across_batches(monkeypatch, tmp_path: Path):
+    log = {"launches": 0, "pages": []}
+    monkeypatch.setattr(html_to_pdf, "async_playwright", lambda: FakePlaywright(log))
+    monkeypatch.setattr(html_to_pdf, "running_daemon", lambda: None)
+    with html_to_pdf.PartRenderer(workers=2) as renderer:
+        for batch in (["a"], ["b", "c"]):
+            renderer.render([(tmp_path / f"{n}.html", tmp_path / f"{n}.pdf") for n in batch])
+    assert log["launches"] == 1 and sorted(log["pages"]) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert log["stopped"]
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from asset_store import AssetStore, rebase_image_refs
+from merge_to_html import CHAPTER_BREAK, book_sources, chapters_to_html, master_docx_to_html, merge_docx_in_order
+
+SRC = Path(__file__).parent
+
+def test_parallel_chapters_match_merged_docx(tmp_path: Path):
+    files = [SRC / "Dedication.docx", SRC / "Foreword.docx", SRC / "Conclusion.docx"]
+    cover = files.pop(0)
+
+    merged, auto_toc = merge_docx_in_order(files, tmp_path / "master.docx", cover_docx=cover)
+    master_docx_to_html(merged, tmp_path / "merged.html", auto_toc, image_dir=tmp_path / "images")
+
+    sources, insert_auto_toc = book_sources(files, tmp_path, cover_docx=cover)
+    assert insert_auto_toc == auto_toc
+    chapters_to_html(sources, tmp_path / "parallel.html", insert_auto_toc, workers=2,
+                     image_dir=tmp_path / "images")
+
+    # 레이아웃에 영향이 없는 챕터 경계 표시만 빼면 병합 방식과 같음
+    parallel = (tmp_path / "parallel.html").read_text(encoding="utf-8")
+    assert parallel.count(CHAPTER_BREAK) == len(sources) - 1
+    assert parallel.replace(CHAPTER_BREAK, "") == (tmp_path / "merged.html").read_text(encoding="utf-8")
+    assert "style" not in BeautifulSoup(CHAPTER_BREAK, "lxml").div.attrs
+
+def test_images_are_stored_once_and_referenced_relatively(tmp_path: Path):
+    html_dir = tmp_path / "cache" / "en"
+    store = AssetStore(tmp_path / "images", target_dpi=0)
+    paths = [store.put(b"\x89PNG fake image bytes", "image/png") for _ in range(2)]
+    srcs = [store.ref(path, html_dir) for path in paths]
+    assert srcs[0] == srcs[1] and srcs[0].startswith("../../images/")
+    assert len(list((tmp_path / "images").iterdir())) == 1
+    assert (html_dir / srcs[0]).resolve().read_bytes() == b"\x89PNG fake image bytes"
+
+    # 다른 위치의 HTML로 옮겨도 같은 파일을 가리킴 (data URI는 그대로)
+    soup = BeautifulSoup(f'<p><img src="{srcs[0]}"/><img src="data:image/png;base64,AAAA"/></p>', "lxml")
+    rebase_image_refs(soup, html_dir, tmp_path)
+    assert [img["src"] for img in soup.find_all("img")] == \
+        ["images/" + Path(srcs[0]).name, "data:image/png;base64,AAAA"]
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import anthropic
+
+from fake_llm_server import FakeLLMServer
+from metrics import RunReport, prometheus_text
+from usage_meter import UsageMeter, http_event_hooks
+
+def test_stage_report_and_textfile(tmp_path: Path):
+    report = RunReport()
+    with report.stage("convert") as st:
+        data = bytearray(8 << 20)  # 최대 RSS에 잡히도록 8MB 할당
+        sum(i * i for i in range(1000000))  # os.times 해상도(10ms)보다 길게
+        st["bytes_out"] = len(data)
+    usage = UsageMeter()
+    usage.record(SimpleNamespace(usage=SimpleNamespace(input_tokens=10, output_tokens=5,
+                                                       cache_read_input_tokens=30)),
+                 latency_s=0.2, retries=1, bytes_in=100, bytes_out=40)
+    usage.count("tm_hit", 3)
+    usage.count("tm_miss")
+
+    path = report.write_json(tmp_path / "reports", usage.summary())
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    stage = saved["stages"][0]
+    assert stage["stage"] == "convert" and stage["bytes_out"] == 8 << 20
+    assert stage["wall_s"] >= 0 and stage["cpu_s"] > 0 and stage["peak_rss_bytes"] >= 8 << 20
+    assert saved["llm"]["retries"] == 1 and saved["llm"]["counters"] == {"tm_hit": 3, "tm_miss": 1}
+
+    text = prometheus_text(saved)
+    assert '# TYPE adp_stage_wall_seconds gauge' in text
+    assert 'adp_stage_output_bytes{run="build",stage="convert"} 8388608' in text
+    assert 'adp_llm_tokens{run="build",type="cache_read"} 30' in text
+    assert 'adp_segments{run="build",result="tm_hit"} 3' in text
+    assert 'adp_llm_cache_hit_ratio{run="build"} 0.75' in text
+
+def test_track_counts_sdk_retries_and_latency():
+    meter = UsageMeter()
+    with FakeLLMServer(min_cacheable_tokens=0) as server:
+        server.fail_next = 1
+        client = anthropic.Anthropic(api_key="test", base_url=server.base_url,
+                                     http_client=anthropic.DefaultHttpxClient(event_hooks=http_event_hooks()))
+        params = {"model": "m", "max_tokens": 100, "system": "Translate.",
+                  "messages": [{"role": "user", "content": "Translate:\n\nHello there."}]}
+        with meter.track(params) as call:
+            call.response = client.messages.create(**params)
+
+    entry = meter.calls[0]
+    assert entry["retries"] == 1 and entry["error"] is None and entry["latency_s"] > 0
+    assert entry["bytes_in"] == len("Translate.") + len("Translate:\n\nHello there.")
+    assert entry["bytes_out"] == len("[KO] Hello there.")
+    assert server.requests == 1
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
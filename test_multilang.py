@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+import pytest
+
+import translate_html_claude
+from async_engine import RateLimiter
+from glossary import Glossary
+from usage_meter import UsageMeter
+
+HTML = ("<html><body><h1>Routing</h1>"
+        + "".join(f"<p>Paragraph {n} sends the <em>request</em> onward.</p>" for n in range(4))
+        + "<pre>print('keep me')</pre></body></html>")
+
+def test_one_parse_fans_out_to_each_language(monkeypatch, fake_llm, tmp_path: Path):
+    monkeypatch.setattr(translate_html_claude, "USAGE", UsageMeter())
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", Glossary({}))
+    monkeypatch.setattr("async_engine.make_limiter", lambda provider: RateLimiter(10000, 10**9))
+    src, out, tm = tmp_path / "master_en.html", tmp_path / "master_ko.html", tmp_path / "tm.sqlite"
+    src.write_text(HTML, encoding="utf-8")
+
+    server = fake_llm()
+    translate_html_claude.translate_html(src, out, tm, concurrency=4, languages=["ko", "ja"])
+    assert server.requests == 2 * 5
+    # 다시 돌리면 언어별 TM에서 모두 찾음
+    translate_html_claude.translate_html(src, out, tm, concurrency=4, languages=["ko", "ja"])
+    assert server.requests == 2 * 5
+
+    ko = out.read_text(encoding="utf-8")
+    ja = (tmp_path / "master_ja.html").read_text(encoding="utf-8")
+    assert "[KO] Routing" in ko and "[JA]" not in ko
+    assert "[JA] Routing" in ja and "[KO]" not in ja
+    assert ja.count("<em>request</em>") == 4 and "print('keep me')" in ja
+    assert (tmp_path / "tm_ja.sqlite").exists()
+    assert not list(tmp_path.glob("*.journal.jsonl"))
+
+def test_unknown_language_is_rejected(tmp_path: Path):
+    with pytest.raises(ValueError):
+        translate_html_claude.translate_html(tmp_path / "in.html", tmp_path / "out.html",
+                                             tmp_path / "tm.sqlite", languages=["xx"])
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import asyncio
+
+import anthropic
+
+import translate_html_claude
+from async_engine import RateLimiter
+from fake_llm_server import FakeLLMServer
+from glossary import Glossary
+from providers import AnthropicProvider
+from segmenter import Segment
+from usage_meter import UsageMeter
+
+def _translate(texts, context):
+    segments = [Segment(None, text) for text in texts]
+    return asyncio.run(translate_html_claude._translate_all(segments, {}, 1, context))
+
+def test_stable_prefix_is_written_once_then_read(monkeypatch, fake_llm):
+    meter = UsageMeter()
+    monkeypatch.setattr(translate_html_claude, "USAGE", meter)
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", Glossary({"agent": ["에이전트"]}))
+    monkeypatch.setattr("async_engine.make_limiter", lambda provider: RateLimiter(10000, 10**9))
+
+    fake_llm(min_cacheable_tokens=0)
+    texts = ["The first paragraph explains routing.", "The second one covers memory.",
+             "The third one is about planning."]
+    assert _translate(texts, "Chapter 1: Routing") == ["[KO] " + t for t in texts]
+    # 다른 챕터: 공통 앞부분(시스템 프롬프트 + 용어집)은 읽고, 챕터 맥락만 새로 씀
+    _translate(["A paragraph in the next chapter."], "Chapter 2: Memory")
+
+    first, second, third, other = meter.calls
+    assert first["cache_read_input_tokens"] == 0 and first["cache_creation_input_tokens"] > 0
+    for call in (second, third):
+        assert call["cache_read_input_tokens"] == first["cache_creation_input_tokens"]
+        assert call["cache_creation_input_tokens"] == 0
+    assert 0 < other["cache_read_input_tokens"] < first["cache_creation_input_tokens"]
+    assert other["cache_creation_input_tokens"] > 0
+
+    summary = meter.summary()
+    assert summary["calls"] == 4 and summary["cache_hit_calls"] == 3
+    assert summary["cache_hit_rate"] > 0.5
+
+def test_request_marks_system_prompt_and_glossary_for_caching(monkeypatch):
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", Glossary({"agent": ["에이전트"]}))
+    system = translate_html_claude.build_request_params("An agent waits.")["system"]
+    assert len(system) == 1 and system[0]["cache_control"] == {"type": "ephemeral"}
+    assert system[0]["text"].startswith(translate_html_claude.SYSTEM_PROMPT)
+    assert "- agent → 에이전트" in system[0]["text"]
+
+def test_short_prefix_is_not_cached():
+    with FakeLLMServer(min_cacheable_tokens=10**6) as server:
+        client = anthropic.Anthropic(api_key="test", base_url=server.base_url)
+        params = AnthropicProvider.messages_params(
+            translate_html_claude.build_request_params("Some paragraph to translate."))
+        usages = [client.messages.create(**params).usage for _ in range(2)]
+    assert all(u.cache_read_input_tokens == u.cache_creation_input_tokens == 0 for u in usages)
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+import translate_html_claude
+from async_engine import Limiters, RateLimiter
+from providers import (AnthropicProvider, CircuitBreaker, Completion, OpenAIProvider, Provider,
+                       ProviderRouter, TranslationFailed, failure_report_path)
+from segmenter import Segment
+
+PARAMS = {"model": "m", "max_tokens": 100, "system": [{"type": "text", "text": "sys"}],
+          "messages": [{"role": "user", "content": "Translate:\n\nHello"}]}
+
+class StatusError(anthropic.APIStatusError):
+    def __init__(self, status_code: int):
+        response = SimpleNamespace(status_code=status_code, request=None, headers={})
+        super().__init__(f"HTTP {status_code}", response=response, body=None)
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(10000, 10**9)
+        self.acquired = 0
+
+    async def acquire(self, tokens: int = 0) -> None:
+        self.acquired += 1
+        await super().acquire(tokens)
+
+class ScriptedProvider(Provider):
+    """정해 둔 순서대로 오류를 던지거나 (지연 후) 응답하는 공급자"""
+
+    def __init__(self, name: str, script):
+        super().__init__(None, name)
+        self.name = name
+        self.script = list(script)
+        self.calls = 0
+
+    async def complete(self, params):
+        self.calls += 1
+        step = self.script.pop(0) if self.script else 0.0
+        if isinstance(step, Exception):
+            raise step
+        await asyncio.sleep(step)
+        return Completion(f"{self.name}:{self.calls}", None, self.name)
+
+def _router(*providers, **kwargs):
+    kwargs.setdefault("base_delay", 0.001)
+    return ProviderRouter(list(providers), **kwargs)
+
+def _run(router):
+    return asyncio.run(router.complete(PARAMS, Limiters(anthropic=RateLimiter(10000, 10**9))))
+
+def test_retries_transient_errors_then_succeeds():
+    primary = ScriptedProvider("anthropic", [StatusError(429), StatusError(503)])
+    assert _run(_router(primary)).text == "anthropic:3"
+
+def test_client_errors_fail_over_without_retrying(monkeypatch):
+    monkeypatch.setattr("async_engine.make_limiter", lambda name: RateLimiter(10000, 10**9))
+    primary = ScriptedProvider("anthropic", [StatusError(400)])
+    backup = ScriptedProvider("openai", [])
+    result = _run(_router(primary, backup))
+    assert (result.provider, primary.calls, backup.calls) == ("openai", 1, 1)
+
+def test_failover_limiters_belong_to_the_run(monkeypatch):
+    monkeypatch.setattr("async_engine.make_limiter", lambda name: RateLimiter(10000, 10**9))
+    router = _router(ScriptedProvider("anthropic", [StatusError(400)] * 2), ScriptedProvider("openai", []))
+    runs = [Limiters(), Limiters()]
+    for limiters in runs:
+        asyncio.run(router.complete(PARAMS, limiters))
+    # 실행마다 자기 맵에 리미터가 생기고 라우터에는 남지 않음 (끝난 루프를 붙잡지 않음)
+    assert set(runs[0]) == {"anthropic", "openai"} and runs[0]["openai"] is not runs[1]["openai"]
+    assert not hasattr(router, "_limiters")
+
+def test_non_api_errors_are_raised_not_failed_over(monkeypatch):
+    monkeypatch.setattr("async_engine.make_limiter", lambda name: RateLimiter(10000, 10**9))
+    primary = ScriptedProvider("anthropic", [TypeError("unexpected keyword argument 'temperature'")])
+    backup = ScriptedProvider("openai", [])
+    with pytest.raises(TypeError):
+        _run(_router(primary, backup))
+    assert (primary.calls, backup.calls) == (1, 0) and primary.breaker.state == "closed"
+
+def test_breaker_opens_and_skips_provider(monkeypatch):
+    monkeypatch.setattr("async_engine.make_limiter", lambda name: RateLimiter(10000, 10**9))
+    primary = ScriptedProvider("anthropic", [StatusError(500)] * 10)
+    primary.breaker = CircuitBreaker(failures=2, reset_after=60)
+    backup = ScriptedProvider("openai", [])
+    router = _router(primary, backup, max_attempts=5)
+
+    assert _run(router).provider == "openai"
+    assert primary.calls == 2 and primary.breaker.state == "open"
+    # 열려 있는 동안에는 시도조차 하지 않음
+    assert _run(router).provider == "openai" and primary.calls == 2
+
+    with pytest.raises(TranslationFailed) as info:
+        _run(_router(primary))
+    assert info.value.errors == [("anthropic", "circuit open")]
+
+def test_breaker_half_open_allows_one_trial():
+    breaker = CircuitBreaker(failures=1, reset_after=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_hedge_returns_faster_duplicate():
+    slow_then_fast = ScriptedProvider("anthropic", [1.0, 0.0])
+    router = _router(slow_then_fast, hedge_after=0.05)
+    limiter = CountingLimiter()
+    result, elapsed = asyncio.run(_timed(router, limiter))
+    assert result.text == "anthropic:2" and elapsed < 0.5
+    assert limiter.acquired == 2  # 추가 요청도 속도 제한 예산을 받음
+
+async def _timed(router, limiter):
+    start = asyncio.get_running_loop().time()
+    result = await router.complete(PARAMS, Limiters(anthropic=limiter))
+    return result, asyncio.get_running_loop().time() - start
+
+def test_cancelled_caller_cancels_request_before_hedge():
+    started, cancelled = asyncio.Event(), []
+
+    class Hanging(ScriptedProvider):
+        async def complete(self, params):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+    async def main():
+        router = _router(Hanging("anthropic", []), hedge_after=5)
+        task = asyncio.ensure_future(router.complete(PARAMS, Limiters(anthropic=RateLimiter(10000, 10**9))))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        # asyncio.run의 정리 단계가 아니라 취소 시점에 이미 끊겨 있어야 함
+        assert cancelled == [True]
+
+    asyncio.run(main())
+
+def test_chat_params_move_system_into_messages():
+    chat = OpenAIProvider.chat_params({**PARAMS, "temperature": 0.1})
+    assert chat["messages"][0] == {"role": "system", "content": "sys"}
+    assert chat["temperature"] == 0.1 and "system" not in chat
+    # 현재 anthropic SDK는 temperature 인자를 받지 않음
+    assert "temperature" not in AnthropicProvider.messages_params({**PARAMS, "temperature": 0.1})
+
+def test_failed_segments_are_reported_not_passed_through(monkeypatch, tmp_path: Path):
+    down = ScriptedProvider("anthropic", [StatusError(503)] * 10)
+    monkeypatch.setattr(translate_html_claude, "ROUTER", _router(down, max_attempts=2))
+    monkeypatch.setattr(translate_html_claude, "untranslated", [])
+    text = "The agent explains how routing works in practice."
+    tm = {}
+    result = asyncio.run(translate_html_claude.translate_text_chunk_async(
+        text, tm, Limiters(anthropic=RateLimiter(10000, 10**9)), validate=Segment(None, text).accepts))
+    assert result is None and text not in tm
+    assert "StatusError(503)" in translate_html_claude.failed_segments[text]
+
+    translate_html_claude._record_untranslated([text])
+    translate_html_claude.write_failure_report(tmp_path / "out.html", translate_html_claude.untranslated)
+    report = failure_report_path(tmp_path / "out.html").read_text(encoding="utf-8")
+    assert "StatusError(503)" in report and "routing works" in report
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
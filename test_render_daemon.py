@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+
+import html_to_pdf
+from render_daemon import RenderClient, RenderService, serve
+
+class FakePage:
+    def __init__(self, log):
+        self.log = log
+
+    async def goto(self, url):
+        self.url = url
+
+    async def pdf(self, path, **options):
+        self.log.append(self.url)
+        Path(path).write_text(json.dumps(options), encoding="utf-8")
+
+class FakeContext:
+    def __init__(self, log):
+        self.log = log
+
+    async def new_page(self):
+        return FakePage(self.log)
+
+    async def close(self):
+        pass
+
+class FakeBrowser:
+    def __init__(self):
+        self.log = []
+        self.contexts = 0
+
+    async def new_context(self):
+        self.contexts += 1
+        return FakeContext(self.log)
+
+def _start_daemon(sock: Path, service: RenderService, browser) -> threading.Thread:
+    thread = threading.Thread(target=lambda: asyncio.run(serve(service, browser, sock)), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if RenderClient(sock).is_running():
+            return thread
+        time.sleep(0.02)
+    raise RuntimeError("daemon did not start")
+
+def test_jobs_go_through_warm_daemon_and_pages_are_recycled(monkeypatch, tmp_path: Path):
+    sock = tmp_path / "render.sock"
+    browser = FakeBrowser()
+    service = RenderService(workers=1, recycle_after=2, pdf_defaults={"format": "A4"})
+    thread = _start_daemon(sock, service, browser)
+    client = RenderClient(sock)
+    monkeypatch.setattr(html_to_pdf, "running_daemon", lambda: client)
+
+    jobs = []
+    for i in range(5):
+        (tmp_path / f"c{i}.html").write_text(f"<p>{i}</p>", encoding="utf-8")
+        jobs.append((tmp_path / f"c{i}.html", tmp_path / f"c{i}.pdf"))
+    html_to_pdf.render_parts(jobs)
+
+    options = json.loads((tmp_path / "c4.pdf").read_text(encoding="utf-8"))
+    assert options == {"format": "A4", **html_to_pdf.PART_PDF_OPTIONS}
+    assert sorted(browser.log) == sorted((tmp_path / f"c{i}.html").as_uri() for i in range(5))
+    assert browser.contexts == 3  # 2건마다 새 페이지
+
+    stats = asyncio.run(client.stats())
+    assert stats["completed"] == 5 and stats["recycled"] == 2
+    assert stats["queue_depth"] == 0 and stats["latency_p50_s"] is not None
+
+    asyncio.run(client.request({"op": "stop"}))
+    thread.join(timeout=5)
+    assert not sock.exists() and not client.is_running()
+
+def test_failed_page_creation_fails_the_job_not_the_worker(tmp_path: Path):
+    class FlakyBrowser(FakeBrowser):
+        async def new_context(self):
+            if self.contexts == 0:
+                self.contexts += 1
+                raise RuntimeError("browser busy")
+            return await super().new_context()
+
+    async def scenario():
+        browser = FlakyBrowser()
+        service = RenderService(workers=1, recycle_after=10)
+        service.start(browser)
+        (tmp_path / "a.html").write_text("<p>a</p>", encoding="utf-8")
+        try:
+            first = await asyncio.wait_for(
+                asyncio.gather(service.render(str(tmp_path / "a.html"), str(tmp_path / "a.pdf"), {}),
+                               return_exceptions=True), 5)
+            await asyncio.wait_for(service.render(str(tmp_path / "a.html"), str(tmp_path / "b.pdf"), {}), 5)
+        finally:
+            await service.stop()
+        return first[0], service.counters
+
+    error, counters = asyncio.run(scenario())
+    assert isinstance(error, RuntimeError) and str(error) == "browser busy"
+    assert counters["failed"] == 1 and counters["completed"] == 1 and (tmp_path / "b.pdf").exists()
+
+def test_unresponsive_daemon_counts_as_not_running(tmp_path: Path):
+    sock = tmp_path / "render.sock"
+    ready, release = threading.Event(), threading.Event()
+
+    async def silent(reader, writer):
+        # 연결만 받고 응답하지 않는 (멈춘) 데몬
+        await asyncio.get_running_loop().run_in_executor(None, release.wait)
+        writer.close()
+
+    async def serve_silently():
+        server = await asyncio.start_unix_server(silent, path=str(sock))
+        ready.set()
+        async with server:
+            await asyncio.get_running_loop().run_in_executor(None, release.wait)
+
+    thread = threading.Thread(target=lambda: asyncio.run(serve_silently()), daemon=True)
+    thread.start()
+    ready.wait(5)
+    try:
+        start = time.perf_counter()
+        assert not RenderClient(sock, probe_timeout=0.1).is_running()
+        assert time.perf_counter() - start < 2
+    finally:
+        release.set()
+        thread.join(timeout=5)
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+from bs4 import BeautifulSoup
+
+from segmenter import build_segments, markers_match
+from translate_html_claude import extract_translatable_texts
+
+HTML = """<html><body>
+<h2>Routing</h2>
+<p>An <strong>agent</strong> calls <code>route(x)</code> and follows <a href="#r">the <em>router</em> link</a>.</p>
+<ul><li>Outer item text here<ul><li>Inner <b>bold</b> item</li></ul></li></ul>
+<table><tr><td>Plain cell with <i>style</i> words</td></tr></table>
+</body></html>"""
+
+def _segments():
+    soup = BeautifulSoup(HTML, "lxml")
+    return soup, build_segments(extract_translatable_texts(soup))
+
+def test_blocks_become_single_units_with_placeholders():
+    _, segments = _segments()
+    sources = [seg.source for seg in segments]
+    assert sources == [
+        "Routing",
+        "An <g1>agent</g1> calls <x2/> and follows <g3>the <g4>router</g4> link</g3>.",
+        "Outer item text here",  # 안쪽에 목록이 있는 li는 텍스트 노드 단위
+        "Inner <g1>bold</g1> item",
+        "Plain cell with <g1>style</g1> words",
+    ]
+    assert [seg.kind for seg in segments] == ["text", "block", "text", "block", "block"]
+
+def test_translation_is_restored_into_original_structure():
+    soup, segments = _segments()
+    para = segments[1]
+    assert para.apply("<x2/>를 호출하는 <g1>에이전트</g1>는 <g3><g4>라우터</g4> 링크</g3>를 따릅니다.")
+    p = soup.find("p")
+    assert str(p) == (
+        '<p><code>route(x)</code>를 호출하는 <strong>에이전트</strong>는 '
+        '<a href="#r"><em>라우터</em> 링크</a>를 따릅니다.</p>'
+    )
+
+def test_broken_placeholders_are_rejected():
+    source = "An <g1>agent</g1> calls <x2/>."
+    assert not markers_match(source, "<g1>에이전트</g1>가 호출합니다.")          # x2 누락
+    assert not markers_match(source, "<g1>에이전트 <x2/>를 호출</g1></g1>")      # 중복 닫힘
+    assert not markers_match("<g1>a <g2>b</g2></g1>", "<g1>a <g2>b</g1></g2>")  # 잘못된 중첩
+
+    soup, segments = _segments()
+    before = str(soup)
+    assert not segments[1].apply("깨진 번역 <g1>에이전트")
+    assert str(soup) == before
+
+def test_revert_restores_source_for_next_language():
+    soup, segments = _segments()
+    before = str(soup)
+    translations = ["라우팅", "<x2/>를 호출하는 <g1>에이전트</g1>는 <g3><g4>라우터</g4> 링크</g3>를 따릅니다.",
+                    "바깥 항목", "안쪽 <g1>굵은</g1> 항목", "<g1>스타일</g1> 단어가 있는 셀"]
+    assert all(seg.apply(text) for seg, text in zip(segments, translations))
+    assert str(soup) != before
+    for seg in reversed(segments):
+        seg.revert()
+    assert str(soup) == before
+    # 되돌린 뒤에도 같은 세그먼트에 다른 번역을 다시 반영할 수 있음
+    assert segments[1].apply("<g1>エージェント</g1>は<x2/>を呼び<g3><g4>ルーター</g4>リンク</g3>に従います。")
+    assert "<strong>エージェント</strong>" in str(soup.find("p"))
+
+def test_revert_keeps_preserved_elements_in_place():
+    soup = BeautifulSoup("<p>Start <strong>see <img/> the figure<br/> then the end</strong> finally.</p>", "lxml")
+    before = str(soup)
+    (seg,) = build_segments(extract_translatable_texts(soup))
+    assert seg.source == "Start <g1>see <x2/> the figure<x3/> then the end</g1> finally."
+    assert seg.apply("시작 <g1><x2/> 그림<x3/> 끝을 보세요</g1> 마지막으로.")
+    seg.revert()
+    assert str(soup) == before
+
+def test_inline_tags_with_code_keep_their_prose_translatable():
+    soup = BeautifulSoup('<p>Read the <a href="#d">docs on <code>foo()</code> and also <code>bar()</code> here</a>'
+                         ' before you start. Then run <strong>it</strong> x = {"a": [1, 2]};</p>', "lxml")
+    (seg,) = build_segments(extract_translatable_texts(soup))
+    # 링크 안의 글은 번역하고 코드만 보존, 분류기가 코드로 본 텍스트 노드는 모델에 보내지 않음
+    assert seg.source == ("Read the <g1>docs on <x2/> and also <x3/> here</g1> before you start. "
+                          "Then run <g4>it</g4><x5/>")
+    assert seg.apply("시작하기 전에 <g1><x2/>와 <x3/>에 관한 문서</g1>를 읽으세요. 그다음 <g4>그것</g4>을 실행<x5/>")
+    assert str(soup.find("p")) == (
+        '<p>시작하기 전에 <a href="#d"><code>foo()</code>와 <code>bar()</code>에 관한 문서</a>를 읽으세요. '
+        '그다음 <strong>그것</strong>을 실행 x = {"a": [1, 2]};</p>'
+    )
+
+if __name__ == "__main__":
+    test_blocks_become_single_units_with_placeholders()
+    test_translation_is_restored_into_original_structure()
+    test_broken_placeholders_are_rejected()
+    test_revert_restores_source_for_next_language()
+    test_revert_keeps_preserved_elements_in_place()
+    test_inline_tags_with_code_keep_their_prose_translatable()
+    print("✅ segmenter 테스트 통과")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import os
+
+from bs4 import BeautifulSoup
+
+# translate_html은 import 시점에 OpenAI 클라이언트를 만들므로 더미 키 지정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+import translate_html
+from bench_skip_classifier import (
+    legacy_extract_translatable_texts,
+    legacy_should_skip_node,
+    synthetic_html,
+)
+from translate_html_claude import extract_translatable_texts
+from utils import find_unskipped_strings, should_skip_node
+
+EDGE_CASES = """
+<html><body>
+<!-- build comment -->
+<pre><span>inside pre</span> and <b>bold text in pre</b></pre>
+<p style="font-family: 'Courier New'">mono paragraph text <em>but nested em text</em></p>
+<table><tr><td>plain cell words</td><td>x = compute(y)</td></tr>
+<tr><th><kbd>Ctrl C</kbd> stops it</th></tr></table>
+<div class="hljs">highlighted plain words</div>
+<p>Note: keep this one</p><p>A normal sentence about agents.</p>
+</body></html>
+"""
+
+def _ids(nodes):
+    return [id(n) for n in nodes]
+
+def test_single_pass_matches_per_node_skip():
+    for html in (EDGE_CASES, synthetic_html(30)):
+        soup = BeautifulSoup(html, "lxml")
+        legacy = [n for n in soup.find_all(string=True) if not legacy_should_skip_node(n)]
+        current = [n for n in soup.find_all(string=True) if not should_skip_node(n)]
+        assert _ids(find_unskipped_strings(soup)) == _ids(legacy) == _ids(current)
+
+def test_extractors_produce_same_node_set():
+    for html in (EDGE_CASES, synthetic_html(30)):
+        soup = BeautifulSoup(html, "lxml")
+        assert _ids(extract_translatable_texts(soup)) == _ids(legacy_extract_translatable_texts(soup))
+
+        legacy_openai = [
+            n for n in soup.find_all(string=True)
+            if not legacy_should_skip_node(n) and len(str(n).strip()) > 2
+        ]
+        assert _ids(translate_html.extract_translatable_texts(soup)) == _ids(legacy_openai)
+
+if __name__ == "__main__":
+    test_single_pass_matches_per_node_skip()
+    test_extractors_produce_same_node_set()
+    print("✅ 스킵 판정 테스트 통과")
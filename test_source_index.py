@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import os
+from pathlib import Path
+
+import source_index
+from build_order import build_order
+from source_index import SourceIndex
+
+def _touch(path: Path, text: str = "x") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+def _tree(root: Path) -> None:
+    _touch(root / "Foreword.docx")
+    _touch(root / "Dedication.docx")
+    _touch(root / "Part One" / "Chapter 10- Later.docx")
+    _touch(root / "Part One" / "Chapter 2- Earlier.docx")
+    _touch(root / "Part One" / "notes.txt")
+    _touch(root / "misc" / "Foreword old.docx")
+
+def test_build_order_from_index(tmp_path: Path):
+    _tree(tmp_path)
+    names = [p.relative_to(tmp_path).as_posix() for p in build_order(tmp_path)]
+    assert names == ["Dedication.docx", "Foreword.docx",
+                     "Part One/Chapter 2- Earlier.docx", "Part One/Chapter 10- Later.docx"]
+
+def test_rescan_hashes_only_changed_files(monkeypatch, tmp_path: Path):
+    root, manifest = tmp_path / "src", tmp_path / "work" / "source_manifest.json"
+    _tree(root)
+    first = SourceIndex.load(root, manifest).scan()
+    first.save()
+    assert len(first.changed) == 5
+
+    hashed = []
+    real = source_index.file_sha256
+    monkeypatch.setattr(source_index, "file_sha256", lambda p: hashed.append(p.name) or real(p))
+    chapter = _touch(root / "Part One" / "Chapter 2- Earlier.docx", "edited")
+    os.utime(root / "Foreword.docx", ns=(0, 0))  # 시각만 바뀐 파일은 해시가 같아 변경 아님
+    (root / "Dedication.docx").unlink()
+
+    second = SourceIndex.load(root, manifest).scan()
+    # 이름/폴더 찾기는 해시 없이 (os.walk + stat만)
+    assert len(build_order(root, second)) == 3 and hashed == []
+    assert second.changed == ["Part One/Chapter 2- Earlier.docx"]
+    assert sorted(hashed) == ["Chapter 2- Earlier.docx", "Foreword.docx"]
+    assert second.changed == ["Part One/Chapter 2- Earlier.docx"]
+    assert second.removed == ["Dedication.docx"]
+    assert second.is_changed(chapter) and second.sha256(chapter) == real(chapter)
+    assert second.sha256(tmp_path / "elsewhere.docx") is None
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import pytest
+
+from stage_pipeline import Stage, run_stages
+
+def test_stages_overlap_and_keep_order():
+    seen = {"convert": [], "translate": [], "render": []}
+    done = []
+
+    def step(name, seconds):
+        def run(item):
+            seen[name].append(item)
+            time.sleep(seconds)
+        return run
+
+    def render(items):
+        seen["render"].append(list(items))
+        time.sleep(0.02)
+
+    stages = [Stage("convert", step("convert", 0.02)), Stage("translate", step("translate", 0.05)),
+              Stage("render", render, batch=True)]
+    times = run_stages(range(6), stages, queue_size=1, on_done=done.append)
+
+    assert seen["convert"] == seen["translate"] == done == list(range(6))
+    assert [i for batch in seen["render"] for i in batch] == list(range(6))
+    # 단계가 겹치므로 전체 시간은 단계 시간의 합보다 짧고 가장 느린 단계(번역)에 가까움
+    assert times["wall"] < times["convert"] + times["translate"] + times["render"]
+    assert times["wall"] < times["translate"] + 0.15
+
+def test_failure_stops_every_stage():
+    started = []
+
+    def convert(item):
+        started.append(item)
+
+    def translate(item):
+        if item == 2:
+            raise RuntimeError("API down")
+
+    with pytest.raises(RuntimeError, match="API down"):
+        run_stages(range(100), [Stage("convert", convert), Stage("translate", translate)], queue_size=1)
+    assert len(started) < 10  # 큐가 차서 앞 단계도 더 나아가지 않음
+    assert not [t for t in threading.enumerate() if t.name.startswith("stage-")]
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
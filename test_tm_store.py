@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import json
+from pathlib import Path
+
+from tm_store import SqliteTranslationMemory, open_translation_memory
+
+def test_entries_are_committed_immediately(tmp_path: Path):
+    db = tmp_path / "tm.sqlite"
+    writer = SqliteTranslationMemory(db, model="m", prompt_version="p1")
+    writer["Hello agent"] = "안녕 에이전트"
+
+    # close 전에 다른 연결(다른 프로세스 역할)에서 바로 보여야 함
+    reader = SqliteTranslationMemory(db, model="m", prompt_version="p1")
+    assert reader.get("  Hello agent ") == "안녕 에이전트"
+    assert len(reader) == 1
+
+    # 모델/프롬프트 버전이 다르면 다른 키
+    other = SqliteTranslationMemory(db, model="m", prompt_version="p2")
+    assert "Hello agent" not in other
+    for tm in (writer, reader, other):
+        tm.close()
+
+def test_json_tm_is_imported_once(tmp_path: Path):
+    legacy = tmp_path / "tm.json"
+    legacy.write_text(json.dumps({"Tool use": "도구 사용"}, ensure_ascii=False), encoding="utf-8")
+
+    tm = open_translation_memory(legacy, model="m", prompt_version="p")
+    assert tm["Tool use"] == "도구 사용"
+    tm["Tool use"] = "도구 활용"
+    tm.close()
+
+    # 두 번째 실행에서는 JSON으로 덮어쓰지 않음
+    tm = open_translation_memory(legacy, model="m", prompt_version="p")
+    assert tm["Tool use"] == "도구 활용"
+    assert (tmp_path / "tm.sqlite").exists()
+    tm.close()
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_entries_are_committed_immediately(Path(d))
+    with tempfile.TemporaryDirectory() as d:
+        test_json_tm_is_imported_once(Path(d))
+    print("✅ tm_store 테스트 통과")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+# translate_html은 import 시점에 OpenAI 클라이언트를 만들므로 더미 키 지정
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+import translate_html
+from segmenter import Segment
+
+class FakeCompletions:
+    """첫 요청에서는 마지막 ID를 빠뜨리는 가짜 OpenAI 응답"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, **params):
+        payload = json.loads(params["messages"][1]["content"].split("\n\n", 1)[1])
+        ids = [seg["id"] for seg in payload["segments"]]
+        self.requests.append(ids)
+        segments = payload["segments"][:-1] if len(self.requests) == 1 else payload["segments"]
+        content = json.dumps({"translations": {s["id"]: "KO " + s["text"] for s in segments}})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def test_pack_batches_by_token_budget():
+    segs = [Segment(None, "x" * 300) for _ in range(10)]  # 세그먼트당 약 101토큰
+    batches = translate_html.pack_batches(segs, budget=350)
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+    assert sum(batches, []) == list(range(10))
+
+def test_only_missing_ids_are_retried_and_cached_per_segment(monkeypatch, tmp_path: Path):
+    fake = FakeCompletions()
+    monkeypatch.setattr(translate_html.async_client.chat, "completions", fake)
+    segs = [Segment(None, f"Sentence number {i} about agents.") for i in range(4)]
+    tm = {segs[0].source: "캐시된 번역"}
+
+    results = asyncio.run(translate_html._translate_segments_async(segs, tm, concurrency=2))
+
+    assert results[0] == "캐시된 번역"
+    assert results[1:] == [f"KO Sentence number {i} about agents." for i in range(1, 4)]
+    assert fake.requests == [["s1", "s2", "s3"], ["s3"]]
+    assert all(seg.source in tm for seg in segs)
+
+if __name__ == "__main__":
+    test_pack_batches_by_token_budget()
+    print("✅ pack_batches 테스트 통과 (나머지는 pytest로 실행)")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import json
+from pathlib import Path
+
+import pytest
+
+import translate_html_claude
+from glossary import Glossary
+from translation_journal import journal_path
+
+HTML = ("<html><body>" + "".join(f"<p>Paragraph number {n} explains routing.</p>" for n in range(5))
+        + "</body></html>")
+
+def _fake_translator(calls: list, fail_after: int = -1):
+    async def fake(text, tm, limiter, validate=None, context="", lang="ko"):
+        if len(calls) == fail_after:
+            raise RuntimeError("interrupted")
+        calls.append(text)
+        return "KO " + text
+    return fake
+
+def test_resume_skips_completed_segments(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", Glossary({}))
+    src, out, tm = tmp_path / "en.html", tmp_path / "ko.html", tmp_path / "tm.sqlite"
+    src.write_text(HTML, encoding="utf-8")
+
+    first = []
+    monkeypatch.setattr(translate_html_claude, "translate_text_chunk_async", _fake_translator(first, 2))
+    with pytest.raises(RuntimeError):
+        translate_html_claude.translate_html(src, out, tm, concurrency=1)
+    assert not out.exists()
+    lines = journal_path(out).read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0])["segments"] == 5 and len(lines) == 3
+
+    second = []
+    monkeypatch.setattr(translate_html_claude, "translate_text_chunk_async", _fake_translator(second))
+    translate_html_claude.translate_html(src, out, tm, concurrency=1, resume=True)
+    assert [t.split()[2] for t in second] == ["2", "3", "4"]
+    assert out.read_text(encoding="utf-8").count("KO Paragraph number") == 5
+    assert not journal_path(out).exists()
+
+def test_resumed_segments_skip_glossary_check(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", Glossary({"routing": ["라우팅"]}))
+    src, out, tm = tmp_path / "en.html", tmp_path / "ko.html", tmp_path / "tm.sqlite"
+    src.write_text(HTML, encoding="utf-8")
+    retried = []
+
+    async def fake_retranslate(text, previous, terms, tm, limiter, validate=None, context="", lang="ko"):
+        retried.append(text)
+        return None
+
+    monkeypatch.setattr(translate_html_claude, "retranslate_with_terms_async", fake_retranslate)
+    monkeypatch.setattr(translate_html_claude, "translate_text_chunk_async", _fake_translator([], 2))
+    with pytest.raises(RuntimeError):
+        translate_html_claude.translate_html(src, out, tm, concurrency=1)
+
+    monkeypatch.setattr(translate_html_claude, "translate_text_chunk_async", _fake_translator([]))
+    translate_html_claude.translate_html(src, out, tm, concurrency=1, resume=True)
+    # 저널에서 가져온 0, 1번은 "routing" 위반이 있어도 다시 요청하지 않음
+    assert [t.split()[2] for t in retried] == ["2", "3", "4"]
+
+def test_changed_input_starts_over(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(translate_html_claude, "GLOSSARY", Glossary({}))
+    src, out, tm = tmp_path / "en.html", tmp_path / "ko.html", tmp_path / "tm.sqlite"
+    src.write_text(HTML, encoding="utf-8")
+    monkeypatch.setattr(translate_html_claude, "translate_text_chunk_async", _fake_translator([], 3))
+    with pytest.raises(RuntimeError):
+        translate_html_claude.translate_html(src, out, tm, concurrency=1)
+
+    src.write_text(HTML.replace("number 0", "number zero"), encoding="utf-8")
+    calls = []
+    monkeypatch.setattr(translate_html_claude, "translate_text_chunk_async", _fake_translator(calls))
+    translate_html_claude.translate_html(src, out, tm, concurrency=1, resume=True)
+    assert len(calls) == 5
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import http.client
+import threading
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+import chapter_build
+from watch import PreviewServer, Watcher
+
+def _stub_build(monkeypatch, tmp_path: Path, calls: list):
+    monkeypatch.setattr(chapter_build, "CACHE", tmp_path / "cache")
+
+    def fake_convert(ch):
+        ch.en_html.parent.mkdir(parents=True, exist_ok=True)
+        text = ch.source.read_text(encoding="utf-8")
+        ch.en_html.write_text(f'<html><body><p>{text}</p><img src="../../images/a.png"/></body></html>',
+                              encoding="utf-8")
+
+    def fake_translate(ch, tm_path):
+        calls.append(ch.source.name)
+        ch.ko_html.parent.mkdir(parents=True, exist_ok=True)
+        ch.ko_html.write_text(ch.en_html.read_text(encoding="utf-8").replace("<p>", "<p>[KO] "),
+                              encoding="utf-8")
+
+    monkeypatch.setattr(chapter_build, "convert_chapter", fake_convert)
+    monkeypatch.setattr(chapter_build, "translate_chapter", fake_translate)
+
+def _first_event(base_url: str, events: list, ready: threading.Event):
+    conn = http.client.HTTPConnection(base_url.split("//")[1], timeout=10)
+    conn.request("GET", "/events")
+    response = conn.getresponse()
+    ready.set()
+    for line in response:
+        if line.startswith(b"data:"):
+            events.append(line.decode().split(":", 1)[1].strip())
+            break
+    conn.close()
+
+def test_edit_rebuilds_only_that_chapter_and_pushes_reload(monkeypatch, tmp_path: Path):
+    calls = []
+    _stub_build(monkeypatch, tmp_path, calls)
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "Dedication.docx").write_text("For the readers", encoding="utf-8")
+    (src / "Foreword.docx").write_text("First draft", encoding="utf-8")
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "a.png").write_bytes(b"png")
+
+    with PreviewServer(tmp_path, port=0) as preview:
+        watcher = Watcher(src, preview, tm_path=tmp_path / "tm.sqlite", manifest=None)
+        assert watcher.refresh(first=True) == ["Dedication.docx", "Foreword.docx"]
+        assert watcher.refresh() == []
+
+        events, ready = [], threading.Event()
+        listener = threading.Thread(target=_first_event, args=(preview.base_url, events, ready))
+        listener.start()
+        ready.wait(5)
+        (src / "Foreword.docx").write_text("Second draft", encoding="utf-8")
+        assert watcher.refresh() == ["Foreword.docx"]
+        listener.join(5)
+        assert events == ["1"]
+
+        page = urllib.request.urlopen(preview.base_url + "/chapter/1").read().decode("utf-8")
+        assert "[KO] Second draft" in page and '<base href="/cache/ko/">' in page
+        assert 'new EventSource("/events")' in page
+        assert urllib.request.urlopen(preview.base_url + "/images/a.png").read() == b"png"
+        index = urllib.request.urlopen(preview.base_url + "/").read().decode("utf-8")
+        assert '<a href="/chapter/0">Dedication</a>' in index
+    assert calls == ["Dedication.docx", "Foreword.docx", "Foreword.docx"]
+
+def test_failed_rebuild_is_retried_and_index_saved_after_success(monkeypatch, tmp_path: Path):
+    calls = []
+    _stub_build(monkeypatch, tmp_path, calls)
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "Foreword.docx").write_text("First draft", encoding="utf-8")
+    manifest = tmp_path / "sources.json"
+    translate = chapter_build.translate_chapter
+
+    def flaky_translate(ch, tm_path):
+        monkeypatch.setattr(chapter_build, "translate_chapter", translate)
+        raise RuntimeError("API down")
+
+    with PreviewServer(tmp_path, port=0) as preview:
+        watcher = Watcher(src, preview, tm_path=tmp_path / "tm.sqlite", manifest=manifest)
+        monkeypatch.setattr(chapter_build, "translate_chapter", flaky_translate)
+        with pytest.raises(RuntimeError):
+            watcher.refresh(first=True)
+        assert not manifest.exists()
+        # 원고는 그대로지만 번역 결과가 없으므로 다시 시도
+        assert watcher.refresh() == ["Foreword.docx"]
+        assert manifest.exists() and watcher.refresh() == []
+    assert calls == ["Foreword.docx"]
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from cfg import FUZZY_TM, TM_BACKEND
+from fuzzy_tm import NearMatch, band_keys, normalize, signature, similarity
+
+# 유사 검색 때 실제 유사도를 계산해 볼 최대 후보 수
+MAX_FUZZY_CANDIDATES = 50
+
+def source_hash(text: str) -> str:
+    """TM 키로 쓰는 원문 해시 (앞뒤 공백 제거 후 SHA-256)"""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+def prompt_version(system_prompt: str) -> str:
+    """시스템 프롬프트 내용으로 만든 짧은 버전 문자열 (프롬프트가 바뀌면 캐시도 분리)"""
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+class TranslationMemory:
+    """번역 메모리 백엔드 공통 인터페이스 (dict처럼 `in`, `[]`로 사용)"""
+
+    def get(self, text: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def put(self, text: str, translated: str) -> None:
+        self.put_many([(text, translated)])
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def near(self, text: str, threshold: float) -> Optional[NearMatch]:
+        """정확히 일치하지 않을 때 threshold 이상 비슷한 항목 (지원하지 않는 백엔드는 None)"""
+        return None
+
+    def close(self) -> None:
+        self.flush()
+
+    def __contains__(self, text: str) -> bool:
+        return self.get(text) is not None
+
+    def __getitem__(self, text: str) -> str:
+        value = self.get(text)
+        if value is None:
+            raise KeyError(text)
+        return value
+
+    def __setitem__(self, text: str, translated: str) -> None:
+        self.put(text, translated)
+
+class JsonTranslationMemory(TranslationMemory):
+    """기존 tm.json 형식 백엔드 (전체를 메모리에 올리고 flush 시 파일 재작성)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._data: Dict[str, str] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except Exception as e:
+                print(f"[WARN] TM 로드 실패: {e}")
+
+    def get(self, text: str) -> Optional[str]:
+        return self._data.get(text.strip())
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        for text, translated in items:
+            self._data[text.strip()] = translated
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        return iter(list(self._data.items()))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def flush(self) -> None:
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"[WARN] TM 저장 실패: {e}")
+
+class SqliteTranslationMemory(TranslationMemory):
+    """SQLite(WAL) 백엔드: 항목을 받는 즉시 커밋하므로 중단되어도 번역 결과가 남음
+
+    키는 (원문 해시, 모델, 프롬프트 버전)이며, WAL 모드라 여러 프로세스가
+    동시에 읽고 쓸 수 있습니다. 같은 프로세스 안에서는 락으로 연결을 공유합니다.
+    fuzzy가 켜져 있으면 항목마다 MinHash LSH 버킷(tm_lsh)도 기록해 near()로
+    비슷한 문장을 찾을 수 있습니다.
+    """
+
+    def __init__(self, path: Path, model: str = "", prompt_version: str = "",
+                 fuzzy: bool = FUZZY_TM):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self.prompt_version = prompt_version
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tm (
+                src_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (src_hash, model, prompt_version)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tm_lsh (
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                src_hash TEXT NOT NULL,
+                PRIMARY KEY (model, prompt_version, bucket, src_hash)
+            ) WITHOUT ROWID;
+        """)
+        self.fuzzy = fuzzy
+        if fuzzy:
+            self._index_missing()
+
+    def _lsh_rows(self, src_hash: str, text: str) -> list:
+        sig = signature(normalize(text))
+        if not sig:
+            return []
+        return [(self.model, self.prompt_version, bucket, src_hash) for bucket in band_keys(sig)]
+
+    @property
+    def _lsh_marker(self) -> str:
+        # 이 rowid까지는 유사 검색 색인이 되어 있음
+        return f"lsh_rowid:{self.model}:{self.prompt_version}"
+
+    def _advance_lsh_marker(self, prev_max: int) -> None:
+        # 방금 넣은 항목보다 앞에 색인 안 된 항목이 없을 때만 표시를 앞으로 옮김 (트랜잭션 안에서 호출)
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (self._lsh_marker,)).fetchone()
+        last = int(row[0]) if row else 0
+        pending = self._conn.execute(
+            "SELECT 1 FROM tm WHERE rowid>? AND rowid<=? AND model=? AND prompt_version=? LIMIT 1",
+            (last, prev_max, self.model, self.prompt_version),
+        ).fetchone()
+        if not pending:
+            new_max = self._conn.execute("SELECT MAX(rowid) FROM tm").fetchone()[0]
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (self._lsh_marker, str(new_max)))
+
+    def _index_missing(self) -> None:
+        # 마지막 색인 이후 들어온 항목(이전 버전 TM, JSON 가져오기, fuzzy를 끈 다른 프로세스)을 색인
+        marker = self._lsh_marker
+        last = int(self.get_meta(marker) or 0)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, src_hash, source FROM tm WHERE model=? AND prompt_version=? AND rowid>? "
+                "ORDER BY rowid",
+                (self.model, self.prompt_version, last),
+            ).fetchall()
+        if not rows:
+            return
+        lsh = [row for _, src_hash, source in rows for row in self._lsh_rows(src_hash, source)]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("INSERT OR IGNORE INTO tm_lsh VALUES (?, ?, ?, ?)", lsh)
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (marker, str(rows[-1][0])))
+            self._conn.execute("COMMIT")
+        if last == 0 or len(rows) > 1000:
+            print(f"[TM 색인] 유사 검색 색인 {len(rows)}개 항목 반영")
+
+    def get(self, text: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT target FROM tm WHERE src_hash=? AND model=? AND prompt_version=?",
+                (source_hash(text), self.model, self.prompt_version),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        now = time.time()
+        rows = [
+            (source_hash(text), self.model, self.prompt_version, text.strip(), translated, now)
+            for text, translated in items
+        ]
+        if not rows:
+            return
+        lsh = [r for row in rows for r in self._lsh_rows(row[0], row[3])] if self.fuzzy else []
+        # 한 트랜잭션으로 묶어 즉시 커밋
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                prev_max = self._conn.execute("SELECT IFNULL(MAX(rowid), 0) FROM tm").fetchone()[0]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO tm VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                if self.fuzzy:
+                    self._conn.executemany("INSERT OR IGNORE INTO tm_lsh VALUES (?, ?, ?, ?)", lsh)
+                    self._advance_lsh_marker(prev_max)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, target FROM tm WHERE model=? AND prompt_version=?",
+                (self.model, self.prompt_version),
+            ).fetchall()
+        return iter(rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM tm WHERE model=? AND prompt_version=?",
+                (self.model, self.prompt_version),
+            ).fetchone()[0]
+
+    def near(self, text: str, threshold: float) -> Optional[NearMatch]:
+        """LSH 버킷이 겹치는 후보 중 정규화 유사도가 가장 높은 항목 (threshold 미만이면 None)
+
+        후보는 겹치는 버킷이 많은 순서로 MAX_FUZZY_CANDIDATES개까지만 비교합니다.
+        """
+        if not self.fuzzy:
+            return None
+        query = normalize(text)
+        sig = signature(query)
+        if not sig:
+            return None
+        keys = band_keys(sig)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT t.source, t.target FROM tm t JOIN (
+                        SELECT src_hash FROM tm_lsh
+                        WHERE model=? AND prompt_version=? AND bucket IN ({",".join("?" * len(keys))})
+                        GROUP BY src_hash ORDER BY COUNT(*) DESC LIMIT ?
+                    ) c ON t.src_hash = c.src_hash
+                    WHERE t.model=? AND t.prompt_version=?""",
+                [self.model, self.prompt_version, *keys, MAX_FUZZY_CANDIDATES,
+                 self.model, self.prompt_version],
+            ).fetchall()
+        best = None
+        for source, target in rows:
+            score = similarity(query, normalize(source))
+            if score >= threshold and (best is None or score > best.score):
+                best = NearMatch(score, source, target)
+        return best
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def import_json_tm(json_path: Path, store: SqliteTranslationMemory) -> int:
+    """기존 tm.json을 SQLite TM으로 1회 가져오기 (이미 가져온 파일이면 0 반환)"""
+    json_path = Path(json_path)
+    if not json_path.exists():
+        return 0
+    stat = json_path.stat()
+    marker = f"imported:{json_path.resolve()}"
+    stamp = f"{stat.st_size}:{int(stat.st_mtime)}"
+    if store.get_meta(marker) == stamp:
+        return 0
+    legacy = JsonTranslationMemory(json_path)
+    entries = list(legacy.items())
+    store.put_many(entries)
+    store.set_meta(marker, stamp)
+    print(f"[TM 가져오기] {json_path} -> {store.path} ({len(entries)}개 항목)")
+    return len(entries)
+
+def open_translation_memory(tm_path: Path, model: str, prompt_version: str,
+                            backend: str = TM_BACKEND) -> TranslationMemory:
+    """설정된 백엔드로 TM 열기
+
+    sqlite 백엔드에 tm.json 경로가 주어지면 같은 이름의 .sqlite 파일을 쓰고,
+    기존 JSON 내용은 처음 한 번만 가져옵니다.
+    """
+    tm_path = Path(tm_path)
+    if backend == "json":
+        return JsonTranslationMemory(tm_path)
+    if backend != "sqlite":
+        raise ValueError(f"알 수 없는 TM 백엔드: {backend}")
+
+    db_path = tm_path.with_suffix(".sqlite") if tm_path.suffix == ".json" else tm_path
+    store = SqliteTranslationMemory(db_path, model=model, prompt_version=prompt_version)
+    import_json_tm(tm_path.with_suffix(".json"), store)
+    return store
@@ -1,14 +1,41 @@
+import asyncio
 import json
 import re
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
 import openai
 from bs4 import BeautifulSoup, NavigableString
-from cfg import OPENAI_API_KEY, OPENAI_MODEL
-from utils import should_skip_node
+from cfg import OPENAI_API_KEY, OPENAI_MODEL, SEGMENT_MODE, TRANSLATE_CONCURRENCY, TRANSLATE_PROVIDERS
+from utils import find_unskipped_strings
+from segmenter import MARKER_INSTRUCTION, Segment, build_segments, has_markers
+from tm_store import TranslationMemory, open_translation_memory, prompt_version
+from async_engine import Limiters, estimate_tokens, run_in_order
+from providers import OpenAIProvider, ProviderRouter, TranslationFailed, default_providers, write_failure_report
 
-# OpenAI 클라이언트 초기화
+# OpenAI 클라이언트 초기화 (동기 클라이언트는 Batch API용)
 client = openai.OpenAI(api_key=OPENAI_API_KEY)
+OPENAI = OpenAIProvider.from_config(OPENAI_MODEL)
+async_client = OPENAI.client
+
+# OpenAI 우선, 실패하면 TRANSLATE_PROVIDERS의 다른 공급자로 (재시도/회로 차단/hedge 포함)
+ROUTER = ProviderRouter(default_providers(OPENAI, TRANSLATE_PROVIDERS))
+
+# 모든 공급자가 실패한 텍스트 {원문: 오류} / 이번 번역에서 끝내 영어로 남은 텍스트
+failed_segments: Dict[str, str] = {}
+untranslated: List[Dict[str, str]] = []
+
+MAX_OUTPUT_TOKENS = 4000
+
+# 배치 하나에 담을 원문의 추정 토큰 수 (번역문이 MAX_OUTPUT_TOKENS 안에 들어오도록)
+BATCH_TOKEN_BUDGET = 1500
+# 응답에서 빠지거나 구조가 깨진 세그먼트만 다시 보내는 횟수
+MAX_BATCH_RETRIES = 2
+
+BATCH_INSTRUCTION = (
+    'Translate the "text" of every segment to Korean. Respond with a JSON object of the form '
+    '{"translations": {"<id>": "<Korean translation>"}} containing exactly one entry for each id. '
+    "Never merge or split segments."
+)
 
 # 강화된 번역 프롬프트
 SYSTEM_PROMPT = """You are a professional EN→KO technical translator.
@@ -29,26 +56,22 @@ Terminology:
 Style:
 - Clear, concise, and technically faithful. Avoid over-translation. When necessary, keep the English term in parentheses on first occurrence (e.g., 에이전트(agent))."""
 
-def load_translation_memory(tm_path: Path) -> Dict[str, str]:
-    """번역 메모리 로드"""
-    if tm_path.exists():
-        try:
-            with open(tm_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[WARN] TM 로드 실패: {e}")
-    return {}
-
-def save_translation_memory(tm_path: Path, tm: Dict[str, str]) -> None:
-    """번역 메모리 저장"""
+# TM 키에 포함되는 프롬프트 버전 (프롬프트를 고치면 이전 번역과 섞이지 않음)
+PROMPT_VERSION = prompt_version(SYSTEM_PROMPT)
+
+def load_translation_memory(tm_path: Path) -> TranslationMemory:
+    """번역 메모리 로드 (모델/프롬프트 버전별로 분리된 TM)"""
+    return open_translation_memory(tm_path, model=OPENAI_MODEL, prompt_version=PROMPT_VERSION)
+
+def save_translation_memory(tm_path: Path, tm: TranslationMemory) -> None:
+    """번역 메모리 저장 (SQLite 백엔드는 항목마다 이미 커밋되어 있음)"""
     try:
-        with open(tm_path, 'w', encoding='utf-8') as f:
-            json.dump(tm, f, ensure_ascii=False, indent=2)
+        tm.flush()
     except Exception as e:
         print(f"[WARN] TM 저장 실패: {e}")
 
-def translate_text_chunk(text: str, tm: Dict[str, str]) -> str:
-    """텍스트 청크 번역 (캐시 활용)"""
+def _cached_or_skipped(text: str, tm: Dict[str, str]) -> Optional[str]:
+    """캐시 적중/스킵 대상이면 결과를, API 호출이 필요하면 None을 반환"""
     # 캐시 확인
     text_key = text.strip()
     if text_key in tm:
@@ -58,42 +81,176 @@ def translate_text_chunk(text: str, tm: Dict[str, str]) -> str:
     if not text_key or len(text_key) < 3:
         return text
     
+    return None
+
+def build_request_params(text: str) -> Dict[str, Any]:
+    # 블록 세그먼트의 자리표시자 규칙은 해당 요청에만 덧붙임
+    content = f"{MARKER_INSTRUCTION}\n\n{text}" if has_markers(text) else text
+    return dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": content}
+        ],
+        temperature=0.1,
+        max_tokens=MAX_OUTPUT_TOKENS
+    )
+
+def translate_text_chunk(text: str, tm: Dict[str, str]) -> Optional[str]:
+    """텍스트 청크 번역 (캐시 활용, 모든 공급자가 실패하면 None)"""
+    cached = _cached_or_skipped(text, tm)
+    if cached is not None:
+        return cached
+    
     try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": text}
-            ],
-            temperature=0.1,
-            max_tokens=2000
-        )
-        
-        translated = response.choices[0].message.content.strip()
-        
-        # 캐시에 저장
-        tm[text_key] = translated
-        return translated
-        
-    except Exception as e:
-        print(f"[ERROR] 번역 실패: {e}")
-        return text
+        completion = asyncio.run(ROUTER.complete(build_request_params(text),
+                                                 expected_output_tokens=estimate_tokens(text)))
+    except TranslationFailed as e:
+        print(f"[ERROR] 번역 실패 (모든 공급자): {e}")
+        return None
+    
+    # 캐시에 저장 (다른 공급자가 대신 번역한 결과는 TM에 넣지 않음)
+    if completion.provider == OPENAI.name:
+        tm[text.strip()] = completion.text
+    return completion.text
 
 def extract_translatable_texts(soup: BeautifulSoup) -> list:
     """번역 가능한 텍스트 노드 추출"""
     translatable_nodes = []
     
-    for element in soup.find_all(string=True):
-        if isinstance(element, NavigableString):
-            if not should_skip_node(element):
-                text = str(element).strip()
-                if text and len(text) > 2:  # 의미있는 텍스트만
-                    translatable_nodes.append(element)
+    # 스킵 조건은 한 번의 트리 순회로 판정
+    for element in find_unskipped_strings(soup):
+        text = str(element).strip()
+        if text and len(text) > 2:  # 의미있는 텍스트만
+            translatable_nodes.append(element)
     
     return translatable_nodes
 
-def translate_html(input_html: Path, output_html: Path, tm_path: Path) -> None:
-    """HTML 파일 번역"""
+def pack_batches(segments: List[Segment], budget: int = BATCH_TOKEN_BUDGET) -> List[List[int]]:
+    """세그먼트 인덱스를 추정 토큰 수 기준으로 배치에 채움 (한 세그먼트가 예산보다 크면 단독 배치)"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, seg in enumerate(segments):
+        tokens = estimate_tokens(seg.source)
+        if current and current_tokens + tokens > budget:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def build_batch_request_params(items: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """ID가 붙은 세그먼트 묶음 요청 (응답은 ID를 키로 하는 JSON)"""
+    instruction = BATCH_INSTRUCTION
+    if any(has_markers(text) for _, text in items):
+        instruction += " " + MARKER_INSTRUCTION
+    payload = {"segments": [{"id": seg_id, "text": text} for seg_id, text in items]}
+    return dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"{instruction}\n\n{json.dumps(payload, ensure_ascii=False)}"}
+        ],
+        temperature=0.1,
+        max_tokens=MAX_OUTPUT_TOKENS,
+        response_format={"type": "json_object"}
+    )
+
+def parse_batch_response(content: str) -> Dict[str, str]:
+    """{"translations": {id: text}} 응답 파싱 (형식이 틀리면 빈 dict)"""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    translations = data.get("translations", data) if isinstance(data, dict) else {}
+    if not isinstance(translations, dict):
+        return {}
+    return {str(k): v.strip() for k, v in translations.items() if isinstance(v, str) and v.strip()}
+
+async def translate_batch_async(items: List[Tuple[str, str]],
+                                limiters: Limiters) -> Tuple[Dict[str, str], bool]:
+    """세그먼트 묶음 1회 요청 → ({id: 번역문}, TM에 넣어도 되는지) (모든 공급자가 실패하면 빈 dict)"""
+    try:
+        # 입력 + 같은 양의 출력만큼 한도 확보 (재시도/failover는 공급자 계층에서)
+        completion = await ROUTER.complete(build_batch_request_params(items), limiters,
+                                           sum(estimate_tokens(text) for _, text in items))
+    except TranslationFailed as e:
+        print(f"[ERROR] 배치 번역 실패 ({len(items)}개 세그먼트): {e}")
+        failed_segments.update((text.strip(), str(e)) for _, text in items)
+        return {}, False
+    # TM은 모델별로 나뉘므로 다른 공급자가 대신 번역한 결과는 넣지 않음
+    return parse_batch_response(completion.text), completion.provider == OPENAI.name
+
+async def _translate_segments_async(segments: List[Segment], tm: Dict[str, str],
+                                    concurrency: int) -> List[Optional[str]]:
+    """세그먼트별 TM 확인 → 미스만 ID 배치로 요청 → 실패한 ID만 재시도"""
+    results: List[Optional[str]] = [None] * len(segments)
+    pending: List[int] = []
+    for i, seg in enumerate(segments):
+        cached = _cached_or_skipped(seg.source, tm)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+    print(f"[TM 적중] {len(segments) - len(pending)}/{len(segments)}개 세그먼트")
+    
+    limiters = Limiters()
+    for attempt in range(1 + MAX_BATCH_RETRIES):
+        if not pending:
+            break
+        batches = [[pending[j] for j in batch] for batch in pack_batches([segments[i] for i in pending])]
+        retry_note = f" (재시도 {attempt}회차)" if attempt else ""
+        print(f"[배치 처리] {len(pending)}개 세그먼트 → {len(batches)}개 배치{retry_note}")
+        
+        outputs = await run_in_order(
+            batches,
+            lambda batch: translate_batch_async([(f"s{i}", segments[i].source) for i in batch], limiters),
+            concurrency,
+            progress_every=10
+        )
+        
+        failed: List[int] = []
+        for batch, (output, cacheable) in zip(batches, outputs):
+            for i in batch:
+                translated = output.get(f"s{i}")
+                if translated is not None and segments[i].accepts(translated):
+                    results[i] = translated
+                    # 세그먼트 단위로 캐시에 저장
+                    if cacheable:
+                        tm[segments[i].source] = translated
+                else:
+                    failed.append(i)
+        pending = failed
+    
+    if pending:
+        print(f"[WARN] {len(pending)}개 세그먼트 번역 실패 (재시도 {MAX_BATCH_RETRIES}회 후)")
+    return results
+
+def translate_segments(segments: List[Segment], tm: Dict[str, str], concurrency: int) -> List:
+    """세그먼트를 ID 배치로 동시 번역해 반영하고, 다시 시도할 블록의 텍스트 노드 반환"""
+    translated_texts = asyncio.run(_translate_segments_async(segments, tm, concurrency))
+    
+    failed_nodes = []
+    for seg, translated_text in zip(segments, translated_texts):
+        if translated_text is None or not seg.apply(translated_text):
+            # 블록은 노드 단위로 재시도, 텍스트 노드는 원문 유지 (실패 보고서에 기록)
+            if seg.kind == "block":
+                failed_nodes.extend(seg.nodes)
+            else:
+                text = seg.source.strip()
+                untranslated.append({"text": text, "error": failed_segments.get(text, "응답 누락/형식 오류")})
+    return failed_nodes
+
+def translate_html(input_html: Path, output_html: Path, tm_path: Path,
+                   concurrency: int = TRANSLATE_CONCURRENCY,
+                   segment_mode: str = SEGMENT_MODE) -> None:
+    """HTML 파일 번역 (최대 concurrency개 배치 동시 처리)
+
+    segment_mode="block"이면 문단/목록/제목/표 셀 단위로, "node"면 텍스트 노드 단위로 번역
+    """
     print(f"[번역 시작] {input_html} -> {output_html}")
     
     # 번역 메모리 로드
@@ -108,51 +265,25 @@ def translate_html(input_html: Path, output_html: Path, tm_path: Path) -> None:
     translatable_nodes = extract_translatable_texts(soup)
     print(f"[번역 대상] {len(translatable_nodes)}개 텍스트 노드")
     
-    # 배치 번역을 위한 텍스트 그룹화
-    batch_size = 10
-    batches = []
-    current_batch = []
-    current_length = 0
-    
-    for node in translatable_nodes:
-        text = str(node).strip()
-        if current_length + len(text) > 3000 or len(current_batch) >= batch_size:
-            if current_batch:
-                batches.append(current_batch)
-                current_batch = []
-                current_length = 0
-        
-        current_batch.append((node, text))
-        current_length += len(text)
+    # 번역 단위 구성 (블록 안의 인라인 태그는 자리표시자로)
+    segments = build_segments(translatable_nodes, mode=segment_mode)
+    block_count = sum(1 for seg in segments if seg.kind == "block")
+    print(f"[세그먼트] {len(segments)}개 번역 단위 (블록 {block_count}개)")
     
-    if current_batch:
-        batches.append(current_batch)
+    untranslated.clear()
+    failed_nodes = translate_segments(segments, tm, concurrency)
     
-    print(f"[배치 처리] {len(batches)}개 배치로 분할")
-    
-    # 배치별 번역 처리
-    for i, batch in enumerate(batches, 1):
-        print(f"[진행률] {i}/{len(batches)} 배치 처리 중...")
-        
-        # 배치 텍스트 결합
-        batch_texts = [text for _, text in batch]
-        combined_text = "\n\n---\n\n".join(batch_texts)
-        
-        # 번역
-        translated_combined = translate_text_chunk(combined_text, tm)
-        translated_parts = translated_combined.split("\n\n---\n\n")
-        
-        # 결과 적용
-        for j, (node, original_text) in enumerate(batch):
-            if j < len(translated_parts):
-                translated_text = translated_parts[j].strip()
-                if translated_text and translated_text != original_text:
-                    node.replace_with(translated_text)
+    # 자리표시자 구조가 깨진 블록은 텍스트 노드 단위로 다시 번역
+    if failed_nodes:
+        print(f"[세그먼트] 구조 복원 실패 → {len(failed_nodes)}개 노드를 개별 번역")
+        translate_segments(build_segments(failed_nodes, mode="node"), tm, concurrency)
     
     # 번역 메모리 저장
     save_translation_memory(tm_path, tm)
     new_entries = len(tm) - initial_tm_size
     print(f"[TM 업데이트] {new_entries}개 새 항목 추가 (총 {len(tm)}개)")
+    tm.close()
+    write_failure_report(output_html, untranslated)
     
     # 번역된 HTML 저장
     with open(output_html, 'w', encoding='utf-8') as f:
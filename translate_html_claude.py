@@ -1,14 +1,31 @@
-import json
+import asyncio
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import anthropic
 from bs4 import BeautifulSoup, NavigableString
-from cfg import ANTHROPIC_API_KEY
-from utils import should_skip_node
+from cfg import (ANTHROPIC_API_KEY, ANTHROPIC_BASE_URL, ANTHROPIC_MODEL, FUZZY_TM_THRESHOLD, GLOSSARY_PATH,
+                 SEGMENT_MODE, STREAM_WINDOW_CHARS, TRANSLATE_CONCURRENCY, TRANSLATE_PROVIDERS)
+from utils import SPECIAL_CHAR_RE, find_unskipped_strings
+from segmenter import MARKER_INSTRUCTION, Segment, build_segments, has_markers, strip_markers
+from fuzzy_tm import NearMatch
+from glossary import Glossary
+from tm_store import TranslationMemory, open_translation_memory, prompt_version
+from async_engine import Limiters, estimate_tokens, run_in_order
+from html_stream import iter_windows
+from usage_meter import UsageMeter
+from translation_journal import TranslationJournal, journal_path
+from providers import (AnthropicProvider, Completion, ProviderRouter, TranslationFailed,
+                       default_providers, write_failure_report)
 
-# Anthropic 클라이언트 초기화
-client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+CLAUDE_MODEL = ANTHROPIC_MODEL
+
+# Anthropic 클라이언트 초기화 (동기 클라이언트는 Batches API용)
+client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY, base_url=ANTHROPIC_BASE_URL)
+ANTHROPIC = AnthropicProvider.from_config(CLAUDE_MODEL)
+async_client = ANTHROPIC.client
+MAX_OUTPUT_TOKENS = 4000
 
 # 개선된 번역 프롬프트 - 코드 블록과 기술 문서에 특화
 SYSTEM_PROMPT = """You are a professional technical translator specializing in AI and software engineering documentation, translating from English to Korean.
@@ -45,94 +62,313 @@ SPECIAL HANDLING:
 - For API responses: Keep JSON/XML structure unchanged
 - For configuration files: Keep syntax and keys unchanged"""
 
-def load_translation_memory(tm_path: Path) -> Dict[str, str]:
-    """번역 메모리 로드"""
-    if tm_path.exists():
-        try:
-            with open(tm_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[WARN] TM 로드 실패: {e}")
-    return {}
-
-def save_translation_memory(tm_path: Path, tm: Dict[str, str]) -> None:
-    """번역 메모리 저장"""
+# TM 키에 포함되는 프롬프트 버전 (프롬프트를 고치면 이전 번역과 섞이지 않음)
+PROMPT_VERSION = prompt_version(SYSTEM_PROMPT)
+
+# 번역 언어 코드 → 프롬프트에 쓰는 언어 이름 (ko는 위 프롬프트/TM을 그대로 사용)
+LANGUAGES = {"ko": "Korean", "ja": "Japanese", "zh": "Simplified Chinese"}
+DEFAULT_LANGUAGE = "ko"
+
+REVISION_INSTRUCTION = (
+    "The English source below is a revised version of a passage that was already translated. "
+    "Update the previous Korean translation so that it matches the new source, changing only what "
+    "the revision requires and keeping the rest word for word. Return only the updated translation."
+)
+
+# 번역 후 용어 검사에 쓰는 용어집 (glossary.json, 한국어)
+GLOSSARY = Glossary.load()
+_glossaries: Dict[str, Glossary] = {}
+
+# 호출별 토큰 사용량 (프롬프트 캐시 읽기/쓰기 포함)
+USAGE = UsageMeter()
+
+# Claude 우선, 실패하면 TRANSLATE_PROVIDERS의 다른 공급자로 (재시도/회로 차단/hedge 포함)
+ROUTER = ProviderRouter(default_providers(ANTHROPIC, TRANSLATE_PROVIDERS), stats=USAGE)
+
+# 모든 공급자가 실패한 텍스트 {원문: 오류} / 이번 번역에서 끝내 영어로 남은 텍스트 노드
+failed_segments: Dict[str, str] = {}
+
+# 진행 중인 번역 요청 ((TM, 언어, 맥락, 원문) → Future): 같은 원문이 동시에 오면 한 요청을 같이 기다림
+_pending: Dict[tuple, asyncio.Future] = {}
+untranslated: List[Dict[str, str]] = []
+
+# 유사 문장 TM 사용 현황 (정규화 후 동일해 그대로 재사용 / 이전 번역 수정 요청)
+fuzzy_stats = {"reused": 0, "revised": 0}
+
+@lru_cache(maxsize=None)
+def system_prompt(lang: str = DEFAULT_LANGUAGE) -> str:
+    """언어별 시스템 프롬프트 (다른 언어는 한국어 용어 지침을 빼고 언어 이름만 바꿈)"""
+    if lang == DEFAULT_LANGUAGE:
+        return SYSTEM_PROMPT
+    name = LANGUAGES[lang]
+    head, rest = SYSTEM_PROMPT.split("TRANSLATION GUIDELINES:", 1)
+    prompt = head + "STYLE:" + rest.split("STYLE:", 1)[1]
+    return prompt.replace("한국어(English)", f"{name} term (English)").replace("Korean", name)
+
+def prompt_version_for(lang: str = DEFAULT_LANGUAGE) -> str:
+    """언어별 TM 키의 프롬프트 버전"""
+    return PROMPT_VERSION if lang == DEFAULT_LANGUAGE else prompt_version(system_prompt(lang))
+
+def glossary_for(lang: str = DEFAULT_LANGUAGE) -> Glossary:
+    """언어별 용어집 (ko는 GLOSSARY, 다른 언어는 glossary.<언어>.json이 있을 때만)"""
+    if lang == DEFAULT_LANGUAGE:
+        return GLOSSARY
+    if lang not in _glossaries:
+        _glossaries[lang] = Glossary.load(GLOSSARY_PATH.with_name(f"glossary.{lang}.json"), LANGUAGES[lang])
+    return _glossaries[lang]
+
+def language_path(path: Path, lang: str) -> Path:
+    """언어별 파일 경로 (ko는 그대로, 다른 언어는 이름 끝의 _ko를 바꾸거나 _<언어>를 붙임)
+
+        master_ko.html → master_ja.html, Book_KO.pdf → Book_JA.pdf, tm.sqlite → tm_ja.sqlite
+    """
+    path = Path(path)
+    if lang == DEFAULT_LANGUAGE:
+        return path
+    stem = path.stem
+    if stem.lower().endswith("_" + DEFAULT_LANGUAGE):
+        suffix = lang.upper() if stem[-2:].isupper() else lang
+        return path.with_name(f"{stem[:-2]}{suffix}{path.suffix}")
+    return path.with_name(f"{stem}_{lang}{path.suffix}")
+
+def usage_log_path(tm_path: Path) -> Path:
+    """호출별 사용량 기록 파일 (TM 옆의 usage.jsonl)"""
+    return Path(tm_path).with_name("usage.jsonl")
+
+def load_translation_memory(tm_path: Path, lang: str = DEFAULT_LANGUAGE) -> TranslationMemory:
+    """번역 메모리 로드 (언어별 파일, 모델/프롬프트 버전별로 분리된 TM)"""
+    return open_translation_memory(language_path(tm_path, lang), model=CLAUDE_MODEL,
+                                   prompt_version=prompt_version_for(lang))
+
+def save_translation_memory(tm_path: Path, tm: TranslationMemory) -> None:
+    """번역 메모리 저장 (SQLite 백엔드는 항목마다 이미 커밋되어 있음)"""
     try:
-        with open(tm_path, 'w', encoding='utf-8') as f:
-            json.dump(tm, f, ensure_ascii=False, indent=2)
+        tm.flush()
     except Exception as e:
         print(f"[WARN] TM 저장 실패: {e}")
 
-def translate_text_chunk(text: str, tm: Dict[str, str]) -> str:
-    """Claude를 사용한 텍스트 청크 번역 (캐시 활용)"""
+def _cached_or_skipped(text: str, tm: Dict[str, str]) -> Optional[str]:
+    """캐시 적중/스킵 대상이면 결과를, API 호출이 필요하면 None을 반환"""
     # 캐시 확인
     text_key = text.strip()
     if text_key in tm:
+        USAGE.count("tm_hit")
         return tm[text_key]
     
     # 빈 텍스트나 너무 짧은 텍스트는 스킵
     if not text_key or len(text_key) < 3:
+        USAGE.count("skipped")
         return text
     
-    # 코드 블록이나 특수 형식인지 추가 확인
-    if is_code_or_special_format(text_key):
+    # 코드 블록이나 특수 형식인지 추가 확인 (블록 단위면 자리표시자를 뺀 텍스트로 판정)
+    if is_code_or_special_format(strip_markers(text_key)):
+        USAGE.count("skipped")
         return text
     
+    USAGE.count("tm_miss")
+    return None
+
+def system_blocks(context: str = "", lang: str = DEFAULT_LANGUAGE) -> List[Dict[str, Any]]:
+    """시스템 프롬프트 + 용어집 (+ 챕터 맥락) 블록, 모든 요청에 똑같이 붙는 앞부분이라 캐시 지점을 표시
+
+    챕터 맥락은 챕터마다 다르므로 따로 캐시 지점을 둬서 앞의 공통 부분은 챕터가
+    바뀌어도 계속 캐시에서 읽히게 합니다.
+    """
+    stable = system_prompt(lang)
+    glossary = glossary_for(lang).prompt_section()
+    if glossary:
+        stable += "\n\n" + glossary
+    blocks = [{"type": "text", "text": stable, "cache_control": {"type": "ephemeral"}}]
+    if context:
+        blocks.append({"type": "text", "text": f"Context for this chapter:\n{context}",
+                       "cache_control": {"type": "ephemeral"}})
+    return blocks
+
+def build_request_params(text: str, extra_instruction: str = "", context: str = "",
+                         lang: str = DEFAULT_LANGUAGE) -> Dict[str, Any]:
+    instruction = f"Translate this technical content to {LANGUAGES[lang]} while preserving all formatting and code:"
+    if has_markers(text):
+        instruction += " " + MARKER_INSTRUCTION
+    if extra_instruction:
+        instruction += " " + extra_instruction
+    return dict(
+        model=CLAUDE_MODEL,
+        max_tokens=MAX_OUTPUT_TOKENS,
+        temperature=0.1,
+        system=system_blocks(context, lang),
+        messages=[
+            {
+                "role": "user",
+                "content": f"{instruction}\n\n{text}"
+            }
+        ]
+    )
+
+def build_revision_params(text: str, match: NearMatch, context: str = "",
+                          lang: str = DEFAULT_LANGUAGE) -> Dict[str, Any]:
+    """비슷한 이전 번역을 고쳐 쓰게 하는 요청 (처음부터 번역하는 것보다 짧게 끝남)"""
+    instruction = REVISION_INSTRUCTION.replace("Korean", LANGUAGES[lang])
+    if has_markers(text):
+        instruction += " " + MARKER_INSTRUCTION
+    params = build_request_params(text, context=context, lang=lang)
+    params["messages"] = [{
+        "role": "user",
+        "content": (f"{instruction}\n\nPrevious source:\n{match.source}\n\n"
+                    f"Previous translation:\n{match.target}\n\nNew source:\n{text}"),
+    }]
+    return params
+
+def _call_kind(params: Dict[str, Any]) -> str:
+    # 사용량 기록용 호출 종류 (새 번역 / 유사 TM 수정)
+    revision = REVISION_INSTRUCTION.split(".", 1)[0]  # 언어 이름이 들어가기 전 첫 문장
+    return "revise" if params["messages"][0]["content"].startswith(revision) else "translate"
+
+def _fuzzy_match(text: str, tm: Dict[str, str]) -> Optional[NearMatch]:
+    # 유사 검색을 지원하는 TM(sqlite)에서만 사용
+    near = getattr(tm, "near", None)
+    return near(text, FUZZY_TM_THRESHOLD) if near else None
+
+def _request_for(text: str, tm: Dict[str, str], context: str = "", lang: str = DEFAULT_LANGUAGE):
+    """(그대로 재사용할 번역, API 요청 파라미터) 중 하나를 반환"""
+    match = _fuzzy_match(text, tm)
+    if match is None:
+        return None, build_request_params(text, context=context, lang=lang)
+    if match.score == 1.0 and has_markers(text) == has_markers(match.source):
+        fuzzy_stats["reused"] += 1
+        USAGE.count("tm_fuzzy_reused")
+        return match.target, None
+    fuzzy_stats["revised"] += 1
+    USAGE.count("tm_fuzzy_revised")
+    return None, build_revision_params(text, match, context, lang)
+
+async def _complete(params: Dict[str, Any], limiters: Optional[Limiters], kind: str,
+                    text: str) -> Completion:
+    # 입력(시스템 프롬프트 포함) + 예상 출력 토큰만큼 한도를 확보하고 공급자 계층으로 요청
+    with USAGE.track(params, kind) as call:
+        completion = call.response = await ROUTER.complete(params, limiters, estimate_tokens(text))
+        call.extra["provider"] = completion.provider
+    return completion
+
+def _remember(text: str, translated: str, tm: Dict[str, str], completion: Optional[Completion]) -> None:
+    # TM은 모델별로 나뉘므로 다른 공급자가 대신 번역한 결과는 넣지 않음 (다음 실행에서 다시 번역)
+    if completion is None or completion.provider == ANTHROPIC.name:
+        tm[text.strip()] = translated
+
+def translate_text_chunk(text: str, tm: Dict[str, str],
+                         validate: Optional[Callable[[str], bool]] = None,
+                         context: str = "", lang: str = DEFAULT_LANGUAGE) -> Optional[str]:
+    """텍스트 청크 하나 번역 (translate_text_chunk_async를 새 이벤트 루프에서 실행)"""
+    return asyncio.run(translate_text_chunk_async(text, tm, Limiters(), validate, context, lang))
+
+async def translate_text_chunk_async(text: str, tm: Dict[str, str], limiters: Limiters,
+                                     validate: Optional[Callable[[str], bool]] = None,
+                                     context: str = "", lang: str = DEFAULT_LANGUAGE) -> Optional[str]:
+    """텍스트 청크 번역 (캐시 활용, RPM/TPM 한도 준수)
+
+    모든 공급자가 실패하거나 validate를 통과하지 못하면 None (원문을 대신 돌려주지 않음)
+    같은 TM 키의 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 받음
+    """
+    key = (id(tm), lang, context, text.strip())
+    pending = _pending.get(key)
+    if pending is not None:
+        USAGE.count("coalesced")
+        return await asyncio.shield(pending)
+    future = asyncio.get_running_loop().create_future()
+    _pending[key] = future
+    try:
+        translated = await _translate_text_chunk_async(text, tm, limiters, validate, context, lang)
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # 기다리는 쪽이 없어도 경고가 나지 않도록
+        raise
+    finally:
+        del _pending[key]
+    future.set_result(translated)
+    return translated
+
+async def _translate_text_chunk_async(text: str, tm: Dict[str, str], limiters: Limiters,
+                                      validate: Optional[Callable[[str], bool]],
+                                      context: str, lang: str) -> Optional[str]:
+    cached = _cached_or_skipped(text, tm)
+    if cached is not None:
+        return cached
+    
+    completion = None
     try:
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241218",
-            max_tokens=4000,
-            temperature=0.1,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Translate this technical content to Korean while preserving all formatting and code:\n\n{text}"
-                }
-            ]
-        )
-        
-        translated = response.content[0].text.strip()
-        
-        # 캐시에 저장
-        tm[text_key] = translated
-        return translated
-        
+        reused, params = _request_for(text, tm, context, lang)
+        if reused is not None:
+            translated = reused
+        else:
+            completion = await _complete(params, limiters, _call_kind(params), text)
+            translated = completion.text
+    except TranslationFailed as e:
+        print(f"[ERROR] 번역 실패 (모든 공급자): {e}")
+        failed_segments[text.strip()] = str(e)
+        return None
     except Exception as e:
-        print(f"[ERROR] Claude 번역 실패: {e}")
-        return text
+        print(f"[ERROR] 번역 실패: {e}")
+        failed_segments[text.strip()] = f"{type(e).__name__}: {e}"
+        return None
+    if validate is not None and not validate(translated):
+        print(f"[WARN] 자리표시자 구조 불일치: {text[:60]}...")
+        return None
+    
+    # 캐시에 저장
+    _remember(text, translated, tm, completion)
+    return translated
 
+async def retranslate_with_terms_async(text: str, previous: str, terms: List[str], tm: Dict[str, str],
+                                      limiters: Limiters,
+                                      validate: Optional[Callable[[str], bool]] = None,
+                                      context: str = "", lang: str = DEFAULT_LANGUAGE) -> Optional[str]:
+    """용어집 위반 세그먼트를 용어 지시문을 붙여 다시 번역 (위반이 줄어든 경우에만 반환/TM 교체)"""
+    glossary = glossary_for(lang)
+    try:
+        params = build_request_params(text, glossary.instruction(terms), context, lang)
+        completion = await _complete(params, limiters, "glossary", text)
+        translated = completion.text
+    except Exception as e:
+        print(f"[ERROR] Claude 재번역 실패: {e}")
+        return None
+    if validate is not None and not validate(translated):
+        return None
+    if len(glossary.missing_terms(text, translated)) >= len(glossary.missing_terms(text, previous)):
+        return None
+    _remember(text, translated, tm, completion)
+    return translated
+
+# 코드 패턴들 (하나의 정규식으로 합쳐 한 번만 컴파일)
+CODE_INDICATORS = [
+    r'^\s*[{}\[\]();]',  # 시작이 특수문자
+    r'^\s*\w+\s*[:=]\s*',  # key: value 형태
+    r'^\s*[A-Z_]+\s*=',  # 환경변수 형태
+    r'^\s*\$\s*\w+',  # shell 변수
+    r'^\s*[a-zA-Z_]\w*\(',  # 함수 호출
+    r'^\s*import\s+',  # import 문
+    r'^\s*from\s+\w+',  # from 문
+    r'^\s*def\s+\w+',  # 함수 정의
+    r'^\s*class\s+\w+',  # 클래스 정의
+    r'^\s*#.*',  # 주석
+    r'^\s*//.*',  # 주석
+    r'^\s*<!--.*-->',  # HTML 주석
+    r'^\s*<[^>]+>.*</[^>]+>$',  # HTML 태그
+]
+CODE_INDICATOR_RE = re.compile("|".join(f"(?:{p})" for p in CODE_INDICATORS), re.MULTILINE)
+
+@lru_cache(maxsize=65536)
 def is_code_or_special_format(text: str) -> bool:
-    """텍스트가 코드나 특수 형식인지 더 정확하게 판단"""
+    """텍스트가 코드나 특수 형식인지 더 정확하게 판단 (같은 텍스트는 결과 재사용)"""
     text = text.strip()
     
     # 매우 짧은 텍스트
     if len(text) < 5:
         return True
     
-    # 코드 패턴들
-    code_indicators = [
-        r'^\s*[{}\[\]();]',  # 시작이 특수문자
-        r'^\s*\w+\s*[:=]\s*',  # key: value 형태
-        r'^\s*[A-Z_]+\s*=',  # 환경변수 형태
-        r'^\s*\$\s*\w+',  # shell 변수
-        r'^\s*[a-zA-Z_]\w*\(',  # 함수 호출
-        r'^\s*import\s+',  # import 문
-        r'^\s*from\s+\w+',  # from 문
-        r'^\s*def\s+\w+',  # 함수 정의
-        r'^\s*class\s+\w+',  # 클래스 정의
-        r'^\s*#.*',  # 주석
-        r'^\s*//.*',  # 주석
-        r'^\s*<!--.*-->',  # HTML 주석
-        r'^\s*<[^>]+>.*</[^>]+>$',  # HTML 태그
-    ]
-    
-    for pattern in code_indicators:
-        if re.search(pattern, text, re.MULTILINE):
-            return True
+    if CODE_INDICATOR_RE.search(text):
+        return True
     
     # 특수 문자 비율이 높으면 코드
-    special_chars = len(re.findall(r'[{}[\]();=<>]', text))
+    special_chars = len(SPECIAL_CHAR_RE.findall(text))
     if len(text) > 10 and special_chars / len(text) > 0.15:
         return True
     
@@ -142,65 +378,428 @@ def extract_translatable_texts(soup: BeautifulSoup) -> list:
     """번역 가능한 텍스트 노드 추출 (개선된 필터링)"""
     translatable_nodes = []
     
-    for element in soup.find_all(string=True):
-        if isinstance(element, NavigableString):
-            # 기본 스킵 조건 확인
-            if should_skip_node(element):
-                continue
-                
-            text = str(element).strip()
-            if not text or len(text) < 3:
-                continue
-                
-            # 추가 코드/특수 형식 확인
-            if is_code_or_special_format(text):
-                continue
-                
-            # 부모 태그가 특정 클래스를 가진 경우 스킵
-            parent = element.parent
-            if parent and parent.get('class'):
-                classes = parent.get('class')
-                if any(cls in ['code', 'highlight', 'language-', 'hljs'] for cls in classes):
-                    continue
+    # 기본 스킵 조건은 한 번의 트리 순회로 판정
+    for element in find_unskipped_strings(soup):
+        text = str(element).strip()
+        if not text or len(text) < 3:
+            continue
+            
+        # 추가 코드/특수 형식 확인
+        if is_code_or_special_format(text):
+            continue
             
-            translatable_nodes.append(element)
+        # 부모 태그가 특정 클래스를 가진 경우 스킵
+        parent = element.parent
+        if parent and parent.get('class'):
+            classes = parent.get('class')
+            if any(cls in ['code', 'highlight', 'language-', 'hljs'] for cls in classes):
+                continue
+        
+        translatable_nodes.append(element)
     
     return translatable_nodes
 
-def translate_html(input_html: Path, output_html: Path, tm_path: Path) -> None:
-    """HTML 파일 번역 (Claude 사용)"""
-    print(f"[Claude 번역 시작] {input_html} -> {output_html}")
+async def _enforce_glossary(segments: List[Segment], translated_texts: list, tm: Dict[str, str],
+                            limiters: Limiters, concurrency: int, context: str = "",
+                            lang: str = DEFAULT_LANGUAGE, only: Optional[Set[int]] = None) -> list:
+    """번역 결과를 용어집으로 한 번에 검사하고 위반한 세그먼트만 다시 번역
+
+    only가 주어지면 그 번호의 세그먼트만 검사합니다 (이번 실행에서 새로 번역한 것만).
+    TM/저널에서 가져온 번역은 이전 실행에서 이미 검사했으므로, 고칠 수 없는 위반이
+    빌드마다 다시 요청되지 않습니다.
+    """
+    found = glossary_for(lang).violations(zip((seg.source for seg in segments), translated_texts))
+    if only is not None:
+        found = {i: terms for i, terms in found.items() if i in only}
+    if not found:
+        return translated_texts
+    indices = list(found)
+    retried = await run_in_order(
+        indices,
+        lambda i: retranslate_with_terms_async(segments[i].source, translated_texts[i], found[i], tm,
+                                               limiters, validate=segments[i].accepts, context=context,
+                                               lang=lang),
+        concurrency,
+    )
+    fixed = 0
+    translated_texts = list(translated_texts)
+    for i, text in zip(indices, retried):
+        if text is not None:
+            translated_texts[i] = text
+            fixed += 1
+    label = "" if lang == DEFAULT_LANGUAGE else f" ({lang})"
+    print(f"[용어 검사{label}] 위반 {len(found)}개 → 재번역으로 {fixed}개 개선")
+    return translated_texts
+
+def dedup_key(text: str) -> str:
+    """중복 세그먼트를 묶는 키 (앞뒤/연속 공백만 정규화, 대소문자와 자리표시자는 그대로)"""
+    return " ".join(text.split())
+
+def group_duplicates(segments: List[Segment]) -> Tuple[List[int], Dict[int, List[int]]]:
+    """원문이 같은 세그먼트를 묶어 (대표 번호 목록, 대표 번호 → 같은 원문의 번호들) 반환
+
+    대표는 문서에서 처음 나온 세그먼트입니다. 원문에 자리표시자 구조가 들어 있으므로
+    같은 원문이면 한 번역을 모두에 반영할 수 있습니다.
+    """
+    first: Dict[str, int] = {}
+    members: Dict[int, List[int]] = {}
+    for i, seg in enumerate(segments):
+        rep = first.setdefault(dedup_key(seg.source), i)
+        members.setdefault(rep, []).append(i)
+    return list(members), members
+
+async def _translate_languages(segments: List[Segment], targets: Dict[str, tuple], concurrency: int,
+                               context: str = "", limiters: Optional[Limiters] = None) -> Dict[str, list]:
+    """(세그먼트, 언어) 작업을 동시 요청 수와 속도 제한 하나를 나눠 쓰며 번역하고 언어별 결과 반환
+
+    targets는 {언어: (TM, 저널 또는 None)}. 원문이 같은 세그먼트(캡션, "Note:" 등)는 한 번만
+    번역해 모두에 나눠 줍니다. 저널에 완료로 남은 세그먼트는 TM 조회와 용어 검사 없이 기록된
+    번역을 쓰고, 새로 끝난 세그먼트는 바로 저널에 기록합니다.
+    limiters를 주면 그 속도 제한을 이어서 씀 (같은 이벤트 루프에서 여러 번 부를 때)
+    """
+    if limiters is None:
+        limiters = Limiters()
+    reps, members = group_duplicates(segments)
+    unique = [segments[i] for i in reps]
+    USAGE.count("planned", len(segments) * len(targets))
+    USAGE.count("deduplicated", (len(segments) - len(unique)) * len(targets))
+    if len(unique) < len(segments):
+        print(f"[중복 제거] 세그먼트 {len(segments)}개 → 고유 {len(unique)}개만 번역")
+    jobs = [(lang, k) for k in range(len(unique)) for lang in targets]
+
+    async def translate(job: tuple) -> Optional[str]:
+        lang, k = job
+        tm, journal = targets[lang]
+        i = reps[k]
+        if journal and i in journal.completed:
+            # 이전 실행에서 용어 검사까지 끝난 번역이므로 fresh에 넣지 않음 (재검사/API 호출 없음)
+            USAGE.count("resumed")
+            return journal.completed[i]
+        seg = unique[k]
+        if seg.source.strip() not in tm:
+            fresh[lang].add(k)
+        translated = await translate_text_chunk_async(seg.source, tm, limiters, validate=seg.accepts,
+                                                      context=context, lang=lang)
+        if journal:
+            journal.record(i, translated)
+        return translated
+
+    fresh: Dict[str, Set[int]] = {lang: set() for lang in targets}  # 이번 실행에서 TM 없이 번역한 대표
+    translated_unique = {lang: [None] * len(unique) for lang in targets}
+    for (lang, k), translated in zip(jobs, await run_in_order(jobs, translate, concurrency)):
+        translated_unique[lang][k] = translated
+    results = {}
+    for lang, (tm, journal) in targets.items():
+        checked = await _enforce_glossary(unique, translated_unique[lang], tm, limiters, concurrency,
+                                          context, lang, only=fresh[lang])
+        results[lang] = [None] * len(segments)
+        for k, i in enumerate(reps):
+            for j in members[i]:
+                # 번역하지 않고 원문을 그대로 둔 경우(짧은 텍스트/코드)는 각자의 원문 유지
+                text = segments[j].source if checked[k] == unique[k].source else checked[k]
+                results[lang][j] = text
+                if journal is None:
+                    continue
+                # 대표는 용어 검사로 바뀐 경우만, 나머지는 저널에 아직 같은 기록이 없을 때만
+                if j == i:
+                    changed = checked[k] is not translated_unique[lang][k]
+                else:
+                    changed = journal.completed.get(j) != text
+                if changed:
+                    journal.record(j, text)
+    return results
+
+async def _translate_all(segments: List[Segment], tm: Dict[str, str], concurrency: int,
+                         context: str = "", journal: Optional[TranslationJournal] = None,
+                         lang: str = DEFAULT_LANGUAGE, limiters: Optional[Limiters] = None) -> list:
+    results = await _translate_languages(segments, {lang: (tm, journal)}, concurrency, context, limiters)
+    return results[lang]
+
+def apply_translations(segments: List[Segment], translated_texts: list,
+                       applied: Optional[List[Segment]] = None) -> List:
+    """번역문을 문서 순서대로 반영하고 반영하지 못한 텍스트 노드 반환 (applied에 반영한 세그먼트를 모음)"""
+    failed_nodes = []
+    for seg, translated_text in zip(segments, translated_texts):
+        if translated_text is None or not seg.apply(translated_text):
+            failed_nodes.extend(seg.nodes)
+        elif applied is not None:
+            applied.append(seg)
+    return failed_nodes
+
+def translate_segments(segments: List[Segment], tm: Dict[str, str], concurrency: int,
+                       context: str = "", journal: Optional[TranslationJournal] = None,
+                       lang: str = DEFAULT_LANGUAGE, applied: Optional[List[Segment]] = None,
+                       limiters: Optional[Limiters] = None, run: Callable = asyncio.run) -> List:
+    """세그먼트를 동시 번역해 문서 순서대로 반영하고, 반영하지 못한 텍스트 노드 반환
+
+    run은 코루틴을 실행할 함수 (기본은 새 이벤트 루프, TranslationSession은 자기 루프)
+    """
+    translated_texts = run(_translate_all(segments, tm, concurrency, context, journal, lang, limiters))
+    return apply_translations(segments, translated_texts, applied)
+
+def plan_segments(soup: BeautifulSoup, segment_mode: str, verbose: bool = True) -> List[Segment]:
+    """번역 대상 텍스트 노드를 추출해 번역 단위로 묶음 (언어와 무관하므로 한 번만)"""
+    # 번역 가능한 텍스트 노드 추출
+    translatable_nodes = extract_translatable_texts(soup)
     
-    # 번역 메모리 로드
-    tm = load_translation_memory(tm_path)
-    initial_tm_size = len(tm)
+    # 번역 단위 구성 (블록 안의 인라인 태그는 자리표시자로)
+    segments = build_segments(translatable_nodes, mode=segment_mode)
+    if verbose:
+        block_count = sum(1 for seg in segments if seg.kind == "block")
+        print(f"[번역 대상] {len(translatable_nodes)}개 텍스트 노드")
+        print(f"[세그먼트] {len(segments)}개 번역 단위 (블록 {block_count}개)")
+    return segments
+
+def _retry_failed_nodes(failed_nodes: List, tm: Dict[str, str], concurrency: int, context: str = "",
+                        lang: str = DEFAULT_LANGUAGE, applied: Optional[List[Segment]] = None,
+                        limiters: Optional[Limiters] = None, run: Callable = asyncio.run) -> None:
+    # 번역/구조 복원에 실패한 블록은 텍스트 노드 단위로 다시 번역
+    if failed_nodes:
+        print(f"[세그먼트] 번역/구조 복원 실패 → {len(failed_nodes)}개 노드를 개별 번역")
+        remaining = translate_segments(build_segments(failed_nodes, mode="node"), tm, concurrency, context,
+                                       lang=lang, applied=applied, limiters=limiters, run=run)
+        _record_untranslated(remaining)
+
+def translate_soup(soup: BeautifulSoup, tm: Dict[str, str], concurrency: int,
+                   segment_mode: str, verbose: bool = True, context: str = "",
+                   journal: Optional[TranslationJournal] = None, lang: str = DEFAULT_LANGUAGE) -> int:
+    """파싱된 HTML(또는 그 일부)을 제자리에서 번역하고 번역 단위 수를 반환
+
+    journal을 주면 세그먼트 계획을 기록하고 끝난 세그먼트마다 체크포인트를 남김
+    """
+    segments = plan_segments(soup, segment_mode, verbose)
+    if journal is not None:
+        journal.start([seg.source for seg in segments])
     
-    # HTML 파싱
+    # 동시 번역 처리 (결과는 문서 순서대로 반영)
+    failed_nodes = translate_segments(segments, tm, concurrency, context, journal, lang)
+    _retry_failed_nodes(failed_nodes, tm, concurrency, context, lang)
+    return len(segments)
+
+def _record_untranslated(nodes: List) -> None:
+    # 끝내 번역하지 못하고 영어로 남은 텍스트 노드 (실행이 끝나면 보고서로 남김)
+    for node in nodes:
+        text = str(node).strip()
+        untranslated.append({"text": text, "error": failed_segments.get(text, "자리표시자 구조 불일치")})
+    if nodes:
+        USAGE.count("untranslated", len(nodes))
+
+def _report_tm(tm: TranslationMemory, initial_tm_size: int, label: str = "") -> None:
+    new_entries = len(tm) - initial_tm_size
+    print(f"[TM 업데이트{label}] {new_entries}개 새 항목 추가 (총 {len(tm)}개)")
+
+def target_languages(languages: Optional[List[str]] = None) -> List[str]:
+    """번역 언어 목록 확인 (기본 ["ko"], 중복 제거, 모르는 언어면 ValueError)"""
+    languages = list(dict.fromkeys(languages or [DEFAULT_LANGUAGE]))
+    unknown = [lang for lang in languages if lang not in LANGUAGES]
+    if unknown:
+        raise ValueError(f"지원하지 않는 번역 언어: {', '.join(unknown)} (가능: {', '.join(LANGUAGES)})")
+    return languages
+
+def translate_html(input_html: Path, output_html: Path, tm_path: Path,
+                   concurrency: int = TRANSLATE_CONCURRENCY,
+                   segment_mode: str = SEGMENT_MODE, context: str = "",
+                   resume: bool = False, languages: Optional[List[str]] = None) -> None:
+    """HTML 파일 번역 (Claude 사용, 최대 concurrency개 요청 동시 처리)
+
+    segment_mode="block"이면 문단/목록/제목/표 셀 단위로, "node"면 텍스트 노드 단위로 번역
+    context는 시스템 프롬프트 뒤에 붙는 챕터 설명 (요청마다 같아 캐시됨)
+    세그먼트마다 <출력>.journal.jsonl에 체크포인트를 남기고, resume이면 중단된 곳부터 이어서 번역
+    languages(기본 ["ko"])가 여럿이면 파싱/세그먼트 분할은 한 번만 하고, 모든 (세그먼트, 언어)
+    요청이 같은 동시 요청 수/속도 제한을 나눠 씀. 출력/TM/저널 파일은 language_path로 언어별로 나뉨
+    """
+    languages = target_languages(languages)
+    print(f"[Claude 번역 시작] {input_html} ({', '.join(languages)})")
     with open(input_html, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'lxml')
+        html_text = f.read()
+    soup = BeautifulSoup(html_text, 'lxml')
+    translate_document(soup, output_html, tm_path, concurrency, segment_mode, context, resume,
+                       languages, input_text=html_text)
+
+def translate_document(soup: BeautifulSoup, output_html: Path, tm_path: Path,
+                       concurrency: int = TRANSLATE_CONCURRENCY,
+                       segment_mode: str = SEGMENT_MODE, context: str = "",
+                       resume: bool = False, languages: Optional[List[str]] = None,
+                       input_text: str = "", write_output: bool = True,
+                       on_output: Optional[Callable[[str, BeautifulSoup, Path], None]] = None) -> None:
+    """파싱된 트리를 언어별로 번역 (translate_html의 본체, 파일을 읽지 않음)
+
+    언어마다 번역을 트리에 반영한 상태에서 출력 HTML을 쓰고(write_output) on_output(언어, 트리,
+    출력 경로)를 부른 뒤 원문으로 되돌립니다. 렌더링처럼 다음 단계가 트리를 바로 쓰면
+    write_output=False로 직렬화/재파싱을 건너뛸 수 있습니다. 끝나면 트리는 원문 상태입니다.
+    input_text는 재개 저널이 같은 입력인지 확인하는 데 씁니다 (비우면 세그먼트 계획으로만 확인).
+    """
+    languages = target_languages(languages)
+    outputs = {lang: language_path(output_html, lang) for lang in languages}
     
-    # 번역 가능한 텍스트 노드 추출
-    translatable_nodes = extract_translatable_texts(soup)
-    print(f"[번역 대상] {len(translatable_nodes)}개 텍스트 노드")
+    # 세그먼트 분할은 언어 수와 관계없이 한 번만
+    segments = plan_segments(soup, segment_mode)
     
-    # 개별 번역 처리 (더 정확한 컨텍스트 유지를 위해)
-    for i, node in enumerate(translatable_nodes, 1):
-        if i % 50 == 0:
-            print(f"[진행률] {i}/{len(translatable_nodes)} 노드 처리 중...")
+    # 언어별 번역 메모리와 저널
+    targets = {}
+    try:
+        for lang in languages:
+            tm = load_translation_memory(tm_path, lang)
+            journal = TranslationJournal(journal_path(outputs[lang]), input_text, resume, model=CLAUDE_MODEL,
+                                         prompt_version=prompt_version_for(lang), context=context)
+            targets[lang] = (tm, journal)
+            journal.start([seg.source for seg in segments])
+        del input_text
+        initial_sizes = {lang: len(tm) for lang, (tm, _) in targets.items()}
         
-        original_text = str(node).strip()
-        translated_text = translate_text_chunk(original_text, tm)
+        USAGE.log_path = usage_log_path(tm_path)
+        results = asyncio.run(_translate_languages(segments, targets, concurrency, context))
         
-        if translated_text != original_text:
-            node.replace_with(translated_text)
+        # 언어마다 같은 트리에 번역을 반영해 저장하고 원문으로 되돌림 (트리를 복사하지 않음)
+        for lang, (tm, journal) in targets.items():
+            label = "" if len(languages) == 1 else f" {lang}"
+            untranslated.clear()
+            applied: List[Segment] = []
+            failed_nodes = apply_translations(segments, results[lang], applied)
+            _retry_failed_nodes(failed_nodes, tm, concurrency, context, lang, applied)
+            
+            save_translation_memory(language_path(tm_path, lang), tm)
+            _report_tm(tm, initial_sizes[lang], label)
+            write_failure_report(outputs[lang], untranslated)
+            
+            # 번역된 HTML 저장 (모두 끝난 뒤 한 번만, 실패가 없으면 저널은 더 필요 없음)
+            if write_output:
+                with open(outputs[lang], 'w', encoding='utf-8') as f:
+                    f.write(str(soup))
+            if on_output:
+                on_output(lang, soup, outputs[lang])
+            journal.close(remove=not untranslated)
+            for seg in reversed(applied):
+                seg.revert()
+            print(f"[Claude 번역 완료] {outputs[lang] if write_output else lang}")
+    finally:
+        for tm, journal in targets.values():
+            journal.close()
+            tm.close()
     
-    # 번역 메모리 저장
-    save_translation_memory(tm_path, tm)
-    new_entries = len(tm) - initial_tm_size
-    print(f"[TM 업데이트] {new_entries}개 새 항목 추가 (총 {len(tm)}개)")
+    if fuzzy_stats["reused"] or fuzzy_stats["revised"]:
+        print(f"[유사 TM] 그대로 재사용 {fuzzy_stats['reused']}개 / 이전 번역 수정 요청 {fuzzy_stats['revised']}개")
+    if USAGE.calls:
+        print(f"[프롬프트 캐시] {USAGE.report()}")
+
+class TranslationSession:
+    """여러 트리(챕터)를 차례로 번역하며 TM, 속도 제한, 이벤트 루프를 나눠 쓰는 번역기
+
+    기본 빌드의 챕터 파이프라인이 번역 단계 스레드에서 챕터마다 translate()를 부릅니다.
+    앞 챕터의 번역은 TM에 들어가 있으므로 챕터가 달라도 같은 원문은 한 번만 요청합니다.
+    저널은 journal_dir 아래에 챕터/언어별로 남기고, resume이면 끝난 세그먼트를 건너뜁니다.
+    TM/사용량 보고와 실패 보고서(report_html의 언어별 경로 기준)는 finish()에서 한 번에 남깁니다.
+    """
+
+    def __init__(self, tm_path: Path, journal_dir: Path, report_html: Path,
+                 concurrency: int = TRANSLATE_CONCURRENCY, segment_mode: str = SEGMENT_MODE,
+                 context: str = "", resume: bool = False, languages: Optional[List[str]] = None):
+        self.languages = target_languages(languages)
+        self.tm_path = tm_path
+        self.journal_dir = journal_dir
+        self.report_html = report_html
+        self.concurrency = concurrency
+        self.segment_mode = segment_mode
+        self.context = context
+        self.resume = resume
+        self.limiters = Limiters()
+        self.untranslated: Dict[str, List[Dict[str, str]]] = {lang: [] for lang in self.languages}
+        self.tms = {lang: load_translation_memory(tm_path, lang) for lang in self.languages}
+        self.initial_sizes = {lang: len(tm) for lang, tm in self.tms.items()}
+        # 리미터는 이벤트 루프에 묶이므로 모든 챕터를 같은 루프에서 실행
+        self._loop = asyncio.new_event_loop()
+        USAGE.log_path = usage_log_path(tm_path)
+
+    def translate(self, soup: BeautifulSoup, name: str,
+                  on_output: Callable[[str, BeautifulSoup], None]) -> int:
+        """트리 하나를 언어별로 번역해 on_output(언어, 번역된 트리)을 부르고 원문으로 되돌림 (세그먼트 수 반환)"""
+        input_text = str(soup)
+        segments = plan_segments(soup, self.segment_mode, verbose=False)
+        targets = {}
+        try:
+            for lang in self.languages:
+                journal = TranslationJournal(self.journal_dir / f"{name}.{lang}.journal.jsonl", input_text,
+                                             self.resume, model=CLAUDE_MODEL,
+                                             prompt_version=prompt_version_for(lang), context=self.context)
+                targets[lang] = (self.tms[lang], journal)
+                journal.start([seg.source for seg in segments])
+            results = self._loop.run_until_complete(
+                _translate_languages(segments, targets, self.concurrency, self.context, self.limiters))
+            for lang, (tm, journal) in targets.items():
+                untranslated.clear()
+                applied: List[Segment] = []
+                failed_nodes = apply_translations(segments, results[lang], applied)
+                _retry_failed_nodes(failed_nodes, tm, self.concurrency, self.context, lang, applied,
+                                    self.limiters, self._loop.run_until_complete)
+                self.untranslated[lang].extend(untranslated)
+                on_output(lang, soup)
+                journal.close(remove=not untranslated)
+                for seg in reversed(applied):
+                    seg.revert()
+        finally:
+            for _, journal in targets.values():
+                journal.close()
+        return len(segments)
+
+    def finish(self) -> None:
+        """모든 챕터를 번역한 뒤 TM 저장, 언어별 실패 보고서와 사용량 요약 출력"""
+        for lang, tm in self.tms.items():
+            label = "" if len(self.languages) == 1 else f" {lang}"
+            save_translation_memory(language_path(self.tm_path, lang), tm)
+            _report_tm(tm, self.initial_sizes[lang], label)
+            write_failure_report(language_path(self.report_html, lang), self.untranslated[lang])
+        if fuzzy_stats["reused"] or fuzzy_stats["revised"]:
+            print(f"[유사 TM] 그대로 재사용 {fuzzy_stats['reused']}개 / 이전 번역 수정 요청 {fuzzy_stats['revised']}개")
+        if USAGE.calls:
+            print(f"[프롬프트 캐시] {USAGE.report()}")
+
+    def close(self) -> None:
+        for tm in self.tms.values():
+            tm.close()
+        self._loop.close()
+
+    def __enter__(self) -> "TranslationSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def translate_html_streaming(input_html: Path, output_html: Path, tm_path: Path,
+                             concurrency: int = TRANSLATE_CONCURRENCY,
+                             segment_mode: str = SEGMENT_MODE,
+                             window_chars: int = STREAM_WINDOW_CHARS, context: str = "") -> None:
+    """translate_html의 스트리밍 버전 (메모리 사용량이 책 크기와 무관)
+
+    본문 최상위 블록을 window_chars 글자 안팎씩 읽어 번역하고 바로 출력 파일에
+    이어 씁니다. 창 안에서는 translate_html과 같은 방식으로 동시 번역합니다.
+    """
+    print(f"[Claude 스트리밍 번역 시작] {input_html} -> {output_html}")
+    tm = load_translation_memory(tm_path)
+    initial_tm_size = len(tm)
     
-    # 번역된 HTML 저장
-    with open(output_html, 'w', encoding='utf-8') as f:
-        f.write(str(soup))
+    USAGE.log_path = usage_log_path(tm_path)
+    untranslated.clear()
+    windows = segments = 0
+    tmp = output_html.with_suffix(output_html.suffix + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as out:
+        for kind, parts in iter_windows(input_html, window_chars):
+            if kind != "window":
+                out.write("".join(parts))
+                continue
+            soup = BeautifulSoup("<html><body>" + "".join(parts) + "</body></html>", 'lxml')
+            segments += translate_soup(soup, tm, concurrency, segment_mode, verbose=False,
+                                       context=context)
+            out.write("".join(str(c) for c in soup.body.contents))
+            windows += 1
+            print(f"[스트리밍] {windows}번째 창 완료 (블록 {len(parts)}개, 누적 세그먼트 {segments}개)")
+    tmp.replace(output_html)
     
+    save_translation_memory(tm_path, tm)
+    _report_tm(tm, initial_tm_size)
+    if fuzzy_stats["reused"] or fuzzy_stats["revised"]:
+        print(f"[유사 TM] 그대로 재사용 {fuzzy_stats['reused']}개 / 이전 번역 수정 요청 {fuzzy_stats['revised']}개")
+    if USAGE.calls:
+        print(f"[프롬프트 캐시] {USAGE.report()}")
+    tm.close()
+    write_failure_report(output_html, untranslated)
     print(f"[Claude 번역 완료] {output_html}")
@@ -0,0 +1,97 @@
+"""번역 작업 저널 (중단된 translate_html을 --resume으로 이어서 하기)
+
+번역을 시작하면 출력 HTML 옆(<출력>.journal.jsonl)에 입력 HTML 해시, 모델/프롬프트
+버전, 세그먼트 계획(원문 목록의 해시와 개수)을 머리 줄로 쓰고, 세그먼트가 끝날
+때마다 한 줄씩 덧붙입니다 (줄마다 flush하므로 중간에 죽어도 그때까지는 남음).
+
+    {"i": 12, "status": "done", "text": "번역"}
+    {"i": 13, "status": "failed"}
+
+resume이면 머리 줄이 지금 입력/계획과 같을 때만 이어서 하고, 완료된 세그먼트는
+TM 조회도 API 호출도 없이 기록된 번역을 그대로 씁니다. 다르면 새로 시작합니다.
+모든 세그먼트가 번역되면 저널을 지우고, 실패가 남으면 다음 --resume이 실패한
+세그먼트만 다시 시도하도록 남겨 둡니다.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+def journal_path(output_html: Path) -> Path:
+    """번역 저널 파일 (출력 HTML 옆의 <이름>.journal.jsonl)"""
+    return output_html.with_suffix(".journal.jsonl")
+
+def _sha256(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+class TranslationJournal:
+    """세그먼트별 완료 기록 (start로 계획을 확정한 뒤 record로 하나씩 덧붙임)"""
+
+    def __init__(self, path: Path, input_text: str, resume: bool = False, **version: str):
+        self.path = path
+        self.resume = resume
+        self.header = {"input_sha256": _sha256(input_text), **version}
+        self.completed: Dict[int, str] = {}  # 세그먼트 번호 → 번역 (이번 실행에서 건너뜀)
+        self._file = None
+
+    def _load(self, header: Dict) -> bool:
+        # 머리 줄이 같으면 완료 기록을 읽어 이어서 쓸 준비 (마지막 줄이 잘렸으면 무시)
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        try:
+            if not lines or json.loads(lines[0]) != header:
+                return False
+        except json.JSONDecodeError:
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("status") == "done":
+                self.completed[entry["i"]] = entry["text"]
+            else:
+                self.completed.pop(entry["i"], None)
+        return True
+
+    def start(self, sources: List[str]) -> None:
+        """세그먼트 계획을 확정 (resume이고 저널이 같은 작업이면 이어서, 아니면 새로 기록)"""
+        header = {**self.header, "segments": len(sources), "plan_sha256": _sha256(*sources)}
+        if self.resume and self.path.exists() and self._load(header):
+            print(f"[재개] 완료된 세그먼트 {len(self.completed)}/{len(sources)}개는 건너뜀 ({self.path})")
+        else:
+            if self.resume:
+                print("[재개] 이어서 할 저널 없음 (없거나 입력/계획이 바뀜) - 처음부터 번역")
+            self.completed = {}
+        # 완료 기록만 남겨 새로 씀 (중단 때 잘린 마지막 줄 뒤에 이어 쓰지 않도록)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write(header)
+        for index, translated in sorted(self.completed.items()):
+            self.record(index, translated)
+
+    def _write(self, entry: Dict) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def record(self, index: int, translated: Optional[str]) -> None:
+        """세그먼트 하나의 결과 기록 (None이면 실패: 다음 재개 때 다시 시도)"""
+        if self._file is None:
+            return
+        if translated is None:
+            self._write({"i": index, "status": "failed"})
+        else:
+            self._write({"i": index, "status": "done", "text": translated})
+
+    def close(self, remove: bool = False) -> None:
+        """저널을 닫음 (remove면 끝난 작업이므로 파일 삭제)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove:
+            self.path.unlink(missing_ok=True)
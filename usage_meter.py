@@ -0,0 +1,158 @@
+"""API 호출별 사용량 기록 (지연 시간, 재시도, 토큰, 프롬프트 캐시 적중률)
+
+응답마다 지연 시간/재시도 횟수/주고받은 바이트/토큰(캐시 읽기·쓰기 포함)을
+기록하고, TM 적중·미스 같은 카운터도 함께 모읍니다. 캐시 적중률은 입력 토큰 중
+캐시에서 읽은 비율입니다.
+    캐시 읽기 / (캐시 읽기 + 캐시 쓰기 + 일반 입력)
+
+재시도 횟수는 HTTP 요청 훅(http_event_hooks)으로 호출마다 실제 요청 수를 세어
+알아냅니다 (SDK/공급자 계층의 재시도, failover, hedge 요청 포함). 호출은 asyncio
+태스크/스레드마다 따로 세어집니다.
+"""
+
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+# 진행 중인 호출의 HTTP 요청 수 (track 안에서만 설정됨)
+_attempts: ContextVar[Optional[List[int]]] = ContextVar("_attempts", default=None)
+
+def _count_attempt(request) -> None:
+    box = _attempts.get()
+    if box is not None:
+        box[0] += 1
+
+async def _count_attempt_async(request) -> None:
+    _count_attempt(request)
+
+def http_event_hooks(is_async: bool = False) -> Dict[str, list]:
+    """SDK httpx 클라이언트에 넣는 훅 (재시도를 포함한 실제 요청 수를 셈)"""
+    return {"request": [_count_attempt_async if is_async else _count_attempt]}
+
+def _request_bytes(params: dict) -> int:
+    # 시스템 블록 + 메시지 텍스트의 UTF-8 바이트 수
+    system = params.get("system") or ""
+    texts = [system] if isinstance(system, str) else [b.get("text", "") for b in system]
+    for message in params.get("messages", []):
+        content = message.get("content")
+        texts += [content] if isinstance(content, str) else [b.get("text", "") for b in content or []]
+    return sum(len(t.encode("utf-8")) for t in texts)
+
+def _response_bytes(response) -> int:
+    text = getattr(response, "text", None)
+    if isinstance(text, str):
+        return len(text.encode("utf-8"))
+    content = getattr(response, "content", None) or []
+    return sum(len((getattr(block, "text", "") or "").encode("utf-8")) for block in content)
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))], 3)
+
+class CallTracker:
+    """track()가 넘겨주는 호출 하나 (응답을 받으면 response에 넣음)"""
+
+    def __init__(self):
+        self.response = None
+        self.extra: Dict = {}  # 기록에 더 넣을 값 (예: 응답한 공급자)
+
+class UsageMeter:
+    """호출별 사용량 기록기 (스레드/코루틴 어디서 불러도 안전)"""
+
+    def __init__(self, log_path: Optional[Path] = None):
+        self.log_path = log_path
+        self.calls: List[Dict] = []
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, response, kind: str = "translate", **extra) -> Dict:
+        """응답 하나의 usage를 기록 (usage나 캐시 필드가 없는 SDK/서버는 0으로 셈)"""
+        usage = getattr(response, "usage", None)
+        entry = {"ts": round(time.time(), 3), "kind": kind}
+        for field in USAGE_FIELDS:
+            entry[field] = int(getattr(usage, field, 0) or 0)
+        entry.update(extra)
+        with self._lock:
+            self.calls.append(entry)
+            if self.log_path is not None:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        return entry
+
+    @contextmanager
+    def track(self, params: dict, kind: str = "translate") -> Iterator[CallTracker]:
+        """API 호출 하나를 감싸 지연 시간/재시도/바이트와 함께 기록 (실패도 기록 후 다시 던짐)
+
+            with USAGE.track(params) as call:
+                call.response = client.messages.create(**params)
+        """
+        call = CallTracker()
+        box = [0]
+        token = _attempts.set(box)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield call
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _attempts.reset(token)
+            self.record(call.response, kind,
+                        latency_s=round(time.perf_counter() - start, 4),
+                        retries=max(box[0] - 1, 0),
+                        bytes_in=_request_bytes(params),
+                        bytes_out=_response_bytes(call.response),
+                        error=error, **call.extra)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """TM 적중/미스 같은 카운터 증가"""
+        with self._lock:
+            self.counters[name] += n
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = []
+            self.counters = Counter()
+
+    def summary(self) -> Dict:
+        with self._lock:
+            calls = list(self.calls)
+            counters = dict(self.counters)
+        totals = {field: sum(c[field] for c in calls) for field in USAGE_FIELDS}
+        read = totals["cache_read_input_tokens"]
+        prompt = read + totals["cache_creation_input_tokens"] + totals["input_tokens"]
+        latencies = [c["latency_s"] for c in calls if "latency_s" in c]
+        planned = counters.get("planned", 0)
+        return {
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if c.get("error")),
+            "retries": sum(c.get("retries", 0) for c in calls),
+            "bytes_in": sum(c.get("bytes_in", 0) for c in calls),
+            "bytes_out": sum(c.get("bytes_out", 0) for c in calls),
+            **totals,
+            "cache_hit_calls": sum(1 for c in calls if c["cache_read_input_tokens"]),
+            "cache_hit_rate": round(read / prompt, 4) if prompt else 0.0,
+            "latency_p50_s": round(statistics.median(latencies), 3) if latencies else None,
+            "latency_p95_s": _percentile(latencies, 0.95),
+            # 번역 단위 중 같은 원문이 앞에 있어 따로 번역하지 않은 비율
+            "dedup_ratio": round(counters.get("deduplicated", 0) / planned, 4) if planned else 0.0,
+            "counters": counters,
+        }
+
+    def report(self) -> str:
+        s = self.summary()
+        return (f"호출 {s['calls']}회, 입력 {s['input_tokens']} / 캐시 쓰기 {s['cache_creation_input_tokens']}"
+                f" / 캐시 읽기 {s['cache_read_input_tokens']} 토큰 → 적중률 {s['cache_hit_rate']:.1%}"
+                f" (캐시 적중 호출 {s['cache_hit_calls']}회)")
@@ -1,8 +1,7 @@
 import re
-import base64
-from pathlib import Path
-from bs4 import BeautifulSoup, NavigableString
-from typing import Union
+from functools import lru_cache
+from bs4 import NavigableString, Tag
+from typing import List, Union
 
 # 모노스페이스 폰트 목록
 MONO_FONTS = [
@@ -10,42 +9,52 @@ MONO_FONTS = [
     "dejavu sans mono", "liberation mono", "source code pro"
 ]
 
+# 코드 패턴들 (하나의 정규식으로 합쳐 한 번만 컴파일)
+CODE_PATTERNS = [
+    r'^\w+\(\)',  # function()
+    r'^\w+\.\w+',  # object.method
+    r'[{}[\]();]',  # 괄호, 중괄호 등
+    r'^\$\s',  # shell command
+    r'^[A-Z_]+=["\']',  # environment variable
+    r'^\w+:',  # key: value
+    r'import\s+\w+',  # import statement
+    r'from\s+\w+',  # from statement
+    r'def\s+\w+',  # function definition
+    r'class\s+\w+',  # class definition
+    r'^\s*#\s',  # comment
+    r'^\s*//',  # comment
+    r'^\s*<!--',  # HTML comment
+    r'^\s*\*\s',  # documentation
+]
+CODE_RE = re.compile("|".join(f"(?:{p})" for p in CODE_PATTERNS), re.MULTILINE)
+SPECIAL_CHAR_RE = re.compile(r'[{}[\]();=<>]')
+
+# 안쪽 텍스트를 모두 코드로 보는 태그
+CODE_TAGS = frozenset(("code", "pre", "kbd", "samp"))
+
+@lru_cache(maxsize=65536)
 def is_codey_text(text: str) -> bool:
-    """텍스트가 코드처럼 보이는지 휴리스틱으로 판단"""
+    """텍스트가 코드처럼 보이는지 휴리스틱으로 판단 (같은 텍스트는 결과 재사용)"""
     if not text or len(text.strip()) < 3:
         return False
     
     text = text.strip()
     
-    # 코드 패턴들
-    code_patterns = [
-        r'^\w+\(\)',  # function()
-        r'^\w+\.\w+',  # object.method
-        r'[{}[\]();]',  # 괄호, 중괄호 등
-        r'^\$\s',  # shell command
-        r'^[A-Z_]+=["\']',  # environment variable
-        r'^\w+:',  # key: value
-        r'import\s+\w+',  # import statement
-        r'from\s+\w+',  # from statement
-        r'def\s+\w+',  # function definition
-        r'class\s+\w+',  # class definition
-        r'^\s*#\s',  # comment
-        r'^\s*//',  # comment
-        r'^\s*<!--',  # HTML comment
-        r'^\s*\*\s',  # documentation
-    ]
-    
-    for pattern in code_patterns:
-        if re.search(pattern, text, re.MULTILINE):
-            return True
+    if CODE_RE.search(text):
+        return True
     
     # 특수 문자 비율이 높으면 코드일 가능성
-    special_chars = len(re.findall(r'[{}[\]();=<>]', text))
+    special_chars = len(SPECIAL_CHAR_RE.findall(text))
     if len(text) > 10 and special_chars / len(text) > 0.1:
         return True
     
     return False
 
+def is_monospace_tag(tag: Tag) -> bool:
+    """인라인 style에 monospace 계열 font-family가 지정된 태그인지 확인"""
+    style = (tag.get("style", "") or "").lower()
+    return "font-family" in style and any(m in style for m in MONO_FONTS)
+
 def should_skip_node(node: NavigableString) -> bool:
     """번역을 건너뛸 노드인지 판단"""
     if not isinstance(node, NavigableString):
@@ -54,7 +63,7 @@ def should_skip_node(node: NavigableString) -> bool:
     parents = [p.name for p in node.parents if getattr(p, "name", None)]
     
     # 코드 관련 태그는 스킵
-    if any(p in ("code", "pre", "kbd", "samp") for p in parents):
+    if any(p in CODE_TAGS for p in parents):
         return True
     
     # 테이블 셀에서 코드 같은 텍스트면 스킵
@@ -64,44 +73,37 @@ def should_skip_node(node: NavigableString) -> bool:
     
     # monospace 스타일 확인
     parent = node.parent
-    if parent:
-        style = (parent.get("style", "") or "").lower()
-        if "font-family" in style and any(m in style for m in MONO_FONTS):
-            return True
+    if parent and is_monospace_tag(parent):
+        return True
     
     return is_codey_text(str(node))
 
-def inline_images_as_data_uri(soup: BeautifulSoup, base_dir: Path) -> None:
-    """HTML의 이미지를 data URI로 인라인화"""
-    for img in soup.find_all("img"):
-        src = img.get("src")
-        if not src or src.startswith("data:"):
-            continue
-        
-        img_path = base_dir / src
-        if not img_path.exists():
-            continue
-        
-        try:
-            with open(img_path, "rb") as f:
-                img_data = f.read()
-            
-            # 파일 확장자로 MIME 타입 추정
-            ext = img_path.suffix.lower()
-            mime_type = {
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.svg': 'image/svg+xml',
-                '.webp': 'image/webp'
-            }.get(ext, 'image/jpeg')
-            
-            b64_data = base64.b64encode(img_data).decode('utf-8')
-            data_uri = f"data:{mime_type};base64,{b64_data}"
-            img["src"] = data_uri
-            
-        except Exception as e:
-            print(f"[WARN] 이미지 인라인 실패: {img_path} - {e}")
-            continue
+def find_unskipped_strings(root: Tag) -> List[NavigableString]:
+    """should_skip_node가 False인 텍스트 노드를 문서 순서대로 한 번의 순회로 수집
 
+    노드마다 부모 목록을 만드는 대신, 위에서 아래로 내려가며 코드 태그 안인지와
+    직계 부모의 monospace 여부를 물려줍니다. (표 셀 안의 코드 판정은 마지막
+    is_codey_text 검사와 같으므로 따로 추적하지 않음)
+    결과는 `[n for n in root.find_all(string=True) if not should_skip_node(n)]`와 같습니다.
+    """
+    found: List[NavigableString] = []
+    in_code = getattr(root, "name", None) in CODE_TAGS or any(
+        p.name in CODE_TAGS for p in root.parents
+    )
+    stack = [(iter(root.contents), in_code, is_monospace_tag(root))]
+    while stack:
+        children, in_code, mono = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        if isinstance(child, NavigableString):
+            if not in_code and not mono and not is_codey_text(str(child)):
+                found.append(child)
+        elif isinstance(child, Tag):
+            stack.append((
+                iter(child.contents),
+                in_code or child.name in CODE_TAGS,
+                is_monospace_tag(child),
+            ))
+    return found
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""원고 감시 모드: docx가 바뀌면 그 챕터만 다시 변환/번역하고 미리보기를 새로고침
+
+SRC_DIR을 감시하다가 docx가 저장되면 원고 색인(source_index)으로 실제 내용이
+바뀐 파일만 골라, 챕터 증분 빌드와 같은 캐시(work/cache)에 변환/번역 HTML을
+만듭니다. 번역은 TM을 그대로 쓰므로 고친 문단만 API로 갑니다. 결과는 로컬
+미리보기 서버로 보여 주고, 다시 만들어진 챕터를 열어 둔 브라우저는 SSE로
+알림을 받아 스스로 새로고침합니다. PDF는 만들지 않습니다 (main.py로 빌드).
+
+    python watch.py                     # http://127.0.0.1:8800 에서 미리보기
+    python watch.py --no-translate      # 변환만 (원문 HTML 미리보기)
+
+watchdog이 설치되어 있으면 파일 시스템 알림(inotify/FSEvents)을 쓰고, 없으면
+WATCH_POLL_S 간격으로 docx의 크기/수정 시각만 확인합니다.
+"""
+
+import argparse
+import html
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from build_order import build_order
+from cfg import PREVIEW_PORT, SOURCE_MANIFEST, SRC_DIR, WATCH_POLL_S, WORK
+from source_index import SourceIndex
+
+# 미리보기 페이지에 넣는 새로고침 스크립트 (이 챕터가 다시 만들어지면 reload)
+RELOAD_SCRIPT = """<script>
+new EventSource("/events").onmessage = function (e) {
+  if (e.data === "%s" || "%s" === "index") location.reload();
+};
+</script>"""
+
+CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".png": "image/png", ".jpg": "image/jpeg",
+                 ".jpeg": "image/jpeg", ".gif": "image/gif", ".svg": "image/svg+xml", ".css": "text/css"}
+
+class PreviewServer:
+    """챕터별 HTML을 보여 주고 다시 만들어지면 SSE로 알리는 미리보기 서버 (백그라운드 스레드)"""
+
+    def __init__(self, root: Path = WORK, host: str = "127.0.0.1", port: int = PREVIEW_PORT):
+        self.root = Path(root).resolve()  # 이미지 등 정적 파일을 내보내는 폴더
+        self.pages: List[tuple] = []  # (제목, HTML 경로) - 책 순서
+        self.version = 0
+        self.history: List[str] = []  # 버전마다 바뀐 것 (history[v - 1]이 버전 v)
+        self._changed = threading.Condition()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/":
+                    self._reply(200, server.index_html().encode("utf-8"), CONTENT_TYPES[".html"])
+                elif path.startswith("/chapter/"):
+                    page = server.chapter_html(path[len("/chapter/"):])
+                    if page is None:
+                        self._reply(404, b"not found", "text/plain")
+                    else:
+                        self._reply(200, page.encode("utf-8"), CONTENT_TYPES[".html"])
+                elif path == "/events":
+                    self._events()
+                else:
+                    self._static(path)
+
+            def _reply(self, status: int, data: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _static(self, path: str):
+                target = (server.root / path.lstrip("/")).resolve()
+                if not target.is_relative_to(server.root) or not target.is_file():
+                    self._reply(404, b"not found", "text/plain")
+                    return
+                content_type = CONTENT_TYPES.get(target.suffix.lower(), "application/octet-stream")
+                self._reply(200, target.read_bytes(), content_type)
+
+            def _events(self):
+                seen = server.version  # 헤더를 보내기 전에 잡아야 그 사이 알림을 놓치지 않음
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                try:
+                    while True:
+                        version, changed = server.wait_for_change(seen, timeout=15)
+                        # 그사이 바뀐 것을 모두 보냄 (없으면 연결 유지용 주석만)
+                        message = "".join(f"data: {c}\n\n" for c in changed) or ": ping\n\n"
+                        seen = version
+                        self.wfile.write(message.encode("utf-8"))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def publish(self, pages: List[tuple], changed: str) -> None:
+        """목차를 바꾸고 열려 있는 페이지에 changed(챕터 번호 또는 "index")를 알림"""
+        with self._changed:
+            self.pages = list(pages)
+            self.version += 1
+            self.history.append(changed)
+            self._changed.notify_all()
+
+    def wait_for_change(self, seen: int, timeout: float) -> tuple:
+        """seen 버전 뒤로 바뀐 것들을 (현재 버전, 바뀐 것 목록)으로 반환 (timeout이면 빈 목록)"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != seen, timeout)
+            return self.version, self.history[seen:]
+
+    def index_html(self) -> str:
+        items = "".join(f'<li><a href="/chapter/{i}">{html.escape(title)}</a></li>'
+                        for i, (title, _) in enumerate(self.pages))
+        return (f"<html><head><meta charset='utf-8'><title>미리보기</title></head><body>"
+                f"<h1>미리보기</h1><ol>{items}</ol>{RELOAD_SCRIPT % ('index', 'index')}</body></html>")
+
+    def chapter_html(self, key: str) -> Optional[str]:
+        if not key.isdigit() or int(key) >= len(self.pages):
+            return None
+        _, path = self.pages[int(key)]
+        if not path.exists():
+            return None
+        text = path.read_text(encoding="utf-8")
+        # 캐시 HTML의 상대 이미지 경로가 그대로 풀리도록 base를 HTML이 있는 폴더로 맞춤
+        parent = path.parent.resolve()
+        base = f'<base href="/{parent.relative_to(self.root).as_posix()}/">' if parent.is_relative_to(self.root) else ""
+        text = text.replace("<head>", f"<head><meta charset='utf-8'>{base}", 1) if "<head>" in text \
+            else text.replace("<html>", f"<html><head><meta charset='utf-8'>{base}</head>", 1)
+        script = RELOAD_SCRIPT % (key, key)
+        return text.replace("</body>", script + "</body>", 1) if "</body>" in text else text + script
+
+    def start(self) -> "PreviewServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "PreviewServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+class Watcher:
+    """원고 색인으로 바뀐 챕터를 찾아 변환/번역하고 미리보기 서버에 알림"""
+
+    def __init__(self, root: Path, preview: PreviewServer, tm_path: Path = WORK / "tm.sqlite",
+                 translate: bool = True, manifest: Optional[Path] = SOURCE_MANIFEST):
+        self.root = Path(root)
+        self.preview = preview
+        self.tm_path = tm_path
+        self.translate = translate
+        self.index = SourceIndex.load(self.root, manifest) if manifest else SourceIndex(self.root)
+        self.chapters: list = []
+
+    def refresh(self, first: bool = False) -> List[str]:
+        """색인을 갱신하고 바뀐 챕터만 다시 만듦 (다시 만든 챕터의 파일명 목록 반환)
+
+        변환/번역이 실패해도 바뀐 챕터를 잊지 않도록, 색인은 모든 챕터를 만든 뒤에만
+        저장하고 결과 파일이 빠진 챕터가 있으면 원고가 그대로여도 다시 시도합니다.
+        """
+        from chapter_build import Chapter, convert_chapter, translate_chapter
+
+        self.index.scan(verbose=first)
+        if not first and not self.index.changed and not self.index.removed \
+                and all(self._target(ch).exists() for ch in self.chapters):
+            return []
+        files = build_order(self.root, self.index)
+        self.chapters = [Chapter(src, self.index.sha256(src)) for src in files]
+
+        rebuilt = []
+        for i, ch in enumerate(self.chapters):
+            start = time.perf_counter()
+            if self._target(ch).exists():
+                continue
+            if not ch.en_html.exists():
+                convert_chapter(ch)
+            if self.translate:
+                translate_chapter(ch, self.tm_path)
+            rebuilt.append(ch.source.name)
+            # 한 챕터가 끝날 때마다 바로 보여 줌 (나머지 챕터를 기다리지 않음)
+            self.preview.publish(self._pages(), str(i))
+            print(f"[WATCH] {ch.source.name} 갱신 ({time.perf_counter() - start:.1f}s)")
+        self.index.save()
+        self.preview.publish(self._pages(), "index")
+        return rebuilt
+
+    def _target(self, ch) -> Path:
+        return ch.ko_html if self.translate else ch.en_html
+
+    def _pages(self) -> List[tuple]:
+        pages = []
+        for ch in self.chapters:
+            path = ch.ko_html if self.translate and ch.ko_html.exists() else ch.en_html
+            pages.append((ch.source.stem, path))
+        return pages
+
+def _wait_with_watchdog(root: Path, changed: threading.Event) -> Optional[Callable[[], None]]:
+    """watchdog이 있으면 docx 변경 시 changed를 세우는 감시자를 시작 (없으면 None)"""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+            if any(str(p).endswith(".docx") for p in paths):
+                changed.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(root), recursive=True)
+    observer.start()
+
+    def stop():
+        observer.stop()
+        observer.join()
+    return stop
+
+def watch(root: Path, preview: PreviewServer, translate: bool = True,
+          poll_s: float = WATCH_POLL_S, debounce_s: float = 0.3) -> None:
+    """Ctrl+C까지 원고 폴더를 감시하며 바뀐 챕터를 다시 만듦"""
+    watcher = Watcher(root, preview, translate=translate)
+    watcher.refresh(first=True)
+    print(f"[WATCH] 미리보기: {preview.base_url}  (원고: {root})")
+
+    changed = threading.Event()
+    stop = _wait_with_watchdog(root, changed)
+    print("[WATCH] 파일 시스템 알림으로 감시" if stop else f"[WATCH] {poll_s}s 간격으로 확인 (watchdog 없음)")
+    try:
+        while True:
+            if stop:
+                changed.wait()
+                time.sleep(debounce_s)  # 저장 도중 여러 번 오는 알림을 한 번으로
+                changed.clear()
+            else:
+                time.sleep(poll_s)
+            try:
+                watcher.refresh()
+            except Exception as e:  # 저장 중인 docx 등: 빠진 챕터는 다음 갱신 때 다시 시도
+                print(f"[WATCH] 갱신 실패: {type(e).__name__}: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stop:
+            stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="원고를 감시하며 바뀐 챕터만 다시 만들어 미리보기")
+    parser.add_argument("--src", default=SRC_DIR, help="원고 폴더 (기본 SRC_DIR)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PREVIEW_PORT)
+    parser.add_argument("--no-translate", action="store_true", help="번역 없이 변환 결과만 미리보기")
+    parser.add_argument("--poll", type=float, default=WATCH_POLL_S, help="watchdog이 없을 때 확인 간격(초)")
+    args = parser.parse_args(argv)
+    with PreviewServer(WORK, args.host, args.port) as preview:
+        watch(Path(args.src), preview, translate=not args.no_translate, poll_s=args.poll)
+
+if __name__ == "__main__":
+    main()